@@ -7,7 +7,10 @@ from .models import Customer
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'whatsapp_number', 'company', 'is_active', 'created_at']
+    list_display = [
+        'name', 'email', 'whatsapp_number', 'company', 'projects_count', 'total_projects_value',
+        'total_paid', 'is_active', 'created_at'
+    ]
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'email', 'company', 'whatsapp_number']
     fieldsets = (
@@ -22,3 +25,18 @@ class CustomerAdmin(admin.ModelAdmin):
         }),
     )
     readonly_fields = ['created_at', 'updated_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_stats()
+    
+    @admin.display(description='Projects', ordering='projects_count')
+    def projects_count(self, obj):
+        return obj.projects_count
+    
+    @admin.display(description='Total Budget', ordering='total_projects_value')
+    def total_projects_value(self, obj):
+        return obj.total_projects_value
+    
+    @admin.display(description='Total Paid', ordering='total_paid')
+    def total_paid(self, obj):
+        return obj.total_paid
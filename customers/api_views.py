@@ -7,20 +7,40 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Customer
 from .serializers import CustomerSerializer, CustomerListSerializer
-from services.google_sheets import GoogleSheetsService
 from services.whatsapp import WhatsAppService
+from search.autocomplete import AutocompleteMixin
+from project_manager.atomic import AtomicWriteMixin
+from project_manager.bulk import BulkWriteMixin, raw_delete
+from project_manager.conditional import ConditionalGetMixin
+from sync.outbox import enqueue
+from payments.models import PaymentRollup
+from projects.deletion import delete_projects
+from projects.models import Project
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ConditionalGetMixin, AtomicWriteMixin, BulkWriteMixin, AutocompleteMixin, viewsets.ModelViewSet):
     """ViewSet for Customer"""
-    queryset = Customer.objects.prefetch_related('projects').all()
+    queryset = Customer.objects.with_stats()
     permission_classes = [IsAuthenticated]
+    autocomplete_entity = 'customer'
+    bulk_entity = 'customer'
+    bulk_collection = 'customers'
+    etag_collections = ['customers', 'projects']
+    # Project counts and totals
+    etag_detail_collections = ['projects', 'payments']
     
     def get_serializer_class(self):
         if self.action == 'list':
             return CustomerListSerializer
         return CustomerSerializer
     
+    def bulk_delete(self, customers):
+        """Also delete the customers' projects, which cascade from them"""
+        ids = [customer.pk for customer in customers]
+        delete_projects(list(Project.objects.select_for_update().filter(customer_id__in=ids)))
+        raw_delete(PaymentRollup.objects.filter(customer_id__in=ids))
+        super().bulk_delete(customers)
+    
     @action(detail=True, methods=['post'])
     def send_whatsapp(self, request, pk=None):
         """Send WhatsApp message to customer"""
@@ -62,31 +82,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def sync_to_sheets(self, request, pk=None):
-        """Sync customer to Google Sheets"""
+        """Queue customer for syncing to Google Sheets"""
         customer = self.get_object()
-        try:
-            sheets_service = GoogleSheetsService()
-            customers_data = [{
-                'id': customer.id,
-                'name': customer.name,
-                'email': customer.email or '',
-                'whatsapp_number': customer.whatsapp_number or '',
-                'phone_number': customer.phone_number or '',
-                'company': customer.company or '',
-                'address': customer.address or '',
-                'notes': customer.notes or '',
-                'created_at': customer.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': customer.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-            }]
-            url = sheets_service.sync_customers(customers_data)
-            return Response({
-                'success': True,
-                'message': 'Customer synced to Google Sheets successfully',
-                'sheet_url': url
-            })
-        except Exception as e:
-            return Response({
-                'success': False,
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        enqueue('customer', customer.pk)
+        return Response({
+            'success': True,
+            'message': 'Customer queued for syncing to Google Sheets'
+        }, status=status.HTTP_202_ACCEPTED)
 
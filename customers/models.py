@@ -1,8 +1,31 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import EmailValidator
 from django.urls import reverse
 
 
+class CustomerQuerySet(models.QuerySet):
+    """QuerySet for Customer"""
+
+    def with_stats(self):
+        """Annotate project counts, total project budget and total paid in the main query"""
+        from payments.models import PaymentPart
+
+        money = models.DecimalField(max_digits=14, decimal_places=2)
+        paid = (
+            PaymentPart.objects.filter(project__customer=OuterRef('pk')).order_by()
+            .values('project__customer').annotate(total=Sum('amount')).values('total')
+        )
+        return self.annotate(
+            projects_count=Count('projects'),
+            active_projects_count=Count('projects', filter=Q(projects__is_active=True)),
+            total_projects_value=Coalesce(Sum('projects__total_budget'), Value(Decimal('0.00')), output_field=money),
+            total_paid=Coalesce(Subquery(paid), Value(Decimal('0.00')), output_field=money),
+        )
+
+
 class Customer(models.Model):
     """Customer model to store customer information"""
     name = models.CharField(max_length=200)
@@ -16,10 +39,18 @@ class Customer(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = CustomerQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Customer'
         verbose_name_plural = 'Customers'
+        indexes = [
+            # List page (keyset ordering)
+            models.Index(fields=['-created_at', '-id']),
+            # Changes since a sync token
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return self.name
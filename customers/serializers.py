@@ -2,6 +2,7 @@
 Serializers for Customers app
 """
 from rest_framework import serializers
+from django.db.models import Sum
 from .models import Customer
 
 
@@ -9,14 +10,16 @@ class CustomerSerializer(serializers.ModelSerializer):
     """Serializer for Customer"""
     whatsapp_link = serializers.SerializerMethodField()
     projects_count = serializers.SerializerMethodField()
+    active_projects_count = serializers.SerializerMethodField()
     total_projects_value = serializers.SerializerMethodField()
+    total_paid = serializers.SerializerMethodField()
     
     class Meta:
         model = Customer
         fields = [
             'id', 'name', 'email', 'whatsapp_number', 'whatsapp_link',
             'phone_number', 'company', 'address', 'notes',
-            'projects_count', 'total_projects_value',
+            'projects_count', 'active_projects_count', 'total_projects_value', 'total_paid',
             'created_at', 'updated_at', 'is_active'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -24,11 +27,26 @@ class CustomerSerializer(serializers.ModelSerializer):
     def get_whatsapp_link(self, obj):
         return obj.get_whatsapp_link()
     
+    # Annotated by Customer.objects.with_stats(); saved instances fall back to queries
     def get_projects_count(self, obj):
+        if hasattr(obj, 'projects_count'):
+            return obj.projects_count
         return obj.projects.count()
     
+    def get_active_projects_count(self, obj):
+        if hasattr(obj, 'active_projects_count'):
+            return obj.active_projects_count
+        return obj.projects.filter(is_active=True).count()
+    
     def get_total_projects_value(self, obj):
-        return sum(project.total_budget for project in obj.projects.all())
+        if hasattr(obj, 'total_projects_value'):
+            return obj.total_projects_value
+        return obj.projects.aggregate(total=Sum('total_budget'))['total'] or 0
+    
+    def get_total_paid(self, obj):
+        if hasattr(obj, 'total_paid'):
+            return obj.total_paid
+        return obj.projects.aggregate(total=Sum('payment_parts__amount'))['total'] or 0
 
 
 class CustomerListSerializer(serializers.ModelSerializer):
@@ -44,8 +62,25 @@ class CustomerListSerializer(serializers.ModelSerializer):
         ]
     
     def get_projects_count(self, obj):
+        if hasattr(obj, 'projects_count'):
+            return obj.projects_count
         return obj.projects.count()
     
     def get_whatsapp_link(self, obj):
         return obj.get_whatsapp_link()
 
+
+class CustomerSyncSerializer(serializers.ModelSerializer):
+    """Serializer for delta sync records, without project stats, which change without touching the customer"""
+    whatsapp_link = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Customer
+        fields = [
+            'id', 'name', 'email', 'whatsapp_number', 'whatsapp_link',
+            'phone_number', 'company', 'address', 'notes',
+            'created_at', 'updated_at', 'is_active'
+        ]
+    
+    def get_whatsapp_link(self, obj):
+        return obj.get_whatsapp_link()
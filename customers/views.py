@@ -4,32 +4,26 @@ Views for Customers app
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import transaction
+from project_manager.pagination import paginate
+from search.index import matching
 from .models import Customer
 from .forms import CustomerForm
-from services.google_sheets import GoogleSheetsService
 from services.whatsapp import WhatsAppService
 
 
 @login_required
 def customer_list(request):
     """List all customers"""
-    customers = Customer.objects.prefetch_related('projects').all()
+    customers = Customer.objects.with_stats()
     
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        customers = customers.filter(
-            Q(name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(company__icontains=search_query)
-        )
+        customers = customers.filter(pk__in=matching('customer', search_query))
     
-    # Pagination
-    paginator = Paginator(customers, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on the model ordering
+    page_obj = paginate(request, customers)
     
     context = {
         'page_obj': page_obj,
@@ -61,28 +55,9 @@ def customer_create(request):
     if request.method == 'POST':
         form = CustomerForm(request.POST)
         if form.is_valid():
-            customer = form.save()
+            with transaction.atomic():
+                customer = form.save()
             messages.success(request, f'Customer "{customer.name}" created successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                customers_data = [{
-                    'id': customer.id,
-                    'name': customer.name,
-                    'email': customer.email or '',
-                    'whatsapp_number': customer.whatsapp_number or '',
-                    'phone_number': customer.phone_number or '',
-                    'company': customer.company or '',
-                    'address': customer.address or '',
-                    'notes': customer.notes or '',
-                    'created_at': customer.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': customer.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_customers(customers_data)
-            except Exception as e:
-                messages.warning(request, f'Customer created but Google Sheets sync failed: {str(e)}')
-            
             return redirect('customers:detail', pk=customer.pk)
     else:
         form = CustomerForm()
@@ -98,28 +73,9 @@ def customer_update(request, pk):
     if request.method == 'POST':
         form = CustomerForm(request.POST, instance=customer)
         if form.is_valid():
-            customer = form.save()
+            with transaction.atomic():
+                customer = form.save()
             messages.success(request, f'Customer "{customer.name}" updated successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                customers_data = [{
-                    'id': customer.id,
-                    'name': customer.name,
-                    'email': customer.email or '',
-                    'whatsapp_number': customer.whatsapp_number or '',
-                    'phone_number': customer.phone_number or '',
-                    'company': customer.company or '',
-                    'address': customer.address or '',
-                    'notes': customer.notes or '',
-                    'created_at': customer.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': customer.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_customers(customers_data)
-            except Exception as e:
-                messages.warning(request, f'Customer updated but Google Sheets sync failed: {str(e)}')
-            
             return redirect('customers:detail', pk=customer.pk)
     else:
         form = CustomerForm(instance=customer)
@@ -1,3 +1,11 @@
+"""
+Admin configuration for Dashboard app
+"""
 from django.contrib import admin
+from .models import FinancialSummary
 
-# Register your models here.
+
+@admin.register(FinancialSummary)
+class FinancialSummaryAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'key', 'project_count', 'total_budget', 'total_revenue', 'total_cost', 'total_paid']
+    list_filter = ['scope']
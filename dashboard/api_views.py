@@ -0,0 +1,20 @@
+"""
+API Views for Dashboard app
+"""
+from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from project_manager.conditional import ConditionalGetMixin
+from .stats import dashboard_stats
+
+
+class DashboardViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """ViewSet for dashboard statistics"""
+    permission_classes = [IsAuthenticated]
+    etag_collections = ['projects', 'customers', 'payments']
+    
+    def list(self, request):
+        """Get project, customer and payment statistics"""
+        return self.conditional_response(
+            request, self.etag_collections, [], lambda request: Response(dashboard_stats())
+        )
@@ -0,0 +1,19 @@
+"""
+Check the materialized financial summary against the projects and payments tables
+"""
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.summary import check_financial_summary
+
+
+class Command(BaseCommand):
+    help = 'Report financial summary rows that differ from a full recomputation'
+    
+    def handle(self, *args, **options):
+        problems = check_financial_summary()
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if problems:
+            raise CommandError(
+                f'{len(problems)} financial summary values are out of date; run rebuild_financial_summary'
+            )
+        self.stdout.write(self.style.SUCCESS('Financial summary is consistent'))
@@ -0,0 +1,13 @@
+"""
+Rebuild the materialized financial summary
+"""
+from django.core.management.base import BaseCommand
+from dashboard.summary import rebuild_financial_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the financial summary from all projects and payments'
+    
+    def handle(self, *args, **options):
+        rows = rebuild_financial_summary()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} financial summary rows'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'All Projects'), ('status', 'Status'), ('project_type', 'Project Type'), ('customer', 'Customer')], max_length=20)),
+                ('key', models.CharField(blank=True, help_text='Status value or related ID; empty for global and untyped projects', max_length=50)),
+                ('project_count', models.PositiveIntegerField(default=0)),
+                ('active_project_count', models.PositiveIntegerField(default=0)),
+                ('total_budget', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('profit', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('loss', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Financial Summary',
+                'verbose_name_plural': 'Financial Summaries',
+                'ordering': ['scope', 'key'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='unique_financial_summary_scope_key')],
+            },
+        ),
+    ]
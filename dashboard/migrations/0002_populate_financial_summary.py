@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def populate(apps, schema_editor):
+    from dashboard.summary import rebuild_financial_summary
+    rebuild_financial_summary(
+        apps.get_model('projects', 'Project'),
+        apps.get_model('payments', 'PaymentPart'),
+        apps.get_model('dashboard', 'FinancialSummary'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('projects', '0001_initial'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
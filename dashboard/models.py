@@ -1,3 +1,33 @@
 from django.db import models
 
-# Create your models here.
+
+class FinancialSummary(models.Model):
+    """Running project and payment totals, overall and per status, project type and customer"""
+    SCOPE_CHOICES = [
+        ('global', 'All Projects'),
+        ('status', 'Status'),
+        ('project_type', 'Project Type'),
+        ('customer', 'Customer'),
+    ]
+    
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=50, blank=True, help_text="Status value or related ID; empty for global and untyped projects")
+    project_count = models.PositiveIntegerField(default=0)
+    active_project_count = models.PositiveIntegerField(default=0)
+    total_budget = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    profit = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    loss = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    
+    class Meta:
+        ordering = ['scope', 'key']
+        verbose_name = 'Financial Summary'
+        verbose_name_plural = 'Financial Summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_financial_summary_scope_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_scope_display()} {self.key}".strip()
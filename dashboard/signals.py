@@ -0,0 +1,101 @@
+"""
+Signal handlers that keep dashboard data up to date
+"""
+from decimal import Decimal
+from django.db.models import Sum
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from projects.models import Project, ProjectType, ProjectImage, ProjectFile
+from customers.models import Customer
+from payments.models import PaymentPart
+from services.cache_versions import bump_versions
+from . import summary
+
+
+COLLECTIONS = {
+    Project: 'projects',
+    ProjectType: 'project_types',
+    ProjectImage: 'project_images',
+    ProjectFile: 'project_files',
+    Customer: 'customers',
+    PaymentPart: 'payments',
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectType)
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=ProjectFile)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=PaymentPart)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectType)
+@receiver(post_delete, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectFile)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=PaymentPart)
+def bump_collection_version(sender, **kwargs):
+    """Invalidate cached data built from the changed collection"""
+    bump_versions(COLLECTIONS[sender])
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_values(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of a project so its summary change can be applied after saving"""
+    if not raw:
+        instance._summary_values = summary.stored_project_values(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Project)
+def update_project_summary(sender, instance, created, raw=False, **kwargs):
+    """Apply a project write to the financial summary"""
+    if raw:
+        return
+    old_values = None if created else getattr(instance, '_summary_values', None)
+    new_values = summary.project_values(instance)
+    paid = None
+    if old_values and summary.project_scopes(old_values) != summary.project_scopes(new_values):
+        paid = instance.payment_parts.aggregate(total=Sum('amount'))['total']
+    summary.project_changed(old_values, new_values, paid)
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_summary(sender, instance, **kwargs):
+    """Remove a deleted project from the financial summary (its payments are removed first)"""
+    summary.project_changed(summary.project_values(instance), None)
+
+
+@receiver(pre_save, sender=PaymentPart)
+def remember_payment_values(sender, instance, raw=False, **kwargs):
+    """Keep the stored project and amount of a payment"""
+    if not raw:
+        instance._summary_values = (
+            PaymentPart.objects.filter(pk=instance.pk).values('project_id', 'amount').first()
+            if instance.pk else None
+        )
+
+
+@receiver(post_save, sender=PaymentPart)
+def update_payment_summary(sender, instance, created, raw=False, **kwargs):
+    """Apply a payment write to the financial summary"""
+    if raw:
+        return
+    old_values = None if created else getattr(instance, '_summary_values', None)
+    amount = Decimal(str(instance.amount))
+    if old_values and old_values['project_id'] == instance.project_id:
+        amount = amount - old_values['amount']
+    elif old_values:
+        summary.payment_changed(old_values['project_id'], -old_values['amount'])
+    summary.payment_changed(instance.project_id, amount)
+
+
+@receiver(post_delete, sender=PaymentPart)
+def remove_payment_summary(sender, instance, **kwargs):
+    """Remove a deleted payment from the financial summary"""
+    summary.payment_changed(instance.project_id, -instance.amount)
+
+
+@receiver(pre_delete, sender=ProjectType)
+def move_project_type_summary(sender, instance, **kwargs):
+    """Projects of a deleted type become untyped without a save, so move the totals here"""
+    summary.project_type_deleted(instance.pk)
@@ -0,0 +1,43 @@
+"""
+Dashboard statistics
+"""
+from django.db.models import Count, Q
+from projects.models import Project
+from customers.models import Customer
+from .models import FinancialSummary
+
+
+def dashboard_stats() -> dict:
+    """
+    Compute the dashboard statistics with two queries.
+    
+    Project and payment totals come from the global and per-status
+    financial summary rows; customer counts are conditional aggregates
+    (filter=), so adding a metric adds no round trips.
+    """
+    summaries = {
+        (row.scope, row.key): row
+        for row in FinancialSummary.objects.filter(scope__in=['global', 'status'])
+    }
+    overall = summaries.get(('global', '')) or FinancialSummary()
+    
+    stats = {
+        'total_projects': overall.project_count,
+        'active_projects': overall.active_project_count,
+        'total_budget': overall.total_budget,
+        'total_revenue': overall.total_revenue,
+        'total_cost': overall.total_cost,
+        'total_profit': overall.profit,
+        'total_loss': overall.loss,
+        'total_paid': overall.total_paid,
+    }
+    stats.update(Customer.objects.aggregate(
+        total_customers=Count('id'),
+        active_customers=Count('id', filter=Q(is_active=True)),
+    ))
+    stats['projects_by_status'] = [
+        {'status': status, 'count': summaries[('status', status)].project_count}
+        for status in sorted(status for status, label in Project.STATUS_CHOICES)
+        if ('status', status) in summaries and summaries[('status', status)].project_count
+    ]
+    return stats
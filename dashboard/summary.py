@@ -0,0 +1,226 @@
+"""
+Materialized financial summary
+Totals are kept up to date by applying the change of each project or payment
+write to the summary rows it belongs to, so reading them is a single lookup
+"""
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from projects.models import Project
+from payments.models import PaymentPart
+from .models import FinancialSummary
+
+
+PROJECT_FIELDS = ['total_budget', 'total_revenue', 'total_cost', 'profit', 'loss']
+SUMMARY_FIELDS = ['project_count', 'active_project_count'] + PROJECT_FIELDS + ['total_paid']
+
+# Summary scope -> Project field that picks its row
+SCOPE_FIELDS = {
+    'status': 'status',
+    'project_type': 'project_type_id',
+    'customer': 'customer_id',
+}
+PROJECT_VALUE_FIELDS = list(SCOPE_FIELDS.values()) + PROJECT_FIELDS + ['is_active']
+
+
+def project_scopes(values: dict) -> list:
+    """Get the (scope, key) rows a project with these field values counts towards"""
+    scopes = [('global', '')]
+    for scope, field in SCOPE_FIELDS.items():
+        value = values[field]
+        scopes.append((scope, '' if value is None else str(value)))
+    return scopes
+
+
+def project_values(project) -> dict:
+    """Get the fields of a Project instance that the summary depends on"""
+    return {field: getattr(project, field) for field in PROJECT_VALUE_FIELDS}
+
+
+def stored_project_values(project_id) -> dict:
+    """Get the summary fields of a project as stored in the database, or None"""
+    return Project.objects.filter(pk=project_id).values(*PROJECT_VALUE_FIELDS).first()
+
+
+def project_contribution(values: dict, sign: int = 1) -> dict:
+    """Get what a project adds to (sign=1) or removes from (sign=-1) its summary rows"""
+    delta = {
+        'project_count': sign,
+        'active_project_count': sign if values['is_active'] else 0,
+    }
+    for field in PROJECT_FIELDS:
+        delta[field] = sign * Decimal(str(values[field] or 0))
+    return delta
+
+
+def apply_delta(scopes: list, delta: dict):
+    """Add delta to the given summary rows with one UPDATE, creating missing rows"""
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if not changes or not scopes:
+        return
+    
+    rows = reduce(or_, (Q(scope=scope, key=key) for scope, key in scopes))
+    if FinancialSummary.objects.filter(rows).update(**changes) < len(scopes):
+        existing = set(FinancialSummary.objects.filter(rows).values_list('scope', 'key'))
+        missing = [scope for scope in scopes if scope not in existing]
+        FinancialSummary.objects.bulk_create(
+            [FinancialSummary(scope=scope, key=key) for scope, key in missing], ignore_conflicts=True
+        )
+        FinancialSummary.objects.filter(
+            reduce(or_, (Q(scope=scope, key=key) for scope, key in missing))
+        ).update(**changes)
+
+
+def project_changed(old_values: dict, new_values: dict, paid=None):
+    """
+    Apply a project write. old_values or new_values is None for creates and
+    deletes; paid (the project's payment total) is only needed when the
+    project moves to another status, type or customer.
+    """
+    projects_changed([(old_values, new_values, paid)])
+
+
+def _project_deltas(old_values: dict, new_values: dict, paid=None):
+    """Yield the (summary rows, delta) pairs of one project write"""
+    old_scopes = project_scopes(old_values) if old_values else []
+    new_scopes = project_scopes(new_values) if new_values else []
+    
+    if old_scopes == new_scopes:
+        old = project_contribution(old_values, -1)
+        new = project_contribution(new_values)
+        yield new_scopes, {field: old[field] + new[field] for field in old}
+        return
+    
+    # Rows that the project stays in only see the change of its values
+    kept = [scope for scope in new_scopes if scope in old_scopes]
+    if old_values and new_values:
+        old = project_contribution(old_values, -1)
+        new = project_contribution(new_values)
+        yield kept, {field: old[field] + new[field] for field in old}
+    
+    paid = Decimal(str(paid or 0))
+    if old_values:
+        yield (
+            [scope for scope in old_scopes if scope not in kept],
+            dict(project_contribution(old_values, -1), total_paid=-paid),
+        )
+    if new_values:
+        yield (
+            [scope for scope in new_scopes if scope not in kept],
+            dict(project_contribution(new_values), total_paid=paid),
+        )
+
+
+def projects_changed(changes):
+    """
+    Apply many project writes, given as (old_values, new_values, paid)
+    tuples like project_changed's arguments. Their deltas are added up per
+    summary row and rows with the same total change share one UPDATE.
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    for old_values, new_values, paid in changes:
+        for scopes, delta in _project_deltas(old_values, new_values, paid):
+            for scope in scopes:
+                for field, value in delta.items():
+                    totals[scope][field] += value
+    
+    rows = defaultdict(list)
+    for scope, delta in totals.items():
+        rows[tuple(sorted((field, value) for field, value in delta.items() if value))].append(scope)
+    for delta, scopes in rows.items():
+        apply_delta(scopes, dict(delta))
+
+
+def payment_changed(project_id, amount):
+    """Apply a change of amount to the payment total of a project's summary rows"""
+    values = stored_project_values(project_id)
+    if values and amount:
+        apply_delta(project_scopes(values), {'total_paid': Decimal(str(amount))})
+
+
+def _compute_summaries(project_model=Project, payment_model=PaymentPart) -> dict:
+    """Compute every summary row from scratch, as {(scope, key): {field: value}}"""
+    project_totals = dict(
+        project_count=Count('id'),
+        active_project_count=Count('id', filter=Q(is_active=True)),
+        **{field: Sum(field) for field in PROJECT_FIELDS},
+    )
+    groups = [('global', None)] + list(SCOPE_FIELDS.items())
+    summaries = {}
+    
+    for scope, field in groups:
+        projects = project_model.objects.order_by()
+        payments = payment_model.objects.order_by()
+        if field:
+            projects = projects.values(field)
+            payments = payments.values(f'project__{field}')
+        rows = projects.annotate(**project_totals) if field else [projects.aggregate(**project_totals)]
+        paid_rows = (
+            payments.annotate(total_paid=Sum('amount')) if field
+            else [payments.aggregate(total_paid=Sum('amount'))]
+        )
+        
+        for row in rows:
+            if not row['project_count']:
+                continue
+            key = '' if not field or row[field] is None else str(row[field])
+            summaries[(scope, key)] = {
+                name: row[name] or (0 if name.endswith('count') else Decimal('0.00'))
+                for name in SUMMARY_FIELDS if name != 'total_paid'
+            }
+            summaries[(scope, key)]['total_paid'] = Decimal('0.00')
+        for row in paid_rows:
+            value = row[f'project__{field}'] if field else None
+            key = '' if value is None else str(value)
+            if (scope, key) in summaries:
+                summaries[(scope, key)]['total_paid'] = row['total_paid'] or Decimal('0.00')
+    
+    return summaries
+
+
+def rebuild_financial_summary(project_model=Project, payment_model=PaymentPart,
+                              summary_model=FinancialSummary) -> int:
+    """Recompute all summary rows from the projects and payments tables; returns the row count"""
+    summaries = _compute_summaries(project_model, payment_model)
+    with transaction.atomic():
+        summary_model.objects.all().delete()
+        summary_model.objects.bulk_create([
+            summary_model(scope=scope, key=key, **values)
+            for (scope, key), values in summaries.items()
+        ])
+    return len(summaries)
+
+
+def check_financial_summary() -> list:
+    """Compare the stored summary with a full recomputation; returns the differences"""
+    expected = _compute_summaries()
+    stored = {
+        (row['scope'], row['key']): row
+        for row in FinancialSummary.objects.values('scope', 'key', *SUMMARY_FIELDS)
+    }
+    problems = []
+    for scope_key in sorted(set(expected) | set(stored)):
+        label = ':'.join(part for part in scope_key if part)
+        values = expected.get(scope_key, dict.fromkeys(SUMMARY_FIELDS, 0))
+        row = stored.get(scope_key, dict.fromkeys(SUMMARY_FIELDS, 0))
+        for field in SUMMARY_FIELDS:
+            if row[field] != values[field]:
+                problems.append(f'{label} {field}: stored {row[field]}, expected {values[field]}')
+    return problems
+
+
+def project_type_deleted(project_type_id):
+    """Move a deleted project type's totals to untyped projects (its projects are set to NULL)"""
+    row = FinancialSummary.objects.filter(scope='project_type', key=str(project_type_id)).first()
+    if row:
+        apply_delta([('project_type', '')], {field: getattr(row, field) for field in SUMMARY_FIELDS})
+        row.delete()
+
+
+def get_summary(scope: str = 'global', key='') -> FinancialSummary:
+    """Get a summary row, or an unsaved row of zeros if nothing counts towards it"""
+    key = '' if key is None else str(key)
+    return FinancialSummary.objects.filter(scope=scope, key=key).first() or FinancialSummary(scope=scope, key=key)
@@ -1,37 +1,24 @@
 """
 Views for Dashboard app
 """
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Q
+from django.db.models import Count, QuerySet
 from django.utils import timezone
 from datetime import timedelta
 from projects.models import Project, ProjectType
 from customers.models import Customer
 from payments.models import PaymentPart
+from services.cache_versions import get_versions
+from .stats import dashboard_stats
 
 
-@login_required
-def dashboard(request):
-    """Main dashboard view"""
-    # Overall statistics
-    total_projects = Project.objects.count()
-    active_projects = Project.objects.filter(is_active=True).count()
-    total_customers = Customer.objects.count()
-    active_customers = Customer.objects.filter(is_active=True).count()
-    
-    # Financial statistics
-    total_budget = Project.objects.aggregate(Sum('total_budget'))['total_budget__sum'] or 0
-    total_revenue = Project.objects.aggregate(Sum('total_revenue'))['total_revenue__sum'] or 0
-    total_cost = Project.objects.aggregate(Sum('total_cost'))['total_cost__sum'] or 0
-    total_profit = Project.objects.aggregate(Sum('profit'))['profit__sum'] or 0
-    total_loss = Project.objects.aggregate(Sum('loss'))['loss__sum'] or 0
-    total_paid = PaymentPart.objects.aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Projects by status
-    projects_by_status = Project.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
+def _build_context(today):
+    """Compute the dashboard statistics and lists"""
+    # Counts, financial totals and projects by status
+    stats = dashboard_stats()
     
     # Projects by type
     projects_by_type = ProjectType.objects.annotate(
@@ -46,8 +33,8 @@ def dashboard(request):
     
     # Upcoming deadlines (next 30 days)
     upcoming_deadlines = Project.objects.filter(
-        deadline__gte=timezone.now().date(),
-        deadline__lte=timezone.now().date() + timedelta(days=30),
+        deadline__gte=today,
+        deadline__lte=today + timedelta(days=30),
         is_active=True
     ).select_related('customer').order_by('deadline')[:10]
     
@@ -63,20 +50,10 @@ def dashboard(request):
     ).filter(project_count__gt=0).order_by('-project_count')[:10]
     
     context = {
-        # Statistics
-        'total_projects': total_projects,
-        'active_projects': active_projects,
-        'total_customers': total_customers,
-        'active_customers': active_customers,
-        'total_budget': total_budget,
-        'total_revenue': total_revenue,
-        'total_cost': total_cost,
-        'total_profit': total_profit,
-        'total_loss': total_loss,
-        'total_paid': total_paid,
+        # Statistics and projects by status
+        **stats,
         
         # Charts data
-        'projects_by_status': projects_by_status,
         'projects_by_type': projects_by_type,
         
         # Lists
@@ -87,4 +64,30 @@ def dashboard(request):
         'top_customers': top_customers,
     }
     
-    return render(request, 'dashboard/home.html', context)
+    # Evaluate the querysets so the context can be cached
+    return {
+        name: list(value) if isinstance(value, QuerySet) else value
+        for name, value in context.items()
+    }
+
+
+def dashboard_context():
+    """
+    Get the dashboard context, cached until a project, project type,
+    customer or payment changes (or the day rolls over)
+    """
+    today = timezone.now().date()
+    versions = get_versions('projects', 'project_types', 'customers', 'payments')
+    key = 'dashboard:{}:{}'.format(today.isoformat(), ':'.join(str(version) for version in versions.values()))
+    
+    context = cache.get(key)
+    if context is None:
+        context = _build_context(today)
+        cache.set(key, context, settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
+
+
+@login_required
+def dashboard(request):
+    """Main dashboard view"""
+    return render(request, 'dashboard/home.html', dashboard_context())
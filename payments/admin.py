@@ -2,7 +2,7 @@
 Admin configuration for Payments app
 """
 from django.contrib import admin
-from .models import PaymentPart
+from .models import PaymentPart, PaymentRollup
 
 
 @admin.register(PaymentPart)
@@ -11,6 +11,7 @@ class PaymentPartAdmin(admin.ModelAdmin):
     list_filter = ['payment_method', 'payment_date', 'created_at']
     search_fields = ['project__name', 'reference_number', 'notes']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['project']
     fieldsets = (
         ('Payment Information', {
             'fields': ('project', 'amount', 'payment_date', 'payment_method')
@@ -19,3 +20,9 @@ class PaymentPartAdmin(admin.ModelAdmin):
             'fields': ('reference_number', 'notes', 'created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(PaymentRollup)
+class PaymentRollupAdmin(admin.ModelAdmin):
+    list_display = ['period', 'period_start', 'project', 'customer', 'payment_method', 'total_amount', 'payment_count']
+    list_filter = ['period', 'payment_method']
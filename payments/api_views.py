@@ -3,19 +3,28 @@ API Views for Payments app
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db import models
-from .models import PaymentPart
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from .models import PaymentPart, PaymentRollup
+from .importer import import_payments, read_rows
+from .ledger import locked_payment_values, payment_ledger_values, record_payment_change
+from .rollups import rollup_series
 from .serializers import PaymentPartSerializer
-from services.google_sheets import GoogleSheetsService
+from project_manager.conditional import ConditionalGetMixin
+from sync.outbox import enqueue
 
 
-class PaymentPartViewSet(viewsets.ModelViewSet):
+class PaymentPartViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for PaymentPart"""
     queryset = PaymentPart.objects.select_related('project', 'project__customer').all()
     serializer_class = PaymentPartSerializer
     permission_classes = [IsAuthenticated]
+    etag_collections = ['payments', 'projects', 'customers']
+    # The project and customer names shown with the payment
+    etag_fields = ['updated_at', 'project__updated_at', 'project__customer__updated_at']
     
     def get_queryset(self):
         queryset = PaymentPart.objects.select_related('project', 'project__customer').all()
@@ -26,40 +35,82 @@ class PaymentPartViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Create payment part and update project totals"""
-        payment = serializer.save()
-        project = payment.project
-        project.total_revenue = project.payment_parts.aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0.00
-        project.calculate_profit_loss()
-        project.save()
+        with transaction.atomic():
+            payment = serializer.save()
+            record_payment_change(None, payment_ledger_values(payment))
+    
+    def perform_update(self, serializer):
+        """Update payment part and move its change of amount to the project totals"""
+        with transaction.atomic():
+            old_values = locked_payment_values(serializer.instance.pk)
+            payment = serializer.save()
+            record_payment_change(old_values, payment_ledger_values(payment))
+    
+    def perform_destroy(self, instance):
+        """Delete payment part and remove it from the project totals"""
+        with transaction.atomic():
+            old_values = locked_payment_values(instance.pk)
+            instance.delete()
+            record_payment_change(old_values, None)
     
     @action(detail=True, methods=['post'])
     def sync_to_sheets(self, request, pk=None):
-        """Sync payment to Google Sheets"""
+        """Queue payment for syncing to Google Sheets"""
         payment = self.get_object()
+        enqueue('payment', payment.pk)
+        return Response({
+            'success': True,
+            'message': 'Payment queued for syncing to Google Sheets'
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk(self, request):
+        """Import payments from an uploaded CSV or XLSX file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a CSV or XLSX file as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
         try:
-            sheets_service = GoogleSheetsService()
-            payments_data = [{
-                'id': payment.id,
-                'project': payment.project.name,
-                'amount': float(payment.amount),
-                'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
-                'payment_method': payment.get_payment_method_display(),
-                'reference_number': payment.reference_number or '',
-                'notes': payment.notes or '',
-                'created_at': payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': payment.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-            }]
-            url = sheets_service.sync_payments(payments_data)
-            return Response({
-                'success': True,
-                'message': 'Payment synced to Google Sheets successfully',
-                'sheet_url': url
-            })
-        except Exception as e:
-            return Response({
-                'success': False,
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
+            result = import_payments(read_rows(upload, upload.name), dry_run=dry_run)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            dict(result, dry_run=dry_run),
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['get'])
+    def rollup(self, request):
+        """Get daily or monthly payment totals from the rollup table"""
+        params = request.query_params
+        period = params.get('period', 'month')
+        group_by = params.get('group_by') or None
+        if period not in dict(PaymentRollup.PERIOD_CHOICES):
+            return Response({'error': 'period must be "day" or "month"'}, status=status.HTTP_400_BAD_REQUEST)
+        if group_by not in (None, 'project', 'customer', 'payment_method'):
+            return Response(
+                {'error': 'group_by must be "project", "customer" or "payment_method"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dates = {}
+        for name in ('start', 'end'):
+            value = params.get(name)
+            try:
+                dates[name] = parse_date(value) if value else None
+            except ValueError:
+                dates[name] = None
+            if value and dates[name] is None:
+                return Response({'error': f'{name} must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+        for name in ('project', 'customer'):
+            value = params.get(name)
+            if value and not value.isdecimal():
+                return Response({'error': f'{name} must be an ID'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = rollup_series(
+            period, dates['start'], dates['end'], group_by,
+            project=params.get('project'),
+            customer=params.get('customer'),
+            payment_method=params.get('payment_method'),
+        )
+        return Response({'period': period, 'results': results})
@@ -2,6 +2,7 @@
 Forms for Payments app
 """
 from django import forms
+from search.autocomplete import AutocompleteSelect
 from .models import PaymentPart
 
 
@@ -15,7 +16,7 @@ class PaymentPartForm(forms.ModelForm):
             'reference_number', 'notes'
         ]
         widgets = {
-            'project': forms.Select(attrs={'class': 'form-select'}),
+            'project': AutocompleteSelect('project-autocomplete', attrs={'class': 'form-select'}),
             'amount': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
             'payment_date': forms.DateInput(attrs={'class': 'form-input', 'type': 'date'}),
             'payment_method': forms.Select(attrs={'class': 'form-select'}),
@@ -0,0 +1,227 @@
+"""
+Bulk payment import from CSV or XLSX files
+Rows are read one at a time and validated and inserted in batches; the
+derived data that model signals would maintain is then brought up to date
+once per project instead of once per payment
+"""
+import csv
+import io
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from dashboard import summary
+from projects.models import Project
+from search.index import index_objects
+from services.cache_versions import bump_versions
+from sync.models import SheetSyncOutbox
+from .ledger import apply_revenue_delta
+from .models import PaymentPart
+from .rollups import apply_payment, rebuild_payment_rollups
+
+
+# Above this many (project, day, method) groups a full rollup rebuild is cheaper than per-group updates
+ROLLUP_REBUILD_THRESHOLD = 500
+
+PAYMENT_METHODS = {
+    **{value: value for value, label in PaymentPart.PAYMENT_METHOD_CHOICES},
+    **{label.lower(): value for value, label in PaymentPart.PAYMENT_METHOD_CHOICES},
+}
+
+
+def _header(value) -> str:
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def read_rows(file, filename: str):
+    """
+    Yield each data row of a CSV or XLSX file as a dict keyed by its
+    normalized header ("Payment Date" -> payment_date).
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        if isinstance(file.read(0), bytes):
+            file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        reader = csv.reader(file)
+        header = [_header(name) for name in next(reader, [])]
+        for row in reader:
+            yield dict(zip(header, row))
+    elif extension == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError('Install openpyxl to import .xlsx files')
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_header(name) for name in next(rows, [])]
+            for row in rows:
+                yield dict(zip(header, row))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f'Unsupported file type "{extension}"; use .csv or .xlsx')
+
+
+def _amount(value) -> Decimal:
+    try:
+        amount = Decimal(_text(value).replace(',', '')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'invalid amount "{_text(value)}"')
+    if amount <= 0:
+        raise ValueError('amount must be positive')
+    return amount
+
+
+def _payment_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(_text(value))
+    except ValueError:
+        raise ValueError(f'invalid payment date "{_text(value)}" (use YYYY-MM-DD)')
+
+
+def _payment_method(value) -> str:
+    method = PAYMENT_METHODS.get(_text(value).lower() or 'bank_transfer')
+    if method is None:
+        raise ValueError(f'unknown payment method "{_text(value)}"')
+    return method
+
+
+def _resolve_projects(batch) -> dict:
+    """Map the project references of a batch (IDs or exact names) to project IDs, or None if unknown"""
+    ids, names = set(), set()
+    for row in batch:
+        reference = _text(row.get('project') or row.get('project_id'))
+        if reference.isdigit():
+            ids.add(int(reference))
+        name = _text(row.get('project_name'))
+        if name:
+            names.add(name)
+    
+    resolved = {str(pk): pk for pk in Project.objects.filter(pk__in=ids).values_list('pk', flat=True)}
+    by_name = defaultdict(list)
+    for pk, name in Project.objects.filter(name__in=names).values_list('pk', 'name'):
+        by_name[name].append(pk)
+    for name, pks in by_name.items():
+        resolved[f'name:{name}'] = pks[0] if len(pks) == 1 else None
+    return resolved
+
+
+def _build_payment(row, projects) -> PaymentPart:
+    reference = _text(row.get('project') or row.get('project_id'))
+    name = _text(row.get('project_name'))
+    if reference:
+        project_id = projects.get(reference)
+        if project_id is None:
+            raise ValueError(f'project {reference} does not exist')
+    elif name:
+        if f'name:{name}' not in projects:
+            raise ValueError(f'project "{name}" does not exist')
+        project_id = projects[f'name:{name}']
+        if project_id is None:
+            raise ValueError(f'more than one project is named "{name}"; use the project ID')
+    else:
+        raise ValueError('project is required')
+    
+    return PaymentPart(
+        project_id=project_id,
+        amount=_amount(row.get('amount')),
+        payment_date=_payment_date(row.get('payment_date')),
+        payment_method=_payment_method(row.get('payment_method')),
+        reference_number=_text(row.get('reference_number')) or None,
+        notes=_text(row.get('notes')) or None,
+    )
+
+
+def _insert_batch(batch, result: dict) -> list:
+    """Validate and insert a batch of (row number, row) pairs, returning the created payments"""
+    projects = _resolve_projects([row for row_number, row in batch])
+    payments = []
+    for row_number, row in batch:
+        try:
+            payments.append(_build_payment(row, projects))
+        except ValueError as e:
+            result['errors'].append(f'row {row_number}: {e}')
+    return PaymentPart.objects.bulk_create(payments)
+
+
+class _Changes:
+    """What the imported payments add, per project and per rollup group"""
+    
+    def __init__(self):
+        self.paid = defaultdict(Decimal)
+        self.groups = defaultdict(lambda: [Decimal('0.00'), 0])
+        self.ids = []
+    
+    def add(self, payment):
+        self.paid[payment.project_id] += payment.amount
+        group = self.groups[(payment.project_id, payment.payment_date, payment.payment_method)]
+        group[0] += payment.amount
+        group[1] += 1
+        self.ids.append(payment.pk)
+    
+    def apply(self):
+        """Update what PaymentPart signals maintain for single saves, once per project"""
+        for project_id in sorted(self.paid):
+            apply_revenue_delta(project_id, self.paid[project_id])
+            summary.payment_changed(project_id, self.paid[project_id])
+        
+        if len(self.groups) > ROLLUP_REBUILD_THRESHOLD:
+            rebuild_payment_rollups()
+        else:
+            for (project_id, payment_date, method), (amount, count) in self.groups.items():
+                apply_payment({
+                    'project_id': project_id, 'payment_date': payment_date,
+                    'payment_method': method, 'amount': amount,
+                }, count=count)
+        
+        index_objects('payment', self.ids)
+        SheetSyncOutbox.objects.bulk_create(
+            [SheetSyncOutbox(entity='payment', object_id=pk) for pk in self.ids], batch_size=1000
+        )
+        bump_versions('payments')
+
+
+def import_payments(rows, batch_size: int = 1000, dry_run: bool = False) -> dict:
+    """
+    Import payment rows (dicts from read_rows) in one transaction.
+    
+    Rows are validated and bulk-inserted batch_size at a time; invalid rows
+    are skipped and reported. Project revenue, the financial summary,
+    rollups, search index and Sheets sync are then updated once per project.
+    
+    Returns a dict with the created count, the number of projects updated
+    and a list of row errors.
+    """
+    result = {'created': 0, 'projects': 0, 'errors': []}
+    changes = _Changes()
+    
+    with transaction.atomic():
+        batch = []
+        for row_number, row in enumerate(rows, start=2):
+            if any(_text(value) for value in row.values()):
+                batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                for payment in _insert_batch(batch, result):
+                    changes.add(payment)
+                batch = []
+        for payment in _insert_batch(batch, result) if batch else []:
+            changes.add(payment)
+        
+        changes.apply()
+        result['created'] = len(changes.ids)
+        result['projects'] = len(changes.paid)
+        
+        if dry_run:
+            transaction.set_rollback(True)
+    
+    return result
@@ -0,0 +1,88 @@
+"""
+Project revenue ledger
+Each payment write adds its change of amount to the project's revenue, profit
+and loss with one locked UPDATE, instead of re-summing all of its payments
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from dashboard import summary
+from projects.models import Project
+from services.cache_versions import bump_versions
+from sync.outbox import enqueue
+from .models import PaymentPart
+
+
+ZERO = Value(Decimal('0.00'))
+
+
+def payment_ledger_values(payment) -> dict:
+    """Get the project and amount of a PaymentPart instance"""
+    return {'project_id': payment.project_id, 'amount': Decimal(str(payment.amount))}
+
+
+def locked_payment_values(payment_id) -> dict:
+    """Lock a payment row and get its stored project and amount, or None"""
+    return PaymentPart.objects.select_for_update().filter(pk=payment_id).values('project_id', 'amount').first()
+
+
+def apply_revenue_delta(project_id, amount):
+    """
+    Add amount to a project's revenue and recompute its profit and loss in
+    one UPDATE, keeping the financial summary, caches and Sheets sync in step
+    (the UPDATE skips the model's save signals). A zero amount, from adding or
+    removing a 0.00 payment, only touches updated_at, as the project's payment
+    count still changed.
+    """
+    amount = Decimal(str(amount))
+    if not amount:
+        Project.objects.filter(pk=project_id).update(updated_at=timezone.now())
+        bump_versions('projects')
+        return
+    with transaction.atomic():
+        # Lock the row so concurrent payments queue up instead of losing updates
+        old_values = Project.objects.select_for_update().filter(pk=project_id).values(
+            *summary.PROJECT_VALUE_FIELDS
+        ).first()
+        if old_values is None:
+            return
+        
+        revenue = F('total_revenue') + amount
+        Project.objects.filter(pk=project_id).update(
+            total_revenue=revenue,
+            profit=Greatest(revenue - F('total_cost'), ZERO),
+            loss=Greatest(F('total_cost') - revenue, ZERO),
+            updated_at=timezone.now(),
+        )
+        
+        total_revenue = old_values['total_revenue'] + amount
+        new_values = dict(
+            old_values,
+            total_revenue=total_revenue,
+            profit=max(Decimal('0.00'), total_revenue - old_values['total_cost']),
+            loss=max(Decimal('0.00'), old_values['total_cost'] - total_revenue),
+        )
+        summary.project_changed(old_values, new_values)
+        enqueue('project', project_id)
+        bump_versions('projects')
+
+
+def record_payment_change(old_values: dict = None, new_values: dict = None):
+    """
+    Apply a payment write to its project's revenue; old_values or new_values
+    (from payment_ledger_values) is None for creates and deletes.
+    """
+    deltas = defaultdict(Decimal)
+    if old_values:
+        deltas[old_values['project_id']] -= old_values['amount']
+    if new_values:
+        deltas[new_values['project_id']] += new_values['amount']
+    # Creates, deletes and moves change the projects' payments even for 0.00
+    moved = (old_values or {}).get('project_id') != (new_values or {}).get('project_id')
+    # Lock projects in ID order so payments moved between projects cannot deadlock
+    for project_id in sorted(deltas):
+        if deltas[project_id] or moved:
+            apply_revenue_delta(project_id, deltas[project_id])
@@ -0,0 +1,34 @@
+"""
+Import payment parts from a CSV or XLSX file
+"""
+from django.core.management.base import BaseCommand, CommandError
+from payments.importer import import_payments, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import payments from a CSV or XLSX file with a header row: project (ID) or project_name, '
+        'amount, payment_date (YYYY-MM-DD) and optional payment_method, reference_number and notes'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without saving')
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as f:
+                result = import_payments(read_rows(f, path), options['batch_size'], options['dry_run'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} payments for {result['projects']} projects, "
+            f"skipped {len(result['errors'])} invalid rows"
+        ))
+        if options['dry_run']:
+            self.stdout.write('Dry run: no changes were saved')
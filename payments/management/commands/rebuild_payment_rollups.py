@@ -0,0 +1,13 @@
+"""
+Rebuild the daily and monthly payment rollups
+"""
+from django.core.management.base import BaseCommand
+from payments.rollups import rebuild_payment_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily and monthly payment rollups from all payments'
+    
+    def handle(self, *args, **options):
+        rows = rebuild_payment_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} payment rollup rows'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('payments', '0001_initial'),
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('bank_transfer', 'Bank Transfer'), ('check', 'Check'), ('credit_card', 'Credit Card'), ('online', 'Online Payment'), ('other', 'Other')], max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_rollups', to='customers.customer')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_rollups', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'Payment Rollup',
+                'verbose_name_plural': 'Payment Rollups',
+                'ordering': ['period', 'period_start'],
+                'indexes': [models.Index(fields=['period', 'period_start'], name='payments_pa_period_dc4414_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'project', 'payment_method'), name='unique_payment_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def populate(apps, schema_editor):
+    from payments.rollups import rebuild_payment_rollups
+    rebuild_payment_rollups(apps.get_model('payments', 'PaymentPart'), apps.get_model('payments', 'PaymentRollup'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_paymentrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_populate_paymentrollup'),
+        ('projects', '0002_project_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentpart',
+            index=models.Index(fields=['-payment_date', '-created_at', '-id'], name='payments_pa_payment_6c9820_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentpart',
+            index=models.Index(fields=['project', '-payment_date', '-created_at', '-id'], name='payments_pa_project_786729_idx'),
+        ),
+    ]
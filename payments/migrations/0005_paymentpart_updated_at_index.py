@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_paymentpart_indexes'),
+        ('projects', '0003_project_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentpart',
+            index=models.Index(fields=['updated_at', 'id'], name='payments_pa_updated_12677c_idx'),
+        ),
+    ]
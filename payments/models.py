@@ -27,9 +27,49 @@ class PaymentPart(models.Model):
         ordering = ['-payment_date', '-created_at']
         verbose_name = 'Payment Part'
         verbose_name_plural = 'Payment Parts'
+        indexes = [
+            # List page (keyset ordering) and a project's payments by date
+            models.Index(fields=['-payment_date', '-created_at', '-id']),
+            models.Index(fields=['project', '-payment_date', '-created_at', '-id']),
+            # Changes since a sync token
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.amount} on {self.payment_date}"
 
     def get_absolute_url(self):
         return reverse('payments:detail', kwargs={'pk': self.pk})
+
+
+class PaymentRollup(models.Model):
+    """Payment totals per day or month, project and payment method"""
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+    
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='payment_rollups')
+    customer = models.ForeignKey('customers.Customer', on_delete=models.CASCADE, related_name='payment_rollups')
+    payment_method = models.CharField(max_length=20, choices=PaymentPart.PAYMENT_METHOD_CHOICES)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    payment_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['period', 'period_start']
+        verbose_name = 'Payment Rollup'
+        verbose_name_plural = 'Payment Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'project', 'payment_method'],
+                name='unique_payment_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.project} - {self.total_amount} ({self.period} of {self.period_start})"
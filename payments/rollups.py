@@ -0,0 +1,121 @@
+"""
+Daily and monthly payment rollups
+Each payment write adjusts its day and month rows, so charts read a few
+hundred rollup rows instead of scanning every payment
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils.dateparse import parse_date
+from projects.models import Project
+from .models import PaymentPart, PaymentRollup
+
+
+ROLLUP_FIELDS = ['project_id', 'payment_date', 'payment_method', 'amount']
+
+
+def payment_values(payment) -> dict:
+    """Get the fields of a PaymentPart instance that its rollups depend on"""
+    values = {field: getattr(payment, field) for field in ROLLUP_FIELDS}
+    values['amount'] = Decimal(str(values['amount']))
+    if isinstance(values['payment_date'], str):
+        values['payment_date'] = parse_date(values['payment_date'])
+    return values
+
+
+def stored_payment_values(payment_id) -> dict:
+    """Get the rollup fields of a payment as stored in the database, or None"""
+    return PaymentPart.objects.filter(pk=payment_id).values(*ROLLUP_FIELDS).first()
+
+
+def apply_payment(values: dict, sign: int = 1, count: int = None):
+    """
+    Add (sign=1) or remove (sign=-1) a payment's amount to its day and month
+    rows with one UPDATE; count overrides the payment count change.
+    """
+    payment_date = values['payment_date']
+    periods = {'day': payment_date, 'month': payment_date.replace(day=1)}
+    rows = Q(project_id=values['project_id'], payment_method=values['payment_method']) & (
+        Q(period='day', period_start=periods['day']) | Q(period='month', period_start=periods['month'])
+    )
+    changes = {
+        'total_amount': F('total_amount') + sign * values['amount'],
+        'payment_count': F('payment_count') + (sign if count is None else count),
+    }
+    
+    if PaymentRollup.objects.filter(rows).update(**changes) < len(periods):
+        existing = set(PaymentRollup.objects.filter(rows).values_list('period', flat=True))
+        missing = [period for period in periods if period not in existing]
+        customer_id = Project.objects.filter(pk=values['project_id']).values_list('customer_id', flat=True).first()
+        if customer_id is None:
+            return
+        PaymentRollup.objects.bulk_create([
+            PaymentRollup(
+                period=period, period_start=periods[period], project_id=values['project_id'],
+                customer_id=customer_id, payment_method=values['payment_method'],
+            )
+            for period in missing
+        ], ignore_conflicts=True)
+        PaymentRollup.objects.filter(rows, period__in=missing).update(**changes)
+    
+    if sign < 0:
+        PaymentRollup.objects.filter(rows, payment_count__lte=0).delete()
+
+
+def payment_changed(old_values: dict, new_values: dict):
+    """Apply a payment write; old_values or new_values is None for creates and deletes"""
+    same_rows = old_values and new_values and all(
+        old_values[field] == new_values[field] for field in ROLLUP_FIELDS if field != 'amount'
+    )
+    if same_rows:
+        if old_values['amount'] != new_values['amount']:
+            apply_payment(dict(new_values, amount=new_values['amount'] - old_values['amount']), count=0)
+        return
+    if old_values:
+        apply_payment(old_values, -1)
+    if new_values:
+        apply_payment(new_values)
+
+
+def rebuild_payment_rollups(payment_model=PaymentPart, rollup_model=PaymentRollup) -> int:
+    """Recompute all rollup rows from the payments table; returns the row count"""
+    rollups = []
+    for period, trunc in [('day', TruncDay), ('month', TruncMonth)]:
+        rows = payment_model.objects.order_by().values(
+            'project_id', 'project__customer_id', 'payment_method', period_start=trunc('payment_date'),
+        ).annotate(total_amount=Sum('amount'), payment_count=Count('id'))
+        rollups += [
+            rollup_model(
+                period=period, period_start=row['period_start'], project_id=row['project_id'],
+                customer_id=row['project__customer_id'], payment_method=row['payment_method'],
+                total_amount=row['total_amount'], payment_count=row['payment_count'],
+            )
+            for row in rows
+        ]
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def rollup_series(period: str = 'month', start=None, end=None, group_by: str = None, **filters) -> list:
+    """
+    Get payment totals per period from the rollup table.
+    
+    group_by may be 'project', 'customer' or 'payment_method'; filters
+    (project, customer, payment_method) narrow the rows.
+    """
+    rows = PaymentRollup.objects.filter(period=period, **{
+        name: value for name, value in filters.items() if value not in (None, '')
+    })
+    if start:
+        rows = rows.filter(period_start__gte=start)
+    if end:
+        rows = rows.filter(period_start__lte=end)
+    group = ['period_start'] + ([group_by] if group_by else [])
+    return list(
+        rows.order_by().values(*group)
+        .annotate(total_amount=Sum('total_amount'), payment_count=Sum('payment_count'))
+        .order_by(*group)
+    )
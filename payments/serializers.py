@@ -19,3 +19,13 @@ class PaymentPartSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+
+class PaymentPartSyncSerializer(serializers.ModelSerializer):
+    """Serializer for delta sync records, without project and customer names, which change without touching the payment"""
+    
+    class Meta:
+        model = PaymentPart
+        fields = [
+            'id', 'project', 'amount', 'payment_date', 'payment_method',
+            'reference_number', 'notes', 'created_at', 'updated_at'
+        ]
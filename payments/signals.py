@@ -0,0 +1,39 @@
+"""
+Signal handlers that keep payment rollups up to date
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from projects.models import Project
+from .models import PaymentPart, PaymentRollup
+from . import rollups
+
+
+@receiver(pre_save, sender=PaymentPart)
+def remember_payment_values(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of a payment so its rollup change can be applied after saving"""
+    if not raw:
+        instance._rollup_values = rollups.stored_payment_values(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=PaymentPart)
+def update_payment_rollups(sender, instance, created, raw=False, **kwargs):
+    """Apply a payment write to its day and month rollups"""
+    if raw:
+        return
+    old_values = None if created else getattr(instance, '_rollup_values', None)
+    rollups.payment_changed(old_values, rollups.payment_values(instance))
+
+
+@receiver(post_delete, sender=PaymentPart)
+def remove_payment_rollups(sender, instance, **kwargs):
+    """Remove a deleted payment from its rollups"""
+    rollups.payment_changed(rollups.payment_values(instance), None)
+
+
+@receiver(post_save, sender=Project)
+def move_project_rollups(sender, instance, raw=False, **kwargs):
+    """Keep the customer of a project's rollups in step with the project"""
+    if not raw:
+        PaymentRollup.objects.filter(project=instance).exclude(
+            customer_id=instance.customer_id
+        ).update(customer_id=instance.customer_id)
@@ -4,11 +4,15 @@ Views for Payments app
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q, Sum
+from django.db import transaction
+from django.db.models import Count, Sum
+from project_manager.pagination import paginate
+from search.index import matching
+from dashboard.summary import get_summary
+from services.cache_versions import cached_aggregate
 from .models import PaymentPart
+from .ledger import locked_payment_values, payment_ledger_values, record_payment_change
 from .forms import PaymentPartForm
-from services.google_sheets import GoogleSheetsService
 
 
 @login_required
@@ -19,24 +23,27 @@ def payment_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        payments = payments.filter(
-            Q(project__name__icontains=search_query) |
-            Q(reference_number__icontains=search_query) |
-            Q(notes__icontains=search_query)
-        )
+        payments = payments.filter(pk__in=matching('payment', search_query))
     
     # Filter by project
     project_filter = request.GET.get('project', '')
     if project_filter:
         payments = payments.filter(project_id=project_filter)
     
-    # Pagination
-    paginator = Paginator(payments, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Calculate the total and row count in one query, or the total from the financial summary when unfiltered
+    if search_query or project_filter:
+        totals = cached_aggregate(
+            payments, ['payments', 'projects'], {'search': search_query, 'project': project_filter},
+            payment_count=Count('id'), total_amount=Sum('amount'),
+        )
+        payment_count = totals['payment_count']
+        total_amount = totals['total_amount'] or 0
+    else:
+        payment_count = None
+        total_amount = get_summary().total_paid
     
-    # Calculate totals
-    total_amount = payments.aggregate(Sum('amount'))['amount__sum'] or 0
+    # Keyset pagination on the model ordering
+    page_obj = paginate(request, payments, count=payment_count)
     
     context = {
         'page_obj': page_obj,
@@ -70,36 +77,11 @@ def payment_create(request):
     if request.method == 'POST':
         form = PaymentPartForm(request.POST)
         if form.is_valid():
-            payment = form.save()
-            
-            # Update project totals
-            project = payment.project
-            project.total_revenue = payment.project.payment_parts.aggregate(
-                total=Sum('amount')
-            )['total'] or 0.00
-            project.calculate_profit_loss()
-            project.save()
+            with transaction.atomic():
+                payment = form.save()
+                record_payment_change(None, payment_ledger_values(payment))
             
             messages.success(request, f'Payment of ${payment.amount} recorded successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                payments_data = [{
-                    'id': payment.id,
-                    'project': payment.project.name,
-                    'amount': float(payment.amount),
-                    'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
-                    'payment_method': payment.get_payment_method_display(),
-                    'reference_number': payment.reference_number or '',
-                    'notes': payment.notes or '',
-                    'created_at': payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': payment.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_payments(payments_data)
-            except Exception as e:
-                messages.warning(request, f'Payment recorded but Google Sheets sync failed: {str(e)}')
-            
             return redirect('payments:detail', pk=payment.pk)
     else:
         form = PaymentPartForm()
@@ -111,40 +93,16 @@ def payment_create(request):
 def payment_update(request, pk):
     """Update payment part"""
     payment = get_object_or_404(PaymentPart, pk=pk)
-    project = payment.project
     
     if request.method == 'POST':
         form = PaymentPartForm(request.POST, instance=payment)
         if form.is_valid():
-            payment = form.save()
-            
-            # Update project totals
-            project.total_revenue = project.payment_parts.aggregate(
-                total=Sum('amount')
-            )['total'] or 0.00
-            project.calculate_profit_loss()
-            project.save()
+            with transaction.atomic():
+                old_values = locked_payment_values(payment.pk)
+                payment = form.save()
+                record_payment_change(old_values, payment_ledger_values(payment))
             
             messages.success(request, f'Payment updated successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                payments_data = [{
-                    'id': payment.id,
-                    'project': payment.project.name,
-                    'amount': float(payment.amount),
-                    'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
-                    'payment_method': payment.get_payment_method_display(),
-                    'reference_number': payment.reference_number or '',
-                    'notes': payment.notes or '',
-                    'created_at': payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': payment.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_payments(payments_data)
-            except Exception as e:
-                messages.warning(request, f'Payment updated but Google Sheets sync failed: {str(e)}')
-            
             return redirect('payments:detail', pk=payment.pk)
     else:
         form = PaymentPartForm(instance=payment)
@@ -156,18 +114,13 @@ def payment_update(request, pk):
 def payment_delete(request, pk):
     """Delete payment part"""
     payment = get_object_or_404(PaymentPart, pk=pk)
-    project = payment.project
     
     if request.method == 'POST':
         amount = payment.amount
-        payment.delete()
-        
-        # Update project totals
-        project.total_revenue = project.payment_parts.aggregate(
-            total=Sum('amount')
-        )['total'] or 0.00
-        project.calculate_profit_loss()
-        project.save()
+        with transaction.atomic():
+            old_values = locked_payment_values(payment.pk)
+            payment.delete()
+            record_payment_change(old_values, None)
         
         messages.success(request, f'Payment of ${amount} deleted successfully!')
         return redirect('payments:list')
@@ -0,0 +1,22 @@
+"""
+Atomic API writes
+A save and everything its signals maintain (financial summary, rollups,
+search index, Sheets outbox, cache versions) commit or roll back together
+"""
+from django.db import transaction
+
+
+class AtomicWriteMixin:
+    """Runs the create, update and destroy of a ModelViewSet in one transaction each"""
+    
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
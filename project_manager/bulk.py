@@ -0,0 +1,242 @@
+"""
+Bulk create, update and delete for the API
+A list of records is validated with one many=True serializer (related
+objects are loaded with one query per field) and written with bulk_create,
+bulk_update or a raw DELETE in one transaction. Those skip the model
+signals, so the search index, Sheets outbox, tombstones and cache versions
+are updated here once per request
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from search.index import index_objects, remove_objects
+from services.cache_versions import bump_versions
+from sync.models import SheetSyncOutbox, Tombstone
+
+
+def raw_delete(queryset):
+    """Delete the rows of a queryset with one DELETE, without loading them, sending signals or cascading"""
+    return queryset._raw_delete(queryset.db)
+
+
+def remove_deleted(entity: str, ids: list):
+    """Drop the search documents of deleted records and queue their removal from Sheets and API clients"""
+    remove_objects(entity, ids)
+    SheetSyncOutbox.objects.bulk_create(
+        [SheetSyncOutbox(entity=entity, object_id=pk, action='delete') for pk in ids], batch_size=500
+    )
+    Tombstone.objects.bulk_create([Tombstone(entity=entity, object_id=pk) for pk in ids], batch_size=500)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that uses the objects a bulk request loaded up front, if any"""
+    
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.field_name)
+        if prefetched is not None and not isinstance(data, bool):
+            try:
+                return prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer that validates every item and keeps the valid ones
+    instead of failing the whole list. After is_valid(), item_errors holds
+    the errors of each item ({} when valid) and validated_data the data of
+    the valid items, in order. instance may be a dict of the objects being
+    updated, keyed by primary key.
+    """
+    
+    def run_child_validation(self, data):
+        if isinstance(self.instance, dict):
+            self.child.instance = self.instance.get(data.get('id'))
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items.']
+            })
+        if len(data) > settings.BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'Send at most {settings.BULK_MAX_ITEMS} items per request.']
+            })
+        
+        validated = []
+        self.item_errors = []
+        for item in data:
+            if not isinstance(item, dict):
+                self.item_errors.append({api_settings.NON_FIELD_ERRORS_KEY: ['Expected an object.']})
+                continue
+            try:
+                validated.append(self.run_child_validation(item))
+                self.item_errors.append({})
+            except serializers.ValidationError as e:
+                self.item_errors.append(e.detail)
+        return validated
+
+
+class BulkWriteMixin:
+    """
+    Adds <list URL>/bulk/ to a ModelViewSet:
+    POST a list of records to create them, PATCH a list of partial records
+    with their "id" to update them, or DELETE a list of IDs. The response
+    has one result per item, in order, with its status and ID or errors.
+    """
+    bulk_entity = None
+    bulk_collection = None
+    
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """Create, update or delete a list of records in one transaction"""
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a list of items'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'Send at most {settings.BULK_MAX_ITEMS} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            if request.method == 'POST':
+                results = self.bulk_create(request.data)
+            elif request.method == 'PATCH':
+                results = self.bulk_update(request.data)
+            else:
+                results = self.bulk_destroy(request.data)
+        return Response({'results': results})
+    
+    def get_bulk_serializer(self, items, instances=None):
+        """Get a BulkListSerializer for the items, with their related objects loaded in one query per field"""
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        child = serializer_class(context=context, partial=instances is not None)
+        
+        context['prefetched'] = {}
+        for name, field in child.fields.items():
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField) and not field.read_only:
+                ids = {item[name] for item in items if isinstance(item, dict) and isinstance(item.get(name), int)}
+                context['prefetched'][name] = field.get_queryset().in_bulk(ids) if ids else {}
+        
+        return BulkListSerializer(
+            instances, data=items, child=child, context=context, partial=instances is not None
+        )
+    
+    def bulk_create(self, items) -> list:
+        serializer = self.get_bulk_serializer(items)
+        serializer.is_valid(raise_exception=True)
+        
+        model = self.get_queryset().model
+        objects = model.objects.bulk_create([model(**data) for data in serializer.validated_data])
+        self.bulk_written(objects, {})
+        
+        created = iter(objects)
+        return [
+            {'status': 400, 'errors': errors} if errors else {'status': 201, 'id': next(created).pk}
+            for errors in serializer.item_errors
+        ]
+    
+    def bulk_update(self, items) -> list:
+        model = self.get_queryset().model
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        instances = model.objects.select_for_update().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        old_values = {pk: self.bulk_values(instance) for pk, instance in instances.items()}
+        
+        results, seen, valid_items, positions = [], set(), [], []
+        for item in items:
+            pk = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(item, dict):
+                results.append({'id': None, 'status': 400, 'errors': {
+                    api_settings.NON_FIELD_ERRORS_KEY: ['Expected an object.']
+                }})
+            elif not isinstance(pk, int) or isinstance(pk, bool):
+                results.append({'id': None, 'status': 400, 'errors': {'id': ['A valid integer is required.']}})
+            elif pk in seen:
+                results.append({'id': pk, 'status': 400, 'errors': {'id': ['Duplicate id.']}})
+            elif pk not in instances:
+                results.append({'id': pk, 'status': 404, 'errors': {'id': ['Not found.']}})
+                seen.add(pk)
+            else:
+                positions.append(len(results))
+                valid_items.append(item)
+                results.append(None)
+                seen.add(pk)
+        
+        serializer = self.get_bulk_serializer(valid_items, instances)
+        serializer.is_valid(raise_exception=True)
+        
+        now = timezone.now()
+        auto_now = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        updated, fields = [], set(auto_now)
+        validated = iter(serializer.validated_data)
+        for position, item, errors in zip(positions, valid_items, serializer.item_errors):
+            if errors:
+                results[position] = {'id': item['id'], 'status': 400, 'errors': errors}
+                continue
+            instance = instances[item['id']]
+            data = next(validated)
+            for name, value in data.items():
+                setattr(instance, name, value)
+            for name in auto_now:
+                setattr(instance, name, now)
+            fields.update(data)
+            updated.append(instance)
+            results[position] = {'id': instance.pk, 'status': 200}
+        
+        if updated:
+            model.objects.bulk_update(updated, sorted(fields))
+            self.bulk_written(updated, old_values)
+        return results
+    
+    def bulk_destroy(self, ids) -> list:
+        model = self.get_queryset().model
+        objects = list(model.objects.select_for_update().filter(
+            pk__in=[pk for pk in ids if isinstance(pk, int) and not isinstance(pk, bool)]
+        ))
+        if objects:
+            self.bulk_delete(objects)
+        existing = {obj.pk for obj in objects}
+        
+        results, seen = [], set()
+        for pk in ids:
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                results.append({'id': None, 'status': 400, 'errors': {'id': ['A valid integer is required.']}})
+            elif pk in seen:
+                results.append({'id': pk, 'status': 400, 'errors': {'id': ['Duplicate id.']}})
+            elif pk not in existing:
+                results.append({'id': pk, 'status': 404, 'errors': {'id': ['Not found.']}})
+                seen.add(pk)
+            else:
+                results.append({'id': pk, 'status': 204})
+                seen.add(pk)
+        return results
+    
+    def bulk_delete(self, objects: list):
+        """
+        Delete the records and update what their delete signals maintain,
+        once for all objects. Override it to delete rows that cascade from
+        the model first.
+        """
+        ids = [obj.pk for obj in objects]
+        raw_delete(self.get_queryset().model.objects.filter(pk__in=ids))
+        remove_deleted(self.bulk_entity, ids)
+        bump_versions(self.bulk_collection)
+    
+    def bulk_values(self, instance):
+        """Values of a record before a bulk update, passed on to bulk_written"""
+        return None
+    
+    def bulk_written(self, objects: list, old_values: dict):
+        """Update what the model's save signals maintain for single saves, once for all objects"""
+        ids = [obj.pk for obj in objects]
+        index_objects(self.bulk_entity, ids)
+        SheetSyncOutbox.objects.bulk_create([SheetSyncOutbox(entity=self.bulk_entity, object_id=pk) for pk in ids])
+        bump_versions(self.bulk_collection)
@@ -0,0 +1,222 @@
+"""
+Keyset (cursor) pagination for the HTML lists and the API
+Pages are selected with a WHERE on the ordering columns of the last row seen
+instead of OFFSET, so deep pages cost the same as the first one
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import and_, or_
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that cannot be decoded"""
+
+
+def default_ordering(model) -> list:
+    """The model's Meta.ordering with the primary key added as a tie-breaker"""
+    ordering = list(model._meta.ordering)
+    if not any(name.lstrip('-') in ('pk', 'id') for name in ordering):
+        descending = ordering[-1].startswith('-') if ordering else True
+        ordering.append('-id' if descending else 'id')
+    return ordering
+
+
+def approximate_count(queryset):
+    """
+    Cheaply count a queryset, returning (count, exact).
+    
+    Unfiltered PostgreSQL tables use the planner's row estimate; otherwise
+    rows are counted up to PAGINATION_COUNT_LIMIT.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0]), False
+    
+    limit = settings.PAGINATION_COUNT_LIMIT
+    count = queryset.order_by()[:limit].count()
+    return count, count < limit
+
+
+class KeysetPage:
+    """One page of results with cursors for its neighbours"""
+    
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None, count_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_exact = count_exact
+    
+    def __iter__(self):
+        return iter(self.object_list)
+    
+    def __len__(self):
+        return len(self.object_list)
+    
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def has_previous(self):
+        return self.previous_cursor is not None
+    
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by its ordering columns, which must end with a unique field"""
+    
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    
+    def _field(self, name):
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+    
+    def encode_cursor(self, obj, backwards: bool) -> str:
+        values = []
+        for name, descending in self.keys:
+            value = getattr(obj, self._field(name).attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        data = json.dumps({'v': values, 'b': int(backwards)}, default=str)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+    
+    def decode_cursor(self, cursor: str):
+        """Get (ordering values, backwards) from a cursor"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values = [
+                self._field(name).to_python(value) for (name, descending), value in zip(self.keys, data['v'])
+            ]
+            if len(values) != len(self.keys):
+                raise ValueError('wrong number of values')
+            return values, bool(data['b'])
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, ValidationError) as e:
+            raise InvalidCursor(str(e))
+    
+    def _beyond(self, values, backwards: bool) -> Q:
+        """Rows after (or before, when backwards) the row with these ordering values"""
+        conditions = []
+        for i, (name, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending != backwards else 'gt'
+            equal = [Q(**{self._field(prior).attname: values[j]}) for j, (prior, d) in enumerate(self.keys[:i])]
+            conditions.append(reduce(and_, equal + [Q(**{f'{self._field(name).attname}__{lookup}': values[i]})]))
+        return reduce(or_, conditions)
+    
+    def page(self, cursor: str = None, with_count: bool = False) -> KeysetPage:
+        """Get the page a cursor points to (the first page without one)"""
+        queryset = self.queryset
+        backwards = False
+        if cursor:
+            values, backwards = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._beyond(values, backwards))
+        
+        ordering = [
+            name if descending == backwards else f'-{name}' for name, descending in self.keys
+        ]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        
+        count, count_exact = approximate_count(self.queryset) if with_count else (None, True)
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], False) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], True) if rows and has_previous else None,
+            count=count,
+            count_exact=count_exact,
+        )
+
+
+def paginate(request, queryset, per_page: int = 20, ordering=None, count: int = None) -> KeysetPage:
+    """
+    Get the keyset page requested by ?cursor= for an HTML list.
+    
+    Invalid cursors show the first page. count is the row count when the
+    caller already knows it; otherwise ?count=1 (or the
+    PAGINATION_APPROXIMATE_COUNT setting) adds an approximate count.
+    """
+    paginator = KeysetPaginator(queryset, ordering or default_ordering(queryset.model), per_page)
+    with_count = count is None and (bool(request.GET.get('count')) or settings.PAGINATION_APPROXIMATE_COUNT)
+    try:
+        page = paginator.page(request.GET.get('cursor'), with_count)
+    except InvalidCursor:
+        page = paginator.page(None, with_count)
+    if count is not None:
+        page.count, page.count_exact = count, True
+    return page
+
+
+class KeysetPagination(BasePagination):
+    """
+    API keyset pagination using the view's keyset_ordering (default: the
+    model's Meta.ordering plus the primary key). ?count=1 adds an approximate
+    count to the response.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'keyset_ordering', None) or default_ordering(queryset.model)
+        paginator = KeysetPaginator(queryset, ordering, self.page_size)
+        self.request = request
+        with_count = bool(request.query_params.get('count')) or settings.PAGINATION_APPROXIMATE_COUNT
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param), with_count)
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return list(self.page)
+    
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+    
+    def get_paginated_response(self, data):
+        body = {
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+        }
+        if self.page.count is not None:
+            body['count'] = self.page.count
+            body['count_exact'] = self.page.count_exact
+        body['results'] = data
+        return Response(body)
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_exact': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
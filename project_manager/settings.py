@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     'customers',
     'payments',
     'dashboard',
+    'sync',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -150,7 +152,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'project_manager.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -175,9 +177,44 @@ if not DEBUG:
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = 'DENY'
 
+# List pagination: show an approximate row count on every page (otherwise only with ?count=1),
+# counting at most PAGINATION_COUNT_LIMIT rows
+PAGINATION_APPROXIMATE_COUNT = config('PAGINATION_APPROXIMATE_COUNT', default=False, cast=bool)
+PAGINATION_COUNT_LIMIT = config('PAGINATION_COUNT_LIMIT', default=10000, cast=int)
+
+# Seconds a computed dashboard is cached; it is also invalidated whenever its data changes
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds the totals of a filtered list are cached; they are also invalidated whenever the data changes
+LIST_TOTALS_CACHE_TIMEOUT = config('LIST_TOTALS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds typeahead search results are cached; they are also invalidated whenever the data changes
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=300, cast=int)
+
+# Most records a single bulk create, update or delete API request may contain
+BULK_MAX_ITEMS = config('BULK_MAX_ITEMS', default=1000, cast=int)
+
+# Delta sync API: most records of each kind per response, and how many seconds of recent
+# changes are sent again on the next sync so rows from transactions committing late are not missed
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=60, cast=int)
+
 # Google Sheets Configuration
 GOOGLE_SHEETS_CREDENTIALS_FILE = config('GOOGLE_SHEETS_CREDENTIALS_FILE', default='credentials.json')
 GOOGLE_SHEETS_SPREADSHEET_NAME = config('GOOGLE_SHEETS_SPREADSHEET_NAME', default='ProjectManager')
+# Sheets backend: GspreadBackend (Google API), MemoryBackend or LocalFileBackend (offline)
+GOOGLE_SHEETS_BACKEND = config('GOOGLE_SHEETS_BACKEND', default='services.sheets_backends.GspreadBackend')
+# JSON file used by LocalFileBackend
+GOOGLE_SHEETS_LOCAL_FILE = config('GOOGLE_SHEETS_LOCAL_FILE', default='sheets_local.json')
+# Maximum number of rows sent in a single Sheets range update
+GOOGLE_SHEETS_BATCH_ROWS = config('GOOGLE_SHEETS_BATCH_ROWS', default=500, cast=int)
+# Seconds before the shared Sheets client, spreadsheet and row index cache is reloaded
+GOOGLE_SHEETS_CACHE_TTL = config('GOOGLE_SHEETS_CACHE_TTL', default=900, cast=int)
+# Outbox worker retry backoff (seconds), doubled on each failed attempt
+GOOGLE_SHEETS_SYNC_RETRY_DELAY = config('GOOGLE_SHEETS_SYNC_RETRY_DELAY', default=30, cast=int)
+GOOGLE_SHEETS_SYNC_MAX_RETRY_DELAY = config('GOOGLE_SHEETS_SYNC_MAX_RETRY_DELAY', default=3600, cast=int)
+# Seconds a worker holds the outbox entries it claimed before another may retry them
+GOOGLE_SHEETS_SYNC_CLAIM_TIMEOUT = config('GOOGLE_SHEETS_SYNC_CLAIM_TIMEOUT', default=300, cast=int)
 
 # Twilio WhatsApp Configuration
 TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
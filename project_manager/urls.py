@@ -9,6 +9,9 @@ from rest_framework.routers import DefaultRouter
 from projects.api_views import ProjectViewSet, ProjectTypeViewSet, ProjectImageViewSet, ProjectFileViewSet
 from customers.api_views import CustomerViewSet
 from payments.api_views import PaymentPartViewSet
+from dashboard.api_views import DashboardViewSet
+from search.api_views import SearchViewSet
+from sync.api_views import SyncViewSet
 
 # API Router
 router = DefaultRouter()
@@ -18,6 +21,9 @@ router.register(r'api/project-images', ProjectImageViewSet, basename='projectima
 router.register(r'api/project-files', ProjectFileViewSet, basename='projectfile')
 router.register(r'api/customers', CustomerViewSet, basename='customer')
 router.register(r'api/payments', PaymentPartViewSet, basename='payment')
+router.register(r'api/dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'api/search', SearchViewSet, basename='search')
+router.register(r'api/sync', SyncViewSet, basename='sync')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,6 +30,7 @@ class ProjectAdmin(admin.ModelAdmin):
     list_filter = ['status', 'project_type', 'is_active', 'created_at']
     search_fields = ['name', 'description', 'customer__name']
     readonly_fields = ['profit', 'loss', 'created_at', 'updated_at']
+    autocomplete_fields = ['project_type', 'customer']
     inlines = [ProjectImageInline, ProjectFileInline]
     fieldsets = (
         ('Basic Information', {
@@ -53,6 +54,7 @@ class ProjectAdmin(admin.ModelAdmin):
 @admin.register(ProjectImage)
 class ProjectImageAdmin(admin.ModelAdmin):
     list_display = ['project', 'caption', 'is_primary', 'uploaded_at']
+    autocomplete_fields = ['project']
     list_filter = ['is_primary', 'uploaded_at']
     search_fields = ['project__name', 'caption']
 
@@ -60,5 +62,6 @@ class ProjectImageAdmin(admin.ModelAdmin):
 @admin.register(ProjectFile)
 class ProjectFileAdmin(admin.ModelAdmin):
     list_display = ['project', 'name', 'uploaded_at']
+    autocomplete_fields = ['project']
     list_filter = ['uploaded_at']
     search_fields = ['project__name', 'name', 'description']
@@ -1,42 +1,97 @@
 """
 API Views for Projects app
 """
+from collections import defaultdict
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404
+from .deletion import delete_projects
 from .models import Project, ProjectType, ProjectImage, ProjectFile
 from .serializers import (
     ProjectSerializer, ProjectListSerializer, ProjectTypeSerializer,
     ProjectImageSerializer, ProjectFileSerializer
 )
-from services.google_sheets import GoogleSheetsService
 from services.whatsapp import WhatsAppService
+from search.autocomplete import AutocompleteMixin
+from project_manager.atomic import AtomicWriteMixin
+from project_manager.bulk import BulkWriteMixin
+from project_manager.conditional import ConditionalGetMixin
+from sync.outbox import enqueue
+from dashboard import summary
+from payments.models import PaymentPart, PaymentRollup
 
 
-class ProjectTypeViewSet(viewsets.ModelViewSet):
+class ProjectTypeViewSet(ConditionalGetMixin, AtomicWriteMixin, AutocompleteMixin, viewsets.ModelViewSet):
     """ViewSet for ProjectType"""
     queryset = ProjectType.objects.all()
     serializer_class = ProjectTypeSerializer
     permission_classes = [IsAuthenticated]
+    etag_collections = ['project_types']
+    etag_fields = []
+    etag_detail_collections = ['project_types']
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, AtomicWriteMixin, BulkWriteMixin, AutocompleteMixin, viewsets.ModelViewSet):
     """ViewSet for Project"""
-    queryset = Project.objects.select_related('customer', 'project_type').prefetch_related('images', 'files', 'payment_parts').all()
+    queryset = Project.objects.with_financials().select_related('customer', 'project_type').prefetch_related('images', 'files')
     permission_classes = [IsAuthenticated]
+    autocomplete_entity = 'project'
+    bulk_entity = 'project'
+    bulk_collection = 'projects'
+    etag_collections = ['projects', 'customers', 'project_types', 'payments', 'project_images']
+    # Images and files touch the project's updated_at; payments written outside
+    # the ledger (admin, ORM) do not, so the payments version is checked too
+    etag_fields = ['updated_at', 'customer__updated_at']
+    etag_detail_collections = ['project_types', 'payments']
+    
+    def get_queryset(self):
+        queryset = Project.objects.with_financials().select_related('customer', 'project_type')
+        if self.action == 'list':
+            return queryset.with_primary_image()
+        return queryset.prefetch_related('images', 'files')
     
     def get_serializer_class(self):
         if self.action == 'list':
             return ProjectListSerializer
         return ProjectSerializer
     
+    def bulk_delete(self, projects):
+        delete_projects(projects)
+    
+    def bulk_values(self, instance):
+        return summary.project_values(instance)
+    
+    def bulk_written(self, projects, old_values):
+        """Also apply the written projects to the financial summary and move their rollups to a new customer"""
+        super().bulk_written(projects, old_values)
+        changes = [(project.pk, old_values.get(project.pk), summary.project_values(project)) for project in projects]
+        moved = [
+            pk for pk, old, new in changes
+            if old and summary.project_scopes(old) != summary.project_scopes(new)
+        ]
+        paid = dict(
+            PaymentPart.objects.filter(project_id__in=moved).order_by().values('project_id')
+            .annotate(total=Sum('amount')).values_list('project_id', 'total')
+        ) if moved else {}
+        summary.projects_changed([(old, new, paid.get(pk)) for pk, old, new in changes])
+        
+        new_customers = defaultdict(list)
+        for pk, old, new in changes:
+            if old and old['customer_id'] != new['customer_id']:
+                new_customers[new['customer_id']].append(pk)
+        for customer_id, project_ids in new_customers.items():
+            PaymentRollup.objects.filter(project_id__in=project_ids).update(customer_id=customer_id)
+    
     @action(detail=True, methods=['post'])
     def calculate_profit_loss(self, request, pk=None):
         """Calculate and update profit/loss for a project"""
         project = self.get_object()
-        profit, loss = project.calculate_profit_loss()
+        with transaction.atomic():
+            profit, loss = project.calculate_profit_loss()
         return Response({
             'profit': float(profit),
             'loss': float(loss),
@@ -45,41 +100,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def sync_to_sheets(self, request, pk=None):
-        """Sync project to Google Sheets"""
+        """Queue project for syncing to Google Sheets"""
         project = self.get_object()
-        try:
-            sheets_service = GoogleSheetsService()
-            projects_data = [{
-                'id': project.id,
-                'name': project.name,
-                'description': project.description or '',
-                'project_type': project.project_type.name if project.project_type else '',
-                'customer': project.customer.name,
-                'status': project.get_status_display(),
-                'total_budget': float(project.total_budget),
-                'total_revenue': float(project.total_revenue),
-                'total_cost': float(project.total_cost),
-                'profit': float(project.profit),
-                'loss': float(project.loss),
-                'live_url': project.live_url or '',
-                'repository_url': project.repository_url or '',
-                'start_date': project.start_date.strftime('%Y-%m-%d') if project.start_date else '',
-                'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else '',
-                'deadline': project.deadline.strftime('%Y-%m-%d') if project.deadline else '',
-                'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'updated_at': project.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-            }]
-            url = sheets_service.sync_projects(projects_data)
-            return Response({
-                'success': True,
-                'message': 'Project synced to Google Sheets successfully',
-                'sheet_url': url
-            })
-        except Exception as e:
-            return Response({
-                'success': False,
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # The sheets worker writes it, so the row index stays owned by one process
+        enqueue('project', project.pk)
+        return Response({
+            'success': True,
+            'message': 'Project queued for syncing to Google Sheets'
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def send_whatsapp_update(self, request, pk=None):
@@ -125,7 +153,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ProjectImageViewSet(viewsets.ModelViewSet):
+class ProjectImageViewSet(AtomicWriteMixin, viewsets.ModelViewSet):
     """ViewSet for ProjectImage"""
     queryset = ProjectImage.objects.all()
     serializer_class = ProjectImageSerializer
@@ -139,7 +167,7 @@ class ProjectImageViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ProjectFileViewSet(viewsets.ModelViewSet):
+class ProjectFileViewSet(AtomicWriteMixin, viewsets.ModelViewSet):
     """ViewSet for ProjectFile"""
     queryset = ProjectFile.objects.all()
     serializer_class = ProjectFileSerializer
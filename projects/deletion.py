@@ -0,0 +1,35 @@
+"""
+Bulk project deletion
+Projects are deleted together with their payments, images, files and rollups
+without loading them or sending a delete signal per row; the financial
+summary, search index, Sheets outbox and tombstone log are then updated once
+for all of them
+"""
+from collections import defaultdict
+from decimal import Decimal
+from dashboard import summary
+from payments.models import PaymentPart, PaymentRollup
+from project_manager.bulk import raw_delete, remove_deleted
+from services.cache_versions import bump_versions
+from .models import Project, ProjectImage, ProjectFile
+
+
+def delete_projects(projects: list):
+    """Delete Project instances, locked by the caller, and the rows that cascade from them"""
+    ids = [project.pk for project in projects]
+    if not ids:
+        return
+    
+    payments = list(PaymentPart.objects.filter(project_id__in=ids).values_list('pk', 'project_id', 'amount'))
+    paid = defaultdict(Decimal)
+    for pk, project_id, amount in payments:
+        paid[project_id] += amount
+    
+    for model in (PaymentPart, PaymentRollup, ProjectImage, ProjectFile):
+        raw_delete(model.objects.filter(project_id__in=ids))
+    raw_delete(Project.objects.filter(pk__in=ids))
+    
+    summary.projects_changed([(summary.project_values(project), None, paid[project.pk]) for project in projects])
+    remove_deleted('payment', [pk for pk, project_id, amount in payments])
+    remove_deleted('project', ids)
+    bump_versions('payments', 'project_images', 'project_files', 'projects')
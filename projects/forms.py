@@ -2,6 +2,7 @@
 Forms for Projects app
 """
 from django import forms
+from search.autocomplete import AutocompleteSelect
 from .models import Project, ProjectImage, ProjectFile
 
 
@@ -19,8 +20,8 @@ class ProjectForm(forms.ModelForm):
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-input'}),
             'description': forms.Textarea(attrs={'class': 'form-textarea', 'rows': 4}),
-            'project_type': forms.Select(attrs={'class': 'form-select'}),
-            'customer': forms.Select(attrs={'class': 'form-select'}),
+            'project_type': AutocompleteSelect('projecttype-autocomplete', attrs={'class': 'form-select'}),
+            'customer': AutocompleteSelect('customer-autocomplete', attrs={'class': 'form-select'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'total_budget': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
             'total_revenue': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
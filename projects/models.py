@@ -1,4 +1,7 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import URLValidator
 from django.urls import reverse
 from customers.models import Customer
@@ -19,6 +22,30 @@ class ProjectType(models.Model):
         return self.name
 
 
+class ProjectQuerySet(models.QuerySet):
+    """QuerySet for Project"""
+
+    def with_financials(self):
+        """Annotate payment totals so total_paid, outstanding_balance and payment_count need no extra queries"""
+        paid = Coalesce(
+            models.Sum('payment_parts__amount'), Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+        return self.annotate(
+            total_paid_amount=paid,
+            outstanding_amount=models.ExpressionWrapper(
+                models.F('total_budget') - paid, output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+            payment_parts_count=models.Count('payment_parts'),
+        )
+
+    def with_primary_image(self):
+        """Prefetch only the primary (or else newest) image of each project into primary_images"""
+        return self.prefetch_related(
+            models.Prefetch('images', queryset=ProjectImage.objects.all()[:1], to_attr='primary_images')
+        )
+
+
 class Project(models.Model):
     """Main project model"""
     STATUS_CHOICES = [
@@ -57,10 +84,21 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
+        indexes = [
+            # List pages (keyset ordering), unfiltered and by status
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+            # Upcoming deadlines of active projects
+            models.Index(fields=['deadline'], condition=Q(is_active=True), name='project_active_deadline_idx'),
+            # Changes since a sync token
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -72,16 +110,36 @@ class Project(models.Model):
         """Calculate profit or loss"""
         self.profit = max(0, self.total_revenue - self.total_cost)
         self.loss = max(0, self.total_cost - self.total_revenue)
-        self.save(update_fields=['profit', 'loss'])
+        self.save(update_fields=['profit', 'loss', 'updated_at'])
         return self.profit, self.loss
 
     @property
     def total_paid(self):
         """Calculate total amount paid from payment parts"""
+        if hasattr(self, 'total_paid_amount'):
+            return self.total_paid_amount
+        if 'payment_parts' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum((part.amount for part in self.payment_parts.all()), Decimal('0.00'))
         return self.payment_parts.aggregate(
             total=models.Sum('amount')
         )['total'] or 0.00
 
+    @property
+    def outstanding_balance(self):
+        """Budget not yet covered by payments"""
+        if hasattr(self, 'outstanding_amount'):
+            return self.outstanding_amount
+        return Decimal(str(self.total_budget)) - Decimal(str(self.total_paid))
+
+    @property
+    def payment_count(self):
+        """Number of payment parts"""
+        if hasattr(self, 'payment_parts_count'):
+            return self.payment_parts_count
+        if 'payment_parts' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.payment_parts.all())
+        return self.payment_parts.count()
+
 
 class ProjectImage(models.Model):
     """Project images model"""
@@ -4,6 +4,7 @@ Serializers for Projects app
 from rest_framework import serializers
 from .models import Project, ProjectType, ProjectImage, ProjectFile
 from customers.serializers import CustomerSerializer
+from project_manager.bulk import PrefetchedPrimaryKeyRelatedField
 
 
 class ProjectTypeSerializer(serializers.ModelSerializer):
@@ -52,11 +53,14 @@ class ProjectFileSerializer(serializers.ModelSerializer):
 
 class ProjectSerializer(serializers.ModelSerializer):
     """Serializer for Project"""
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     project_type_name = serializers.CharField(source='project_type.name', read_only=True)
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     customer_email = serializers.CharField(source='customer.email', read_only=True)
     customer_whatsapp = serializers.CharField(source='customer.whatsapp_number', read_only=True)
     total_paid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    outstanding_balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payment_count = serializers.IntegerField(read_only=True)
     images = ProjectImageSerializer(many=True, read_only=True)
     files = ProjectFileSerializer(many=True, read_only=True)
     
@@ -66,7 +70,8 @@ class ProjectSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'project_type', 'project_type_name',
             'customer', 'customer_name', 'customer_email', 'customer_whatsapp',
             'status', 'total_budget', 'total_revenue', 'total_cost',
-            'profit', 'loss', 'total_paid', 'live_url', 'repository_url',
+            'profit', 'loss', 'total_paid', 'outstanding_balance', 'payment_count',
+            'live_url', 'repository_url',
             'start_date', 'end_date', 'deadline', 'notes', 'images', 'files',
             'created_at', 'updated_at', 'is_active'
         ]
@@ -78,6 +83,8 @@ class ProjectListSerializer(serializers.ModelSerializer):
     project_type_name = serializers.CharField(source='project_type.name', read_only=True)
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     total_paid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    outstanding_balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payment_count = serializers.IntegerField(read_only=True)
     primary_image = serializers.SerializerMethodField()
     
     class Meta:
@@ -85,22 +92,42 @@ class ProjectListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'project_type_name', 'customer_name', 'status',
             'total_budget', 'total_revenue', 'total_cost', 'profit', 'loss',
-            'total_paid', 'live_url', 'primary_image', 'created_at'
+            'total_paid', 'outstanding_balance', 'payment_count', 'live_url', 'primary_image', 'created_at'
         ]
     
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        # Images are ordered primary first, so the first one is the primary or fallback image
+        if hasattr(obj, 'primary_images'):
+            primary_image = obj.primary_images[0] if obj.primary_images else None
+        else:
+            primary_image = obj.images.first()
         if primary_image:
             request = self.context.get('request')
             if request:
                 return request.build_absolute_uri(primary_image.image.url)
             return primary_image.image.url
-        # Return first image if no primary
-        first_image = obj.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
         return None
 
+
+class ProjectSyncSerializer(serializers.ModelSerializer):
+    """
+    Serializer for delta sync records. Customer and project type details are
+    left out, as their changes do not touch the project's updated_at; clients
+    join them by ID from their own copies.
+    """
+    total_paid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    outstanding_balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payment_count = serializers.IntegerField(read_only=True)
+    images = ProjectImageSerializer(many=True, read_only=True)
+    files = ProjectFileSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'project_type', 'customer',
+            'status', 'total_budget', 'total_revenue', 'total_cost',
+            'profit', 'loss', 'total_paid', 'outstanding_balance', 'payment_count',
+            'live_url', 'repository_url',
+            'start_date', 'end_date', 'deadline', 'notes', 'images', 'files',
+            'created_at', 'updated_at', 'is_active'
+        ]
@@ -4,11 +4,14 @@ Views for Projects app
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q, Sum
+from django.db import transaction
+from django.db.models import Count, Sum
+from project_manager.pagination import paginate
+from search.index import matching
+from dashboard.summary import get_summary
+from services.cache_versions import cached_aggregate
 from .models import Project, ProjectType, ProjectImage, ProjectFile
 from .forms import ProjectForm, ProjectImageForm, ProjectFileForm
-from services.google_sheets import GoogleSheetsService
 
 
 @login_required
@@ -19,11 +22,7 @@ def project_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        projects = projects.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(customer__name__icontains=search_query)
-        )
+        projects = projects.filter(pk__in=matching('project', search_query))
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -35,15 +34,32 @@ def project_list(request):
     if type_filter:
         projects = projects.filter(project_type_id=type_filter)
     
-    # Pagination
-    paginator = Paginator(projects, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Calculate totals and the row count, from the financial summary when it has a matching row
+    if search_query or (status_filter and type_filter):
+        totals = cached_aggregate(
+            projects, ['projects', 'customers'],
+            {'search': search_query, 'status': status_filter, 'type': type_filter},
+            project_count=Count('id'), total_budget=Sum('total_budget'),
+            total_revenue=Sum('total_revenue'), total_cost=Sum('total_cost'),
+        )
+        project_count = totals['project_count']
+        total_budget = totals['total_budget'] or 0
+        total_revenue = totals['total_revenue'] or 0
+        total_cost = totals['total_cost'] or 0
+    else:
+        if status_filter:
+            summary = get_summary('status', status_filter)
+        elif type_filter:
+            summary = get_summary('project_type', type_filter)
+        else:
+            summary = get_summary()
+        project_count = summary.project_count
+        total_budget = summary.total_budget
+        total_revenue = summary.total_revenue
+        total_cost = summary.total_cost
     
-    # Calculate totals
-    total_budget = projects.aggregate(Sum('total_budget'))['total_budget__sum'] or 0
-    total_revenue = projects.aggregate(Sum('total_revenue'))['total_revenue__sum'] or 0
-    total_cost = projects.aggregate(Sum('total_cost'))['total_cost__sum'] or 0
+    # Keyset pagination on the model ordering
+    page_obj = paginate(request, projects, count=project_count)
     
     project_types = ProjectType.objects.all()
     
@@ -84,36 +100,9 @@ def project_create(request):
     if request.method == 'POST':
         form = ProjectForm(request.POST, request.FILES)
         if form.is_valid():
-            project = form.save()
+            with transaction.atomic():
+                project = form.save()
             messages.success(request, f'Project "{project.name}" created successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                projects_data = [{
-                    'id': project.id,
-                    'name': project.name,
-                    'description': project.description or '',
-                    'project_type': project.project_type.name if project.project_type else '',
-                    'customer': project.customer.name,
-                    'status': project.get_status_display(),
-                    'total_budget': float(project.total_budget),
-                    'total_revenue': float(project.total_revenue),
-                    'total_cost': float(project.total_cost),
-                    'profit': float(project.profit),
-                    'loss': float(project.loss),
-                    'live_url': project.live_url or '',
-                    'repository_url': project.repository_url or '',
-                    'start_date': project.start_date.strftime('%Y-%m-%d') if project.start_date else '',
-                    'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else '',
-                    'deadline': project.deadline.strftime('%Y-%m-%d') if project.deadline else '',
-                    'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': project.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_projects(projects_data)
-            except Exception as e:
-                messages.warning(request, f'Project created but Google Sheets sync failed: {str(e)}')
-            
             return redirect('projects:detail', pk=project.pk)
     else:
         form = ProjectForm()
@@ -129,37 +118,10 @@ def project_update(request, pk):
     if request.method == 'POST':
         form = ProjectForm(request.POST, request.FILES, instance=project)
         if form.is_valid():
-            project = form.save()
-            project.calculate_profit_loss()
+            with transaction.atomic():
+                project = form.save()
+                project.calculate_profit_loss()
             messages.success(request, f'Project "{project.name}" updated successfully!')
-            
-            # Sync to Google Sheets
-            try:
-                sheets_service = GoogleSheetsService()
-                projects_data = [{
-                    'id': project.id,
-                    'name': project.name,
-                    'description': project.description or '',
-                    'project_type': project.project_type.name if project.project_type else '',
-                    'customer': project.customer.name,
-                    'status': project.get_status_display(),
-                    'total_budget': float(project.total_budget),
-                    'total_revenue': float(project.total_revenue),
-                    'total_cost': float(project.total_cost),
-                    'profit': float(project.profit),
-                    'loss': float(project.loss),
-                    'live_url': project.live_url or '',
-                    'repository_url': project.repository_url or '',
-                    'start_date': project.start_date.strftime('%Y-%m-%d') if project.start_date else '',
-                    'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else '',
-                    'deadline': project.deadline.strftime('%Y-%m-%d') if project.deadline else '',
-                    'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'updated_at': project.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }]
-                sheets_service.sync_projects(projects_data)
-            except Exception as e:
-                messages.warning(request, f'Project updated but Google Sheets sync failed: {str(e)}')
-            
             return redirect('projects:detail', pk=project.pk)
     else:
         form = ProjectForm(instance=project)
@@ -0,0 +1,12 @@
+"""
+Admin configuration for Search app
+"""
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ['entity', 'object_id', 'content', 'updated_at']
+    list_filter = ['entity']
+    search_fields = ['content']
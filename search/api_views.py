@@ -0,0 +1,27 @@
+"""
+API Views for Search app
+"""
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .typeahead import global_search
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """ViewSet for typeahead search across projects, customers and payments"""
+    permission_classes = [IsAuthenticated]
+    max_limit = 20
+    
+    def list(self, request):
+        """Get the best matches of each entity type for ?q="""
+        try:
+            limit = int(request.query_params.get('limit', 5))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_limit:
+            return Response(
+                {'error': f'limit must be a number from 1 to {self.max_limit}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        query = request.query_params.get('q', '')
+        return Response({'query': query, 'results': global_search(query, limit)})
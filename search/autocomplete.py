@@ -0,0 +1,62 @@
+"""
+Autocomplete for foreign-key selects
+AutocompleteMixin adds an autocomplete endpoint to a ViewSet and
+AutocompleteSelect renders only the chosen option, loading the others from
+that endpoint as the user types, so form pages stay the same size however
+many rows the related table has
+"""
+from django import forms
+from django.urls import reverse
+from rest_framework.decorators import action
+from .index import matching
+
+
+class AutocompleteMixin:
+    """
+    Adds GET <list URL>/autocomplete/?q= to a ViewSet, returning {id, text}
+    choices ordered by name with keyset pagination. Records are matched with
+    the search index when autocomplete_entity is set, otherwise by name.
+    """
+    autocomplete_entity = None
+    
+    @property
+    def keyset_ordering(self):
+        return ['name', 'id'] if self.action == 'autocomplete' else None
+    
+    @action(detail=False)
+    def autocomplete(self, request):
+        """Get choices matching ?q= a page at a time"""
+        queryset = self.queryset.model.objects.only('id', 'name')
+        query = request.query_params.get('q', '').strip()
+        if query and self.autocomplete_entity:
+            queryset = queryset.filter(pk__in=matching(self.autocomplete_entity, query))
+        elif query:
+            queryset = queryset.filter(name__icontains=query)
+        
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response([{'id': obj.pk, 'text': str(obj)} for obj in page])
+
+
+class AutocompleteSelect(forms.Select):
+    """Select for a ModelChoiceField whose options come from an autocomplete endpoint"""
+    
+    def __init__(self, url_name: str, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+    
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        return attrs
+    
+    def optgroups(self, name, value, attrs=None):
+        """Render the empty choice and the selected object only"""
+        field = self.choices.field
+        selected = {str(v) for v in value if str(v) not in field.empty_values}
+        options = []
+        if field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, not selected, 0))
+        for obj in (self.choices.queryset.filter(pk__in=selected) if selected else []):
+            option_value, label = self.choices.choice(obj)
+            options.append(self.create_option(name, option_value, label, True, len(options)))
+        return [(None, options, 0)]
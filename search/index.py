@@ -0,0 +1,180 @@
+"""
+Full-text search over projects, customers and payments
+Each record's searchable fields are copied into a SearchDocument row whose
+content the database indexes: FTS5 on SQLite, tsvector and trigram GIN
+indexes on PostgreSQL, and a plain icontains scan on anything else
+"""
+import re
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from .models import SearchDocument
+
+
+# Entity -> (model, fields searched), the fields the list views used to match with icontains
+SEARCH_FIELDS = {
+    'project': ('projects.Project', ['name', 'description', 'customer__name']),
+    'customer': ('customers.Customer', ['name', 'email', 'company']),
+    'payment': ('payments.PaymentPart', ['project__name', 'reference_number', 'notes']),
+}
+
+# Entity -> (entity, foreign key) of documents that copy its fields
+DEPENDENTS = {
+    'customer': [('project', 'customer_id')],
+    'project': [('payment', 'project_id')],
+}
+
+FTS_TABLE = 'search_searchdocument_fts'
+TRIGRAM_TABLE = 'search_searchdocument_trigram'
+# Shorter queries have no trigram, so they only match word prefixes on SQLite
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _terms(query: str) -> list:
+    return re.findall(r'\w+', query or '')
+
+
+def _contents(entity: str, ids=None, apps=global_apps):
+    """Yield (object ID, content) of an entity's records, optionally only the given IDs"""
+    model_label, fields = SEARCH_FIELDS[entity]
+    rows = apps.get_model(model_label).objects.order_by()
+    if ids is not None:
+        rows = rows.filter(pk__in=ids)
+    for pk, *values in rows.values_list('pk', *fields).iterator(chunk_size=2000):
+        yield pk, ' '.join(str(value) for value in values if value)
+
+
+def _index(entity: str, ids: list):
+    documents = [
+        SearchDocument(entity=entity, object_id=pk, content=content)
+        for pk, content in _contents(entity, ids)
+    ]
+    SearchDocument.objects.bulk_create(
+        documents, batch_size=500, update_conflicts=True,
+        unique_fields=['entity', 'object_id'], update_fields=['content', 'updated_at'],
+    )
+    remove_objects(entity, set(ids) - {document.object_id for document in documents})
+
+
+def index_objects(entity: str, ids):
+    """Refresh the documents of some records and of the records that copy their fields"""
+    ids = list(ids)
+    if not ids:
+        return
+    _index(entity, ids)
+    for dependent, foreign_key in DEPENDENTS.get(entity, []):
+        model_label, fields = SEARCH_FIELDS[dependent]
+        dependent_ids = global_apps.get_model(model_label).objects.filter(
+            **{f'{foreign_key}__in': ids}
+        ).values_list('pk', flat=True)
+        _index(dependent, list(dependent_ids))
+
+
+def remove_objects(entity: str, ids):
+    """Drop the documents of deleted records"""
+    ids = list(ids)
+    if ids:
+        SearchDocument.objects.filter(entity=entity, object_id__in=ids).delete()
+
+
+def rebuild_search_index(apps=global_apps) -> int:
+    """Recreate every search document from the source tables; returns the document count"""
+    document_model = apps.get_model('search', 'SearchDocument')
+    count = 0
+    with transaction.atomic():
+        document_model.objects.all().delete()
+        for entity in SEARCH_FIELDS:
+            documents = [
+                document_model(entity=entity, object_id=pk, content=content)
+                for pk, content in _contents(entity, apps=apps)
+            ]
+            document_model.objects.bulk_create(documents, batch_size=500)
+            count += len(documents)
+    return count
+
+
+def matching(entity: str, query: str):
+    """
+    Get the object IDs of an entity's records that match every word of
+    query (as a prefix) or contain query, as a values queryset usable with
+    pk__in.
+    """
+    documents = SearchDocument.objects.filter(entity=entity)
+    terms = _terms(query)
+    if not terms:
+        return documents.none().values('object_id')
+    
+    if connection.vendor == 'sqlite':
+        sql, params = _sqlite_matches(terms, query)
+        documents = documents.filter(RawSQL(f'id IN ({sql})', params, output_field=BooleanField()))
+    elif connection.vendor == 'postgresql':
+        documents = documents.filter(RawSQL(
+            "vector @@ to_tsquery('simple', %s) OR content ILIKE %s",
+            [_tsquery(terms), _like(query)], output_field=BooleanField(),
+        ))
+    else:
+        for term in terms:
+            documents = documents.filter(content__icontains=term)
+    return documents.values('object_id')
+
+
+def search(entity: str, query: str, limit: int = 20) -> list:
+    """Get the IDs of the best matching records of an entity, best first"""
+    terms = _terms(query)
+    if not terms:
+        return []
+    
+    if connection.vendor == 'sqlite':
+        # Word matches rank by bm25; documents matching only inside a word come last
+        matches, params = _sqlite_matches(terms, query)
+        sql = (
+            f'SELECT d.object_id FROM ({matches}) m JOIN search_searchdocument d ON d.id = m.rowid LEFT JOIN ('
+            f'SELECT rowid, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+            f') f ON f.rowid = d.id '
+            f'WHERE d.entity = %s ORDER BY f.rank IS NULL, f.rank, d.object_id DESC LIMIT %s'
+        )
+        params += [_fts_query(terms), entity, limit]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            "SELECT object_id FROM search_searchdocument, to_tsquery('simple', %s) q "
+            "WHERE entity = %s AND (vector @@ q OR content ILIKE %s) "
+            "ORDER BY ts_rank(vector, q) DESC, similarity(content, %s) DESC, object_id DESC LIMIT %s"
+        )
+        params = [_tsquery(terms), entity, _like(query), query.strip(), limit]
+    else:
+        return list(matching(entity, query).order_by('-object_id').values_list('object_id', flat=True)[:limit])
+    
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_matches(terms: list, query: str):
+    """
+    SQL and params selecting the rowids of documents whose words start with
+    every term, or, from the trigram table, that contain the whole query.
+    """
+    sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [_fts_query(terms)]
+    query = query.strip()
+    if len(query) >= TRIGRAM_MIN_LENGTH:
+        sql += f' UNION SELECT rowid FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH %s'
+        params.append('"{}"'.format(query.replace('"', '""')))
+    return sql, params
+
+
+def _fts_query(terms: list) -> str:
+    """FTS5 query matching every term as a prefix"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms: list) -> str:
+    """PostgreSQL tsquery matching every term as a prefix"""
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _like(query: str) -> str:
+    """ILIKE pattern matching query anywhere in the content (escaped with a backslash)"""
+    escaped = query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
@@ -0,0 +1,13 @@
+"""
+Rebuild the full-text search index
+"""
+from django.core.management.base import BaseCommand
+from search.index import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the search documents of all projects, customers and payments'
+    
+    def handle(self, *args, **options):
+        documents = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {documents} search documents'))
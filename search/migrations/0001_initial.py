@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('project', 'Project'), ('customer', 'Customer'), ('payment', 'Payment')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'ordering': ['entity', 'object_id'],
+                'constraints': [models.UniqueConstraint(fields=('entity', 'object_id'), name='unique_search_document_entity_object')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+
+SQLITE_INDEX = [
+    # External-content FTS5 table over search_searchdocument.content, with
+    # prefix indexes so typeahead queries ("ab"*, "abc"*) stay cheap
+    """CREATE VIRTUAL TABLE search_searchdocument_fts USING fts5(
+        content, content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO search_searchdocument_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS search_searchdocument_au',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ai',
+    'DROP TABLE IF EXISTS search_searchdocument_fts',
+]
+
+POSTGRES_INDEX = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """ALTER TABLE search_searchdocument ADD COLUMN vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED""",
+    'CREATE INDEX search_searchdocument_vector ON search_searchdocument USING GIN (vector)',
+    'CREATE INDEX search_searchdocument_trgm ON search_searchdocument USING GIN (content gin_trgm_ops)',
+]
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS search_searchdocument_trgm',
+    'DROP INDEX IF EXISTS search_searchdocument_vector',
+    'ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS vector',
+]
+
+
+def create_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+    from search.index import rebuild_search_index
+    rebuild_search_index(apps)
+
+
+def drop_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('projects', '0001_initial'),
+        ('customers', '0001_initial'),
+        ('payments', '0003_populate_paymentrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+SQLITE_INDEX = [
+    # Trigram FTS5 table over the same content, so text inside a word
+    # ("obile" in "Mobile") is found from an index instead of a LIKE scan
+    """CREATE VIRTUAL TABLE search_searchdocument_trigram USING fts5(
+        content, content='search_searchdocument', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER search_searchdocument_trigram_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_trigram(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER search_searchdocument_trigram_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_trigram(search_searchdocument_trigram, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER search_searchdocument_trigram_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_trigram(search_searchdocument_trigram, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO search_searchdocument_trigram(rowid, content) VALUES (new.id, new.content);
+    END""",
+    "INSERT INTO search_searchdocument_trigram(search_searchdocument_trigram) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS search_searchdocument_trigram_au',
+    'DROP TRIGGER IF EXISTS search_searchdocument_trigram_ad',
+    'DROP TRIGGER IF EXISTS search_searchdocument_trigram_ai',
+    'DROP TABLE IF EXISTS search_searchdocument_trigram',
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_INDEX:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a project, customer or payment.
+    
+    The full-text index over content is created by migration 0002: an FTS5
+    table kept current by triggers on SQLite, and tsvector and trigram GIN
+    indexes on PostgreSQL.
+    """
+    ENTITY_CHOICES = [
+        ('project', 'Project'),
+        ('customer', 'Customer'),
+        ('payment', 'Payment'),
+    ]
+    
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    content = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['entity', 'object_id']
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'object_id'], name='unique_search_document_entity_object'),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity} #{self.object_id}"
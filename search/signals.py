@@ -0,0 +1,34 @@
+"""
+Signal handlers that keep search documents up to date
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from projects.models import Project
+from customers.models import Customer
+from payments.models import PaymentPart
+from .index import index_objects, remove_objects
+
+
+SEARCHED_MODELS = {
+    Project: 'project',
+    Customer: 'customer',
+    PaymentPart: 'payment',
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=PaymentPart)
+def index_saved_object(sender, instance, raw=False, **kwargs):
+    """Refresh the search document of a saved record and of the records showing its name"""
+    if raw:
+        return
+    index_objects(SEARCHED_MODELS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=PaymentPart)
+def remove_deleted_object(sender, instance, **kwargs):
+    """Drop the search document of a deleted record (cascades send their own signals)"""
+    remove_objects(SEARCHED_MODELS[sender], [instance.pk])
@@ -0,0 +1,81 @@
+"""
+Cross-entity typeahead search
+Each query returns the best few projects, customers and payments from the
+shared search index; results are cached under the collections' versions, so
+popular prefixes are served from the cache until the data changes
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from customers.models import Customer
+from payments.models import PaymentPart
+from projects.models import Project
+from services.cache_versions import get_versions
+from .index import search
+
+
+def _project_hit(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'customer_name': row['customer__name'],
+        'status': row['status'],
+        'url': reverse('projects:detail', kwargs={'pk': row['id']}),
+    }
+
+
+def _customer_hit(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'company': row['company'],
+        'email': row['email'],
+        'url': reverse('customers:detail', kwargs={'pk': row['id']}),
+    }
+
+
+def _payment_hit(row):
+    return {
+        'id': row['id'],
+        'project_name': row['project__name'],
+        'amount': str(row['amount']),
+        'payment_date': row['payment_date'].isoformat(),
+        'reference_number': row['reference_number'],
+        'url': reverse('payments:detail', kwargs={'pk': row['id']}),
+    }
+
+
+# Result key -> (search entity, model, fields fetched for a hit, hit builder)
+ENTITIES = {
+    'projects': ('project', Project, ['id', 'name', 'customer__name', 'status'], _project_hit),
+    'customers': ('customer', Customer, ['id', 'name', 'company', 'email'], _customer_hit),
+    'payments': (
+        'payment', PaymentPart, ['id', 'project__name', 'amount', 'payment_date', 'reference_number'], _payment_hit
+    ),
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse its whitespace, so equivalent queries share a cache entry"""
+    return ' '.join((query or '').lower().split())
+
+
+def global_search(query: str, limit: int = 5) -> dict:
+    """Get the top matches of each entity type, cached until projects, customers or payments change"""
+    query = normalize_query(query)
+    if not query:
+        return {name: [] for name in ENTITIES}
+    
+    versions = get_versions(*ENTITIES)
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    key = 'search:{}:{}:{}'.format(':'.join(str(version) for version in versions.values()), limit, digest)
+    results = cache.get(key)
+    if results is None:
+        results = {}
+        for name, (entity, model, fields, hit) in ENTITIES.items():
+            ids = search(entity, query, limit)
+            rows = {row['id']: row for row in model.objects.filter(pk__in=ids).values(*fields)}
+            results[name] = [hit(rows[pk]) for pk in ids if pk in rows]
+        cache.set(key, results, settings.SEARCH_CACHE_TIMEOUT)
+    return results
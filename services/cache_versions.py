@@ -0,0 +1,77 @@
+"""
+Per-collection cache versions
+Cached values built from a collection include its version in their key, so
+bumping the version when the collection changes invalidates them all at once;
+the time of that change is kept too, for Last-Modified headers
+"""
+import hashlib
+import json
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from typing import Dict, List
+
+
+def _key(collection: str) -> str:
+    return f'collection-version:{collection}'
+
+
+def get_versions(*collections: str) -> Dict[str, int]:
+    """Get the current version of each collection with a single cache read"""
+    found = cache.get_many([_key(collection) for collection in collections])
+    versions = {}
+    for collection in collections:
+        version = found.get(_key(collection))
+        if version is None:
+            # Start from the clock so an evicted version never reuses an old key
+            cache.add(_key(collection), time.time_ns() // 1000, timeout=None)
+            version = cache.get(_key(collection))
+        versions[collection] = version
+    return versions
+
+
+def _changed_key(collection: str) -> str:
+    return f'collection-changed:{collection}'
+
+
+def bump_versions(*collections: str):
+    """Invalidate cached values of the given collections once the current transaction commits"""
+    def bump():
+        for collection in collections:
+            try:
+                cache.incr(_key(collection))
+            except ValueError:
+                cache.add(_key(collection), time.time_ns() // 1000, timeout=None)
+        cache.set_many({_changed_key(collection): timezone.now() for collection in collections}, timeout=None)
+    transaction.on_commit(bump)
+
+
+def last_changed(*collections: str) -> datetime:
+    """Get when any of the collections last changed"""
+    found = cache.get_many([_changed_key(collection) for collection in collections])
+    for collection in collections:
+        if _changed_key(collection) not in found:
+            # Unknown (never changed since the cache started, or evicted): count it as changed now
+            cache.add(_changed_key(collection), timezone.now(), timeout=None)
+            found[_changed_key(collection)] = cache.get(_changed_key(collection))
+    return max(found.values())
+
+
+def cached_aggregate(queryset, collections: List[str], filters: dict, **aggregates) -> dict:
+    """
+    Run queryset.aggregate(**aggregates) in one query, cached per filter
+    combination until one of the collections the result depends on changes.
+    """
+    versions = get_versions(*collections)
+    signature = json.dumps([queryset.model._meta.label, sorted(aggregates), filters], sort_keys=True, default=str)
+    key = 'aggregate:{}:{}'.format(
+        ':'.join(str(version) for version in versions.values()), hashlib.sha1(signature.encode()).hexdigest()
+    )
+    result = cache.get(key)
+    if result is None:
+        result = queryset.aggregate(**aggregates)
+        cache.set(key, result, settings.LIST_TOTALS_CACHE_TIMEOUT)
+    return result
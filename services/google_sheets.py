@@ -3,38 +3,216 @@ Google Sheets integration service
 Handles creating and syncing data with Google Sheets
 """
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from gspread.utils import InsertDataOption, ValueInputOption, ValueRenderOption, a1_to_rowcol, rowcol_to_a1
 from django.conf import settings
-import os
-from typing import List, Dict, Any
+from django.utils.module_loading import import_string
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Tuple
+
+
+PROJECT_HEADERS = [
+    'ID', 'Name', 'Description', 'Project Type', 'Customer', 'Status',
+    'Total Budget', 'Total Revenue', 'Total Cost', 'Profit', 'Loss',
+    'Live URL', 'Repository URL', 'Start Date', 'End Date', 'Deadline',
+    'Created At', 'Updated At'
+]
+
+CUSTOMER_HEADERS = [
+    'ID', 'Name', 'Email', 'WhatsApp Number', 'Phone Number',
+    'Company', 'Address', 'Notes', 'Created At', 'Updated At'
+]
+
+PAYMENT_HEADERS = [
+    'ID', 'Project', 'Amount', 'Payment Date', 'Payment Method',
+    'Reference Number', 'Notes', 'Created At', 'Updated At'
+]
+
+
+def _project_row(project: Dict[str, Any]) -> List[Any]:
+    """Build a sheet row from project data"""
+    return [
+        project.get('id', ''),
+        project.get('name', ''),
+        project.get('description', ''),
+        project.get('project_type', ''),
+        project.get('customer', ''),
+        project.get('status', ''),
+        project.get('total_budget', 0),
+        project.get('total_revenue', 0),
+        project.get('total_cost', 0),
+        project.get('profit', 0),
+        project.get('loss', 0),
+        project.get('live_url', ''),
+        project.get('repository_url', ''),
+        project.get('start_date', ''),
+        project.get('end_date', ''),
+        project.get('deadline', ''),
+        project.get('created_at', ''),
+        project.get('updated_at', ''),
+    ]
+
+
+def _customer_row(customer: Dict[str, Any]) -> List[Any]:
+    """Build a sheet row from customer data"""
+    return [
+        customer.get('id', ''),
+        customer.get('name', ''),
+        customer.get('email', ''),
+        customer.get('whatsapp_number', ''),
+        customer.get('phone_number', ''),
+        customer.get('company', ''),
+        customer.get('address', ''),
+        customer.get('notes', ''),
+        customer.get('created_at', ''),
+        customer.get('updated_at', ''),
+    ]
+
+
+def _payment_row(payment: Dict[str, Any]) -> List[Any]:
+    """Build a sheet row from payment data"""
+    return [
+        payment.get('id', ''),
+        payment.get('project', ''),
+        payment.get('amount', 0),
+        payment.get('payment_date', ''),
+        payment.get('payment_method', ''),
+        payment.get('reference_number', ''),
+        payment.get('notes', ''),
+        payment.get('created_at', ''),
+        payment.get('updated_at', ''),
+    ]
+
+
+# Worksheet title, headers and row builder for each synced entity
+SHEETS = {
+    'customers': ('Customers', CUSTOMER_HEADERS, _customer_row),
+    'projects': ('Projects', PROJECT_HEADERS, _project_row),
+    'payments': ('Payments', PAYMENT_HEADERS, _payment_row),
+}
+
+
+def project_sheet_data(project) -> Dict[str, Any]:
+    """Build sheet data for a Project instance"""
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description or '',
+        'project_type': project.project_type.name if project.project_type else '',
+        'customer': project.customer.name,
+        'status': project.get_status_display(),
+        'total_budget': float(project.total_budget),
+        'total_revenue': float(project.total_revenue),
+        'total_cost': float(project.total_cost),
+        'profit': float(project.profit),
+        'loss': float(project.loss),
+        'live_url': project.live_url or '',
+        'repository_url': project.repository_url or '',
+        'start_date': project.start_date.strftime('%Y-%m-%d') if project.start_date else '',
+        'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else '',
+        'deadline': project.deadline.strftime('%Y-%m-%d') if project.deadline else '',
+        'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'updated_at': project.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def customer_sheet_data(customer) -> Dict[str, Any]:
+    """Build sheet data for a Customer instance"""
+    return {
+        'id': customer.id,
+        'name': customer.name,
+        'email': customer.email or '',
+        'whatsapp_number': customer.whatsapp_number or '',
+        'phone_number': customer.phone_number or '',
+        'company': customer.company or '',
+        'address': customer.address or '',
+        'notes': customer.notes or '',
+        'created_at': customer.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'updated_at': customer.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def payment_sheet_data(payment) -> Dict[str, Any]:
+    """Build sheet data for a PaymentPart instance"""
+    return {
+        'id': payment.id,
+        'project': payment.project.name,
+        'amount': float(payment.amount),
+        'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
+        'payment_method': payment.get_payment_method_display(),
+        'reference_number': payment.reference_number or '',
+        'notes': payment.notes or '',
+        'created_at': payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'updated_at': payment.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+class _SheetsHandleCache:
+    """
+    Process-wide cache of the backend, its authorized client, the
+    spreadsheet and worksheet handles and the per-worksheet row indexes.
+    
+    Everything is dropped once GOOGLE_SHEETS_CACHE_TTL seconds have passed
+    since it was loaded, or when a Sheets call fails.
+    """
+    
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        with self.lock:
+            self.loaded_at = None
+            self.backend = None
+            self.client = None
+            self.spreadsheets = {}
+            self.worksheets = {}
+            self.row_indexes = {}
+            self.written_rows = {}
+    
+    def expire(self, ttl: int):
+        """Clear the cache if it is older than ttl seconds"""
+        with self.lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at > ttl:
+                self.clear()
+            if self.loaded_at is None:
+                self.loaded_at = time.monotonic()
+
+
+_handle_cache = _SheetsHandleCache()
 
 
 class GoogleSheetsService:
     """Service to interact with Google Sheets"""
     
     def __init__(self):
-        self.credentials_file = settings.GOOGLE_SHEETS_CREDENTIALS_FILE
         self.spreadsheet_name = settings.GOOGLE_SHEETS_SPREADSHEET_NAME
+        self.batch_rows = max(1, settings.GOOGLE_SHEETS_BATCH_ROWS)
+        self.cache_ttl = settings.GOOGLE_SHEETS_CACHE_TTL
         self.client = None
         self.spreadsheet = None
-        
+    
+    @staticmethod
+    def clear_cache():
+        """Drop the shared client, spreadsheet, worksheet and row index cache"""
+        _handle_cache.clear()
+    
+    @staticmethod
+    def clear_row_indexes():
+        """Drop the cached row indexes, so the next upsert re-reads column A of its worksheet"""
+        with _handle_cache.lock:
+            _handle_cache.row_indexes.clear()
+            _handle_cache.written_rows.clear()
+    
     def _get_client(self):
-        """Get authenticated Google Sheets client"""
-        if self.client is None:
-            scope = [
-                'https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            creds_path = os.path.join(settings.BASE_DIR, self.credentials_file)
-            if not os.path.exists(creds_path):
-                raise FileNotFoundError(
-                    f"Google Sheets credentials file not found at {creds_path}. "
-                    "Please download your service account JSON key from Google Cloud Console."
-                )
+        """Get an authenticated client from the GOOGLE_SHEETS_BACKEND backend"""
+        with _handle_cache.lock:
+            _handle_cache.expire(self.cache_ttl)
             
-            creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-            self.client = gspread.authorize(creds)
+            if _handle_cache.backend is None:
+                _handle_cache.backend = import_string(settings.GOOGLE_SHEETS_BACKEND)()
+            _handle_cache.client = _handle_cache.backend.get_client()
+            self.client = _handle_cache.client
         
         return self.client
     
@@ -42,14 +220,18 @@ class GoogleSheetsService:
         """Get existing spreadsheet or create new one"""
         client = self._get_client()
         
-        try:
-            # Try to open existing spreadsheet
-            spreadsheet = client.open(self.spreadsheet_name)
-        except gspread.SpreadsheetNotFound:
-            # Create new spreadsheet
-            spreadsheet = client.create(self.spreadsheet_name)
-            # Share with your email if needed
-            # spreadsheet.share('your-email@gmail.com', perm_type='user', role='writer')
+        with _handle_cache.lock:
+            spreadsheet = _handle_cache.spreadsheets.get(self.spreadsheet_name)
+            if spreadsheet is None:
+                try:
+                    # Try to open existing spreadsheet
+                    spreadsheet = client.open(self.spreadsheet_name)
+                except gspread.SpreadsheetNotFound:
+                    # Create new spreadsheet
+                    spreadsheet = client.create(self.spreadsheet_name)
+                    # Share with your email if needed
+                    # spreadsheet.share('your-email@gmail.com', perm_type='user', role='writer')
+                _handle_cache.spreadsheets[self.spreadsheet_name] = spreadsheet
         
         self.spreadsheet = spreadsheet
         return spreadsheet
@@ -57,124 +239,299 @@ class GoogleSheetsService:
     def _get_or_create_worksheet(self, worksheet_name: str, headers: List[str] = None):
         """Get existing worksheet or create new one with headers"""
         spreadsheet = self._get_or_create_spreadsheet()
+        key = (self.spreadsheet_name, worksheet_name)
         
-        try:
-            worksheet = spreadsheet.worksheet(worksheet_name)
-        except gspread.WorksheetNotFound:
-            worksheet = spreadsheet.add_worksheet(
-                title=worksheet_name,
-                rows=1000,
-                cols=20
-            )
-            if headers:
-                worksheet.append_row(headers)
+        with _handle_cache.lock:
+            worksheet = _handle_cache.worksheets.get(key)
+            if worksheet is None:
+                try:
+                    worksheet = spreadsheet.worksheet(worksheet_name)
+                except gspread.WorksheetNotFound:
+                    worksheet = spreadsheet.add_worksheet(
+                        title=worksheet_name,
+                        rows=1000,
+                        cols=20
+                    )
+                    if headers:
+                        worksheet.append_row(headers)
+                _handle_cache.worksheets[key] = worksheet
         
         return worksheet
     
-    def sync_projects(self, projects_data: List[Dict[str, Any]]):
-        """Sync projects data to Google Sheets"""
-        headers = [
-            'ID', 'Name', 'Description', 'Project Type', 'Customer', 'Status',
-            'Total Budget', 'Total Revenue', 'Total Cost', 'Profit', 'Loss',
-            'Live URL', 'Repository URL', 'Start Date', 'End Date', 'Deadline',
-            'Created At', 'Updated At'
-        ]
+    def _write_rows(self, worksheet, rows: List[List[Any]], start_row: int = 2):
+        """
+        Write rows starting at start_row, one range update per batch.
         
-        worksheet = self._get_or_create_worksheet('Projects', headers)
-        
-        # Clear existing data (except headers)
-        if worksheet.row_count > 1:
-            worksheet.delete_rows(2, worksheet.row_count)
-        
-        # Add project data
-        for project in projects_data:
-            row = [
-                project.get('id', ''),
-                project.get('name', ''),
-                project.get('description', ''),
-                project.get('project_type', ''),
-                project.get('customer', ''),
-                project.get('status', ''),
-                project.get('total_budget', 0),
-                project.get('total_revenue', 0),
-                project.get('total_cost', 0),
-                project.get('profit', 0),
-                project.get('loss', 0),
-                project.get('live_url', ''),
-                project.get('repository_url', ''),
-                project.get('start_date', ''),
-                project.get('end_date', ''),
-                project.get('deadline', ''),
-                project.get('created_at', ''),
-                project.get('updated_at', ''),
-            ]
-            worksheet.append_row(row)
+        Each update covers at most GOOGLE_SHEETS_BATCH_ROWS rows, so a sync
+        costs ceil(len(rows) / batch_rows) API calls instead of one per row.
+        """
+        if not rows:
+            return
         
+        last_row = start_row + len(rows) - 1
+        if worksheet.row_count < last_row:
+            worksheet.add_rows(last_row - worksheet.row_count)
+        
+        width = max(len(row) for row in rows)
+        for offset in range(0, len(rows), self.batch_rows):
+            chunk = rows[offset:offset + self.batch_rows]
+            first_row = start_row + offset
+            range_name = f'A{first_row}:{rowcol_to_a1(first_row + len(chunk) - 1, width)}'
+            worksheet.update(chunk, range_name)
+    
+    def _replace_rows(self, worksheet, rows: List[List[Any]]):
+        """Replace all data rows (everything below the header) with rows"""
+        # Shrinking the grid to the header plus the new data drops stale rows
+        # in a single call; the data itself is then written in batches.
+        key = (self.spreadsheet_name, worksheet.title)
+        with _handle_cache.lock:
+            try:
+                worksheet.resize(rows=len(rows) + 1)
+                self._write_rows(worksheet, rows)
+            except Exception:
+                _handle_cache.clear()
+                raise
+            
+            _handle_cache.row_indexes[key] = {
+                str(row[0]): row_number for row_number, row in enumerate(rows, start=2)
+            }
+            _handle_cache.written_rows[key] = {str(row[0]): row for row in rows}
+    
+    def _get_row_index(self, worksheet) -> Dict[str, int]:
+        """Get the ID -> row number index, reading column A only once"""
+        key = (self.spreadsheet_name, worksheet.title)
+        if key not in _handle_cache.row_indexes:
+            index = {}
+            for row_number, value in enumerate(worksheet.col_values(1)[1:], start=2):
+                if value not in ('', None):
+                    index.setdefault(str(value), row_number)
+            _handle_cache.row_indexes[key] = index
+            _handle_cache.written_rows[key] = {}
+        return _handle_cache.row_indexes[key]
+    
+    def _update_rows(self, worksheet, numbered_rows: List[Tuple[int, List[Any]]]):
+        """Write (row_number, row) pairs, merging adjacent rows into one range"""
+        if not numbered_rows:
+            return
+        
+        numbered_rows = sorted(numbered_rows, key=lambda item: item[0])
+        last_row = numbered_rows[-1][0]
+        if worksheet.row_count < last_row:
+            worksheet.add_rows(last_row - worksheet.row_count)
+        
+        for offset in range(0, len(numbered_rows), self.batch_rows):
+            chunk = numbered_rows[offset:offset + self.batch_rows]
+            runs = []
+            for row_number, row in chunk:
+                if runs and runs[-1][0] + len(runs[-1][1]) == row_number:
+                    runs[-1][1].append(row)
+                else:
+                    runs.append((row_number, [row]))
+            
+            data = []
+            for first_row, values in runs:
+                width = max(len(row) for row in values)
+                data.append({
+                    'range': f'A{first_row}:{rowcol_to_a1(first_row + len(values) - 1, width)}',
+                    'values': values,
+                })
+            worksheet.batch_update(data)
+    
+    def _append_rows(self, worksheet, rows: List[List[Any]], index: Dict[str, int]):
+        """
+        Append rows after the table that starts at A1 and add them to the index.
+        
+        Sheets finds the end of the table itself, so rows typed in without an
+        ID (which column A does not show) are never overwritten. The rows are
+        inserted, so index entries below the insert point move down.
+        """
+        for offset in range(0, len(rows), self.batch_rows):
+            chunk = rows[offset:offset + self.batch_rows]
+            response = worksheet.append_rows(
+                chunk,
+                value_input_option=ValueInputOption.raw,
+                insert_data_option=InsertDataOption.insert_rows,
+                table_range='A1',
+            )
+            updated_range = response['updates']['updatedRange'].split('!')[-1]
+            first_row = a1_to_rowcol(updated_range.split(':')[0])[0]
+            for row_id, row_number in index.items():
+                if row_number >= first_row:
+                    index[row_id] = row_number + len(chunk)
+            for row_number, row in enumerate(chunk, start=first_row):
+                index[str(row[0])] = row_number
+    
+    def _delete_rows(self, worksheet, row_numbers: Iterable[int]):
+        """Delete the given rows in a single batch request"""
+        # Requests run in order, so deleting bottom-up keeps indexes valid
+        requests = [
+            {
+                'deleteDimension': {
+                    'range': {
+                        'sheetId': worksheet.id,
+                        'dimension': 'ROWS',
+                        'startIndex': row_number - 1,
+                        'endIndex': row_number,
+                    }
+                }
+            }
+            for row_number in sorted(set(row_numbers), reverse=True)
+        ]
+        if requests:
+            worksheet.spreadsheet.batch_update({'requests': requests})
+    
+    def _upsert_rows(self, worksheet, rows: List[List[Any]], deleted_ids: Iterable[Any] = None,
+                     sheet_rows: Dict[Any, int] = None):
+        """
+        Update changed rows in place, append new ones and remove deleted ones.
+        
+        Rows are matched on their first column (the record ID). Rows whose
+        values match what was last written are skipped entirely. New rows
+        cost one append call per GOOGLE_SHEETS_BATCH_ROWS rows, except those
+        given a {record ID: row number} in sheet_rows: they are written to
+        that row if its ID cell is still blank.
+        """
+        # The lock keeps row numbers consistent between concurrent upserts
+        with _handle_cache.lock:
+            try:
+                index = self._get_row_index(worksheet)
+                written = _handle_cache.written_rows[(self.spreadsheet_name, worksheet.title)]
+                
+                used_rows = set(index.values())
+                for row_id, row_number in (sheet_rows or {}).items():
+                    if str(row_id) not in index and row_number > 1 and row_number not in used_rows:
+                        index[str(row_id)] = row_number
+                        used_rows.add(row_number)
+                
+                deleted = {str(row_id) for row_id in (deleted_ids or [])}
+                deleted_rows = sorted(index[row_id] for row_id in deleted if row_id in index)
+                if deleted_rows:
+                    self._delete_rows(worksheet, deleted_rows)
+                    for row_id in deleted:
+                        index.pop(row_id, None)
+                        written.pop(row_id, None)
+                    for row_id, row_number in index.items():
+                        index[row_id] = row_number - sum(1 for n in deleted_rows if n < row_number)
+                
+                numbered_rows, new_rows = [], []
+                for row in rows:
+                    row_id = str(row[0])
+                    if row_id in deleted:
+                        continue
+                    if row_id not in index:
+                        new_rows.append(row)
+                    elif written.get(row_id) == row:
+                        continue
+                    else:
+                        numbered_rows.append((index[row_id], row))
+                    written[row_id] = row
+                
+                self._update_rows(worksheet, numbered_rows)
+                self._append_rows(worksheet, new_rows, index)
+            except Exception:
+                # Row numbers may no longer match the sheet; re-read next time
+                _handle_cache.clear()
+                raise
+    
+    def sync_projects(self, projects_data: List[Dict[str, Any]]):
+        """Sync projects data to Google Sheets"""
+        worksheet = self._get_or_create_worksheet('Projects', PROJECT_HEADERS)
+        self._replace_rows(worksheet, [_project_row(project) for project in projects_data])
         return worksheet.url
     
     def sync_customers(self, customers_data: List[Dict[str, Any]]):
         """Sync customers data to Google Sheets"""
-        headers = [
-            'ID', 'Name', 'Email', 'WhatsApp Number', 'Phone Number',
-            'Company', 'Address', 'Notes', 'Created At', 'Updated At'
-        ]
-        
-        worksheet = self._get_or_create_worksheet('Customers', headers)
-        
-        # Clear existing data (except headers)
-        if worksheet.row_count > 1:
-            worksheet.delete_rows(2, worksheet.row_count)
-        
-        # Add customer data
-        for customer in customers_data:
-            row = [
-                customer.get('id', ''),
-                customer.get('name', ''),
-                customer.get('email', ''),
-                customer.get('whatsapp_number', ''),
-                customer.get('phone_number', ''),
-                customer.get('company', ''),
-                customer.get('address', ''),
-                customer.get('notes', ''),
-                customer.get('created_at', ''),
-                customer.get('updated_at', ''),
-            ]
-            worksheet.append_row(row)
-        
+        worksheet = self._get_or_create_worksheet('Customers', CUSTOMER_HEADERS)
+        self._replace_rows(worksheet, [_customer_row(customer) for customer in customers_data])
         return worksheet.url
     
     def sync_payments(self, payments_data: List[Dict[str, Any]]):
         """Sync payment parts data to Google Sheets"""
-        headers = [
-            'ID', 'Project', 'Amount', 'Payment Date', 'Payment Method',
-            'Reference Number', 'Notes', 'Created At', 'Updated At'
-        ]
+        worksheet = self._get_or_create_worksheet('Payments', PAYMENT_HEADERS)
+        self._replace_rows(worksheet, [_payment_row(payment) for payment in payments_data])
+        return worksheet.url
+    
+    def upsert_projects(self, projects_data: List[Dict[str, Any]], deleted_ids: Iterable[Any] = None,
+                        sheet_rows: Dict[Any, int] = None):
+        """Insert or update the given projects and remove deleted ones, keeping other rows"""
+        worksheet = self._get_or_create_worksheet('Projects', PROJECT_HEADERS)
+        self._upsert_rows(worksheet, [_project_row(project) for project in projects_data], deleted_ids, sheet_rows)
+        return worksheet.url
+    
+    def upsert_customers(self, customers_data: List[Dict[str, Any]], deleted_ids: Iterable[Any] = None,
+                         sheet_rows: Dict[Any, int] = None):
+        """Insert or update the given customers and remove deleted ones, keeping other rows"""
+        worksheet = self._get_or_create_worksheet('Customers', CUSTOMER_HEADERS)
+        self._upsert_rows(worksheet, [_customer_row(customer) for customer in customers_data], deleted_ids, sheet_rows)
+        return worksheet.url
+    
+    def upsert_payments(self, payments_data: List[Dict[str, Any]], deleted_ids: Iterable[Any] = None,
+                        sheet_rows: Dict[Any, int] = None):
+        """Insert or update the given payments and remove deleted ones, keeping other rows"""
+        worksheet = self._get_or_create_worksheet('Payments', PAYMENT_HEADERS)
+        self._upsert_rows(worksheet, [_payment_row(payment) for payment in payments_data], deleted_ids, sheet_rows)
+        return worksheet.url
+    
+    def read_sheet(self, sheet: str) -> List[List[Any]]:
+        """Read all data rows (without the header) of a worksheet in a single call"""
+        title, headers, _ = SHEETS[sheet]
+        worksheet = self._get_or_create_worksheet(title, headers)
+        return worksheet.get_all_values(value_render_option=ValueRenderOption.unformatted)[1:]
+    
+    def export_position(self, sheet: str) -> Tuple[int, int]:
+        """
+        Get (last exported ID, next free row) for resuming an export.
         
-        worksheet = self._get_or_create_worksheet('Payments', headers)
-        
-        # Clear existing data (except headers)
-        if worksheet.row_count > 1:
-            worksheet.delete_rows(2, worksheet.row_count)
-        
-        # Add payment data
-        for payment in payments_data:
-            row = [
-                payment.get('id', ''),
-                payment.get('project', ''),
-                payment.get('amount', 0),
-                payment.get('payment_date', ''),
-                payment.get('payment_method', ''),
-                payment.get('reference_number', ''),
-                payment.get('notes', ''),
-                payment.get('created_at', ''),
-                payment.get('updated_at', ''),
-            ]
-            worksheet.append_row(row)
+        Exports write records in ID order, so the last ID in column A marks
+        where an interrupted export stopped.
+        """
+        title, headers, _ = SHEETS[sheet]
+        worksheet = self._get_or_create_worksheet(title, headers)
+        ids = [value for value in worksheet.col_values(1)[1:] if value not in ('', None)]
+        last_id = int(ids[-1]) if ids else 0
+        return last_id, len(ids) + 2
+    
+    def export_rows(self, sheet: str, records_data: Iterable[Dict[str, Any]], total: int,
+                    start_row: int = 2, progress=None) -> int:
+        """
+        Stream records to a worksheet in batched range writes.
         
-        return worksheet.url
+        records_data may be a generator; at most one batch of rows is held in
+        memory. Rows below start_row + total are dropped. progress, if given,
+        is called with the number of rows written after each batch.
+        
+        Returns the number of rows written.
+        """
+        title, headers, build_row = SHEETS[sheet]
+        worksheet = self._get_or_create_worksheet(title, headers)
+        
+        with _handle_cache.lock:
+            # Upsert row numbers are invalid once the sheet is rewritten
+            _handle_cache.row_indexes.pop((self.spreadsheet_name, title), None)
+            _handle_cache.written_rows.pop((self.spreadsheet_name, title), None)
+        
+        # Size the grid once up front so batch writes never need add_rows
+        worksheet.resize(rows=max(start_row - 1 + total, 1))
+        
+        written = 0
+        rows = []
+        for record in records_data:
+            rows.append(build_row(record))
+            if len(rows) == self.batch_rows:
+                self._write_rows(worksheet, rows, start_row + written)
+                written += len(rows)
+                rows = []
+                if progress:
+                    progress(written)
+        if rows:
+            self._write_rows(worksheet, rows, start_row + written)
+            written += len(rows)
+            if progress:
+                progress(written)
+        
+        return written
     
     def get_spreadsheet_url(self):
         """Get the URL of the spreadsheet"""
         spreadsheet = self._get_or_create_spreadsheet()
         return spreadsheet.url
-
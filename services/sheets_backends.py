@@ -0,0 +1,295 @@
+"""
+Google Sheets backends
+GoogleSheetsService talks to a gspread-style client supplied by the backend
+selected with the GOOGLE_SHEETS_BACKEND setting
+"""
+import gspread
+import httplib2
+import json
+import os
+from collections import Counter
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from oauth2client.service_account import ServiceAccountCredentials
+from django.conf import settings
+from typing import List, Any
+
+
+class GspreadBackend:
+    """Backend for the real Google Sheets API, authorized with a service account"""
+    
+    def __init__(self):
+        self.credentials = None
+        self.client = None
+    
+    def get_client(self):
+        """Get an authorized gspread client, refreshing an expired token"""
+        if self.client is None:
+            scope = [
+                'https://spreadsheets.google.com/feeds',
+                'https://www.googleapis.com/auth/drive'
+            ]
+            
+            creds_path = os.path.join(settings.BASE_DIR, settings.GOOGLE_SHEETS_CREDENTIALS_FILE)
+            if not os.path.exists(creds_path):
+                raise FileNotFoundError(
+                    f"Google Sheets credentials file not found at {creds_path}. "
+                    "Please download your service account JSON key from Google Cloud Console."
+                )
+            
+            self.credentials = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
+            self.client = gspread.authorize(self.credentials)
+        elif self.credentials.access_token_expired:
+            # Refresh the token in place instead of re-reading the key file
+            self.credentials.refresh(httplib2.Http())
+        return self.client
+
+
+class SheetCallStats:
+    """Counts of API calls and data sent to a fake backend"""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.calls = Counter()
+        self.rows_written = 0
+        self.cells_written = 0
+        self.payload_bytes = 0
+    
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+    
+    def record(self, method: str, payload=None, rows: List[List[Any]] = None):
+        self.calls[method] += 1
+        if payload is not None:
+            self.payload_bytes += len(json.dumps(payload, default=str))
+        if rows:
+            self.rows_written += len(rows)
+            self.cells_written += sum(len(row) for row in rows)
+
+
+class SheetStore:
+    """Spreadsheet contents and call stats of a fake backend"""
+    
+    def __init__(self):
+        self.spreadsheets = {}
+        self.stats = SheetCallStats()
+    
+    def reset(self):
+        self.spreadsheets.clear()
+        self.stats.reset()
+    
+    def save(self):
+        """Persist the contents after a change (in-memory stores keep nothing)"""
+
+
+class FileSheetStore(SheetStore):
+    """Sheet store saved to a JSON file after every change"""
+    
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as f:
+                for name, worksheets in json.load(f).items():
+                    spreadsheet = FakeSpreadsheet(self, name)
+                    for title, data in worksheets.items():
+                        worksheet = spreadsheet.add_worksheet(title, rows=data['row_count'], cols=20, record=False)
+                        worksheet.rows = [list(row) for row in data['rows']]
+                    self.spreadsheets[name] = spreadsheet
+    
+    def save(self):
+        data = {
+            name: {
+                worksheet.title: {'row_count': worksheet.row_count, 'rows': worksheet.rows}
+                for worksheet in spreadsheet.worksheets.values()
+            }
+            for name, spreadsheet in self.spreadsheets.items()
+        }
+        with open(self.path, 'w') as f:
+            json.dump(data, f, default=str)
+
+
+class FakeWorksheet:
+    """In-process stand-in for gspread.Worksheet, supporting the calls the service makes"""
+    
+    def __init__(self, spreadsheet, title: str, rows: int, sheet_id: int):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.rows = [[] for _ in range(rows)]
+    
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+    
+    @property
+    def url(self) -> str:
+        return f'{self.spreadsheet.url}#gid={self.id}'
+    
+    def _record(self, method: str, payload=None, rows=None):
+        self.spreadsheet.store.stats.record(method, payload, rows)
+    
+    def _set(self, range_name: str, values: List[List[Any]]):
+        first_row, first_col = a1_to_rowcol(range_name.split(':')[0])
+        if first_row - 1 + len(values) > self.row_count:
+            raise ValueError(f'Range {range_name} exceeds grid limits of {self.title}')
+        for offset, values_row in enumerate(values):
+            row = self.rows[first_row - 1 + offset]
+            end = first_col - 1 + len(values_row)
+            row.extend([''] * (end - len(row)))
+            row[first_col - 1:end] = list(values_row)
+    
+    def _used_rows(self) -> List[List[Any]]:
+        last = max((i + 1 for i, row in enumerate(self.rows) if any(v not in ('', None) for v in row)), default=0)
+        return self.rows[:last]
+    
+    def update(self, values: List[List[Any]], range_name: str):
+        self._record('update', values, values)
+        self._set(range_name, values)
+        self.spreadsheet.store.save()
+    
+    def batch_update(self, data: List[dict]):
+        self._record('batch_update', data, [row for item in data for row in item['values']])
+        for item in data:
+            self._set(item['range'], item['values'])
+        self.spreadsheet.store.save()
+    
+    def append_row(self, values: List[Any]):
+        self._record('append_row', [values], [values])
+        next_row = len(self._used_rows())
+        if next_row >= self.row_count:
+            self.rows.append([])
+        self.rows[next_row] = list(values)
+        self.spreadsheet.store.save()
+    
+    def append_rows(self, values: List[List[Any]], value_input_option=None, insert_data_option=None,
+                    table_range: str = None):
+        """Insert rows after the table starting at table_range (the rows up to the first empty one)"""
+        self._record('append_rows', values, values)
+        first_row, first_col = a1_to_rowcol(table_range or 'A1')
+        next_row = first_row - 1
+        while next_row < self.row_count and any(v not in ('', None) for v in self.rows[next_row]):
+            next_row += 1
+        if insert_data_option == 'INSERT_ROWS':
+            self.rows[next_row:next_row] = [[] for _ in values]
+        else:
+            self.rows.extend([] for _ in range(next_row + len(values) - self.row_count))
+        self._set(rowcol_to_a1(next_row + 1, first_col), values)
+        self.spreadsheet.store.save()
+        width = max((len(row) for row in values), default=1)
+        last_cell = rowcol_to_a1(next_row + len(values), first_col + width - 1)
+        return {'updates': {
+            'updatedRange': f"'{self.title}'!{rowcol_to_a1(next_row + 1, first_col)}:{last_cell}",
+            'updatedRows': len(values),
+        }}
+    
+    def resize(self, rows: int = None, cols: int = None):
+        self._record('resize')
+        if rows is not None:
+            self.rows = self.rows[:rows] + [[] for _ in range(rows - len(self.rows))]
+        self.spreadsheet.store.save()
+    
+    def add_rows(self, rows: int):
+        self._record('add_rows')
+        self.rows.extend([] for _ in range(rows))
+        self.spreadsheet.store.save()
+    
+    def col_values(self, col: int) -> List[Any]:
+        self._record('col_values')
+        values = [row[col - 1] if len(row) >= col else '' for row in self.rows]
+        while values and values[-1] in ('', None):
+            values.pop()
+        return [str(value) for value in values]
+    
+    def get_all_values(self, value_render_option=None) -> List[List[Any]]:
+        self._record('get_all_values')
+        rows = self._used_rows()
+        width = max((len(row) for row in rows), default=0)
+        rows = [list(row) + [''] * (width - len(row)) for row in rows]
+        if value_render_option != 'UNFORMATTED_VALUE':
+            rows = [[str(value) for value in row] for row in rows]
+        return rows
+
+
+class FakeSpreadsheet:
+    """In-process stand-in for gspread.Spreadsheet"""
+    
+    def __init__(self, store: SheetStore, title: str):
+        self.store = store
+        self.title = title
+        self.worksheets = {}
+    
+    @property
+    def url(self) -> str:
+        return f'memory://{self.title}'
+    
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.store.stats.record('worksheet')
+        if title not in self.worksheets:
+            raise gspread.WorksheetNotFound(title)
+        return self.worksheets[title]
+    
+    def add_worksheet(self, title: str, rows: int, cols: int, record: bool = True) -> FakeWorksheet:
+        if record:
+            self.store.stats.record('add_worksheet')
+        worksheet = FakeWorksheet(self, title, rows, len(self.worksheets))
+        self.worksheets[title] = worksheet
+        return worksheet
+    
+    def batch_update(self, body: dict):
+        """Apply deleteDimension row requests, the only kind the service sends"""
+        self.store.stats.record('spreadsheet_batch_update', body)
+        sheets = {worksheet.id: worksheet for worksheet in self.worksheets.values()}
+        for request in body['requests']:
+            dimension = request['deleteDimension']['range']
+            worksheet = sheets[dimension['sheetId']]
+            del worksheet.rows[dimension['startIndex']:dimension['endIndex']]
+        self.store.save()
+
+
+class FakeClient:
+    """In-process stand-in for gspread.Client"""
+    
+    def __init__(self, store: SheetStore):
+        self.store = store
+    
+    def open(self, name: str) -> FakeSpreadsheet:
+        self.store.stats.record('open')
+        if name not in self.store.spreadsheets:
+            raise gspread.SpreadsheetNotFound(name)
+        return self.store.spreadsheets[name]
+    
+    def create(self, name: str) -> FakeSpreadsheet:
+        self.store.stats.record('create')
+        spreadsheet = FakeSpreadsheet(self.store, name)
+        # New spreadsheets come with one empty default sheet, like Google's
+        spreadsheet.add_worksheet('Sheet1', rows=1000, cols=26, record=False)
+        self.store.spreadsheets[name] = spreadsheet
+        self.store.save()
+        return spreadsheet
+
+
+class MemoryBackend:
+    """
+    Offline backend keeping spreadsheets in process memory.
+    
+    All instances share one store, so data survives cache clears;
+    MemoryBackend.store.stats counts calls and payload sizes for tests and
+    benchmarks, and MemoryBackend.store.reset() empties it.
+    """
+    store = SheetStore()
+    
+    def get_client(self):
+        return FakeClient(self.store)
+
+
+class LocalFileBackend:
+    """Offline backend keeping spreadsheets in the GOOGLE_SHEETS_LOCAL_FILE JSON file"""
+    
+    def __init__(self):
+        self.store = FileSheetStore(os.path.join(settings.BASE_DIR, settings.GOOGLE_SHEETS_LOCAL_FILE))
+    
+    def get_client(self):
+        return FakeClient(self.store)
@@ -0,0 +1,18 @@
+"""
+Admin configuration for Sync app
+"""
+from django.contrib import admin
+from .models import SheetSyncOutbox, Tombstone
+
+
+@admin.register(SheetSyncOutbox)
+class SheetSyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ['entity', 'object_id', 'action', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['entity', 'action']
+    readonly_fields = ['created_at']
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['entity', 'object_id', 'deleted_at']
+    list_filter = ['entity']
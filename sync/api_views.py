@@ -0,0 +1,20 @@
+"""
+API Views for Sync app
+"""
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .changes import InvalidToken, changes_since
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """ViewSet for clients that keep a local copy of projects, customers and payments"""
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        """Get what changed since ?since= (everything without it) and the token for the next sync"""
+        try:
+            changes = changes_since(request.query_params.get('since'), {'request': request})
+        except InvalidToken:
+            return Response({'error': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes)
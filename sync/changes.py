@@ -0,0 +1,126 @@
+"""
+Changes since a sync token, for API clients that keep a local copy
+Records are read in (updated_at, id) order from an index on those columns and
+deletions from the tombstone log, so a sync reads only what changed
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import Tombstone
+
+
+class InvalidToken(ValueError):
+    """Raised for sync tokens that cannot be decoded"""
+
+
+def _sources():
+    """Map response keys to (queryset, serializer class, tombstone entity)"""
+    from projects.models import Project
+    from projects.serializers import ProjectSyncSerializer
+    from customers.models import Customer
+    from customers.serializers import CustomerSyncSerializer
+    from payments.models import PaymentPart
+    from payments.serializers import PaymentPartSyncSerializer
+    
+    # Records carry only their own fields (and project totals, which payments
+    # update through the project's updated_at), so no field goes stale when a
+    # related record changes
+    return {
+        'projects': (
+            Project.objects.with_financials().prefetch_related('images', 'files'),
+            ProjectSyncSerializer,
+            'project',
+        ),
+        'customers': (Customer.objects.all(), CustomerSyncSerializer, 'customer'),
+        'payments': (PaymentPart.objects.all(), PaymentPartSyncSerializer, 'payment'),
+    }
+
+
+def encode_token(positions: dict) -> str:
+    """Encode the (timestamp, id) reached in each stream; None means nothing read yet"""
+    data = {
+        name: [position[0].isoformat(), position[1]] if position else None
+        for name, position in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+
+
+def _decode_position(position):
+    if not position:
+        return None
+    timestamp = datetime.fromisoformat(position[0])
+    if timezone.is_naive(timestamp):
+        raise ValueError('timestamp without a time zone')
+    return timestamp, int(position[1])
+
+
+def decode_token(token: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return {name: _decode_position(data[name]) for name in list(_sources()) + ['deleted']}
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, IndexError) as e:
+        raise InvalidToken(str(e))
+
+
+def _read(queryset, field: str, position, limit: int, settled):
+    """
+    Read up to limit rows after position in (field, id) order. Returns the
+    rows, the position to resume from and whether more rows are waiting.
+    
+    Once a stream is read to the end its position is held back to settled,
+    so rows from transactions that commit after this read but carry an
+    earlier timestamp are picked up by the next sync (and recent rows are
+    sent again, which clients apply idempotently).
+    """
+    if position:
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': position[0]}) | Q(**{field: position[0], 'id__gt': position[1]})
+        )
+    rows = list(queryset.order_by(field, 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    reached = (getattr(rows[-1], field), rows[-1].pk) if rows else position
+    if not has_more and (reached is None or reached > settled):
+        reached = settled if position is None else max(position, settled)
+    return rows, reached, has_more
+
+
+def changes_since(token: str = None, context: dict = None) -> dict:
+    """
+    Get the records created or updated and the IDs deleted since a sync
+    token (everything, without tombstones, when there is none), at most
+    SYNC_PAGE_SIZE of each per call, with the token to pass next time.
+    """
+    positions = decode_token(token) if token else None
+    settled = (timezone.now() - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS), 0)
+    limit = settings.SYNC_PAGE_SIZE
+    sources = _sources()
+    result = {'deleted': {name: [] for name in sources}}
+    reached = {}
+    has_more = False
+    
+    for name, (queryset, serializer_class, entity) in sources.items():
+        rows, reached[name], more = _read(queryset, 'updated_at', positions and positions[name], limit, settled)
+        result[name] = serializer_class(rows, many=True, context=context or {}).data
+        has_more = has_more or more
+    
+    if positions is None:
+        # A first sync has nothing to delete; later ones see deletions from now on
+        reached['deleted'] = settled
+    else:
+        tombstones, reached['deleted'], more = _read(
+            Tombstone.objects.all(), 'deleted_at', positions['deleted'], limit, settled
+        )
+        entities = {entity: name for name, (queryset, serializer_class, entity) in sources.items()}
+        for tombstone in tombstones:
+            result['deleted'][entities[tombstone.entity]].append(tombstone.object_id)
+        has_more = has_more or more
+    
+    result['next'] = encode_token(reached)
+    result['has_more'] = has_more
+    return result
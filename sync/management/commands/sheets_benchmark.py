@@ -0,0 +1,52 @@
+"""
+Benchmark Google Sheets sync offline
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from services.google_sheets import GoogleSheetsService
+from services.sheets_backends import MemoryBackend
+
+
+class Command(BaseCommand):
+    help = 'Measure sync throughput and API calls against the in-memory Sheets backend'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of synthetic projects')
+        parser.add_argument(
+            '--changed', type=float, default=0.1, help='Fraction of rows changed in the upsert run'
+        )
+    
+    def handle(self, *args, **options):
+        rows = options['rows']
+        projects_data = [
+            {'id': i, 'name': f'Project {i}', 'customer': f'Customer {i % 100}', 'total_budget': i}
+            for i in range(1, rows + 1)
+        ]
+        changed = projects_data[::max(1, round(1 / options['changed']))] if options['changed'] else []
+        changed = [dict(project, name=f"{project['name']} (edited)") for project in changed]
+        
+        with override_settings(GOOGLE_SHEETS_BACKEND='services.sheets_backends.MemoryBackend'):
+            GoogleSheetsService.clear_cache()
+            MemoryBackend.store.reset()
+            try:
+                self._run('full sync', rows, lambda: GoogleSheetsService().sync_projects(projects_data))
+                self._run(
+                    'upsert', len(changed), lambda: GoogleSheetsService().upsert_projects(changed)
+                )
+            finally:
+                GoogleSheetsService.clear_cache()
+                MemoryBackend.store.reset()
+    
+    def _run(self, label, rows, sync):
+        stats = MemoryBackend.store.stats
+        stats.reset()
+        started = time.perf_counter()
+        sync()
+        elapsed = time.perf_counter() - started
+        
+        calls = ', '.join(f'{method}={count}' for method, count in sorted(stats.calls.items()))
+        self.stdout.write(
+            f'{label}: {rows} rows in {elapsed:.3f}s ({rows / elapsed:.0f} rows/s), '
+            f'{stats.total_calls} API calls ({calls}), {stats.payload_bytes} bytes sent'
+        )
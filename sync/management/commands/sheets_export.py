@@ -0,0 +1,54 @@
+"""
+Export the whole database to Google Sheets
+"""
+from django.core.management.base import BaseCommand
+from projects.models import Project
+from customers.models import Customer
+from payments.models import PaymentPart
+from services.google_sheets import (
+    GoogleSheetsService, project_sheet_data, customer_sheet_data, payment_sheet_data
+)
+
+
+class Command(BaseCommand):
+    help = 'Export all customers, projects and payments to Google Sheets'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', nargs='+', choices=['customers', 'projects', 'payments'],
+            help='Export only these worksheets',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Database rows fetched per query')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue after the last exported ID instead of rewriting each worksheet',
+        )
+    
+    def handle(self, *args, **options):
+        sheets_service = GoogleSheetsService()
+        exports = {
+            'customers': (Customer.objects.all(), customer_sheet_data),
+            'projects': (Project.objects.select_related('customer', 'project_type'), project_sheet_data),
+            'payments': (PaymentPart.objects.select_related('project'), payment_sheet_data),
+        }
+        
+        for sheet, (queryset, build_data) in exports.items():
+            if options['only'] and sheet not in options['only']:
+                continue
+            
+            start_row = 2
+            queryset = queryset.order_by('pk')
+            if options['resume']:
+                last_id, start_row = sheets_service.export_position(sheet)
+                queryset = queryset.filter(pk__gt=last_id)
+            
+            total = queryset.count()
+            records_data = (build_data(obj) for obj in queryset.iterator(chunk_size=options['chunk_size']))
+            
+            def progress(written, sheet=sheet, total=total):
+                self.stdout.write(f'{sheet}: {written}/{total} rows')
+            
+            written = sheets_service.export_rows(
+                sheet, records_data, total, start_row=start_row, progress=progress
+            )
+            self.stdout.write(self.style.SUCCESS(f'Exported {written} {sheet}'))
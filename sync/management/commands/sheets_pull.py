@@ -0,0 +1,31 @@
+"""
+Import edits made in Google Sheets into the database
+"""
+from django.core.management.base import BaseCommand
+from sync.pull import pull_from_sheets
+
+
+class Command(BaseCommand):
+    help = 'Apply customer, project and payment edits made in Google Sheets to the database'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', nargs='+', choices=['customers', 'projects', 'payments'],
+            help='Pull only these worksheets',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them')
+    
+    def handle(self, *args, **options):
+        result = pull_from_sheets(only=options['only'], dry_run=options['dry_run'])
+        
+        for sheet in ['customers', 'projects', 'payments']:
+            if sheet in result:
+                counts = result[sheet]
+                self.stdout.write(
+                    f"{sheet}: {counts['created']} created, {counts['updated']} updated, "
+                    f"{counts['unchanged']} unchanged"
+                )
+        for conflict in result['conflicts']:
+            self.stdout.write(self.style.WARNING(conflict))
+        if options['dry_run']:
+            self.stdout.write('Dry run: no changes were saved')
@@ -0,0 +1,30 @@
+"""
+Background worker that drains the Google Sheets sync outbox
+"""
+import time
+from django.core.management.base import BaseCommand
+from services.google_sheets import GoogleSheetsService
+from sync.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Push queued project, customer and payment changes to Google Sheets'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Outbox entries per batch')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the due entries and exit')
+    
+    def handle(self, *args, **options):
+        # A single service instance keeps the Sheets client and worksheet handles between batches
+        sheets_service = GoogleSheetsService()
+        
+        while True:
+            result = process_outbox(sheets_service, batch_size=options['batch_size'])
+            if result['synced'] or result['failed']:
+                self.stdout.write(f"Synced {result['synced']} entries, {result['failed']} failed")
+            
+            if result['synced'] + result['failed'] < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
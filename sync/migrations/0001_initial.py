@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SheetSyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('project', 'Project'), ('customer', 'Customer'), ('payment', 'Payment')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], default='upsert', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Sheet Sync Outbox Entry',
+                'verbose_name_plural': 'Sheet Sync Outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['next_attempt_at', 'id'], name='sync_sheets_next_at_1a1136_idx')],
+            },
+        ),
+    ]
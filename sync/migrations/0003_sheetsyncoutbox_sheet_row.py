@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0002_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sheetsyncoutbox',
+            name='sheet_row',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SheetSyncOutbox(models.Model):
+    """Pending Google Sheets change, written in the same transaction as the record"""
+    ENTITY_CHOICES = [
+        ('project', 'Project'),
+        ('customer', 'Customer'),
+        ('payment', 'Payment'),
+    ]
+    ACTION_CHOICES = [
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+    ]
+    
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='upsert')
+    # Sheet row a record created from an ID-less row is written to
+    sheet_row = models.PositiveIntegerField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Sheet Sync Outbox Entry'
+        verbose_name_plural = 'Sheet Sync Outbox'
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.entity} #{self.object_id}"
+
+
+class Tombstone(models.Model):
+    """Deleted record, kept so API clients syncing changes can remove their copy"""
+    entity = models.CharField(max_length=20, choices=SheetSyncOutbox.ENTITY_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity} #{self.object_id} deleted {self.deleted_at}"
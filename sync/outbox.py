@@ -0,0 +1,112 @@
+"""
+Google Sheets sync outbox
+Records changes next to the model write and pushes them to Sheets in batches
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from services.google_sheets import (
+    GoogleSheetsService, project_sheet_data, customer_sheet_data, payment_sheet_data
+)
+from .models import SheetSyncOutbox
+
+
+def _entities():
+    """Map outbox entity names to (queryset, data builder, service method name)"""
+    from projects.models import Project
+    from customers.models import Customer
+    from payments.models import PaymentPart
+    
+    return {
+        'customer': (Customer.objects.all(), customer_sheet_data, 'upsert_customers'),
+        'project': (
+            Project.objects.select_related('customer', 'project_type'),
+            project_sheet_data,
+            'upsert_projects',
+        ),
+        'payment': (
+            PaymentPart.objects.select_related('project'),
+            payment_sheet_data,
+            'upsert_payments',
+        ),
+    }
+
+
+def enqueue(entity: str, object_id: int, action: str = 'upsert', sheet_row: int = None):
+    """Queue a record for syncing; call inside the transaction that changed it"""
+    return SheetSyncOutbox.objects.create(entity=entity, object_id=object_id, action=action, sheet_row=sheet_row)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff for failed entries, capped at the configured maximum"""
+    seconds = settings.GOOGLE_SHEETS_SYNC_RETRY_DELAY * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.GOOGLE_SHEETS_SYNC_MAX_RETRY_DELAY))
+
+
+def process_outbox(sheets_service: GoogleSheetsService = None, batch_size: int = 100) -> dict:
+    """
+    Drain one batch of due outbox entries.
+    
+    Entries for the same record are coalesced so only its latest state is
+    written, and each entity costs a single upsert call. Failed entities are
+    rescheduled with backoff; successful entries are removed.
+    
+    The batch is claimed first: its rows are locked with SKIP LOCKED and
+    pushed GOOGLE_SHEETS_SYNC_CLAIM_TIMEOUT seconds into the future, so
+    concurrent workers take other entries, and entries of a worker that
+    dies are picked up again once the claim runs out.
+    
+    Returns a dict with 'synced' and 'failed' entry counts.
+    """
+    sheets_service = sheets_service or GoogleSheetsService()
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            SheetSyncOutbox.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now).order_by('id')[:batch_size]
+        )
+        SheetSyncOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+            next_attempt_at=now + timedelta(seconds=settings.GOOGLE_SHEETS_SYNC_CLAIM_TIMEOUT)
+        )
+    result = {'synced': 0, 'failed': 0}
+    if entries:
+        # Rows may have moved since the last batch (exports, pulls, edits in
+        # the sheet), so each batch starts from a fresh index: one column read
+        sheets_service.clear_row_indexes()
+    
+    for entity, (queryset, build_data, method_name) in _entities().items():
+        entity_entries = [entry for entry in entries if entry.entity == entity]
+        if not entity_entries:
+            continue
+        
+        # Coalesce: the latest entry for a record decides whether it is kept
+        latest, sheet_rows = {}, {}
+        for entry in entity_entries:
+            latest[entry.object_id] = entry.action
+            if entry.sheet_row:
+                sheet_rows[entry.object_id] = entry.sheet_row
+        upsert_ids = [object_id for object_id, action in latest.items() if action == 'upsert']
+        objects = list(queryset.filter(pk__in=upsert_ids))
+        found_ids = {obj.pk for obj in objects}
+        deleted_ids = [object_id for object_id in latest if object_id not in found_ids]
+        
+        entry_ids = [entry.id for entry in entity_entries]
+        try:
+            getattr(sheets_service, method_name)(
+                [build_data(obj) for obj in objects], deleted_ids=deleted_ids, sheet_rows=sheet_rows
+            )
+        except Exception as e:
+            for entry in entity_entries:
+                entry.attempts += 1
+                entry.next_attempt_at = now + retry_delay(entry.attempts)
+                entry.last_error = str(e)
+            SheetSyncOutbox.objects.bulk_update(
+                entity_entries, ['attempts', 'next_attempt_at', 'last_error']
+            )
+            result['failed'] += len(entry_ids)
+        else:
+            SheetSyncOutbox.objects.filter(id__in=entry_ids).delete()
+            result['synced'] += len(entry_ids)
+    
+    return result
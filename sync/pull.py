@@ -0,0 +1,288 @@
+"""
+Import changes made in Google Sheets back into the database
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from projects.models import Project, ProjectType
+from customers.models import Customer
+from payments.models import PaymentPart
+from payments.rollups import rebuild_payment_rollups
+from dashboard.summary import rebuild_financial_summary
+from services.cache_versions import bump_versions
+from search.index import index_objects
+from services.google_sheets import GoogleSheetsService
+from .models import SheetSyncOutbox
+
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Sheets are read unformatted, so dates typed into a cell arrive as day numbers from this date
+SERIAL_DATE_EPOCH = date(1899, 12, 30)
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _row_id(row):
+    """Get the record ID from the first column, or None for new rows"""
+    value = _text(row[0]) if row else ''
+    if not value:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return value
+
+
+def _required_text(value):
+    value = _text(value)
+    if not value:
+        raise ValueError('value is required')
+    return value
+
+
+def _optional_text(value):
+    return _text(value) or None
+
+
+def _decimal(value):
+    value = _text(value).replace(',', '').lstrip('$')
+    if not value:
+        return Decimal('0.00')
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'"{value}" is not a number')
+
+
+def _date(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return SERIAL_DATE_EPOCH + timedelta(days=int(value))
+    value = _text(value)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'"{value}" is not a YYYY-MM-DD date')
+
+
+def _required_date(value):
+    value = _date(value)
+    if value is None:
+        raise ValueError('date is required')
+    return value
+
+
+def _choice(choices):
+    """Parse a choice from either its label (as exported) or its stored value"""
+    lookup = {label: key for key, label in choices}
+    lookup.update({key: key for key, label in choices})
+    
+    def parse(value):
+        value = _text(value)
+        if value not in lookup:
+            raise ValueError(f'"{value}" is not a valid choice')
+        return lookup[value]
+    return parse
+
+
+def _name_lookup(queryset, required=True):
+    """Resolve a name to a primary key; names shared by several rows are rejected"""
+    names = list(queryset.values_list('name', 'pk'))
+    counts = Counter(name for name, pk in names)
+    lookup = {name: pk for name, pk in names}
+    
+    def parse(value):
+        value = _text(value)
+        if not value and not required:
+            return None
+        if value not in lookup:
+            raise ValueError(f'"{value}" was not found')
+        if counts[value] > 1:
+            raise ValueError(f'"{value}" matches more than one record')
+        return lookup[value]
+    return parse
+
+
+def _same(current, new):
+    if current in ('', None) and new in ('', None):
+        return True
+    return current == new
+
+
+def _pull_specs():
+    """Sheet column -> model field parsers for each worksheet, in pull order"""
+    return [
+        ('customers', 'customer', Customer, lambda: [
+            ('name', 1, _required_text),
+            ('email', 2, _optional_text),
+            ('whatsapp_number', 3, _optional_text),
+            ('phone_number', 4, _optional_text),
+            ('company', 5, _optional_text),
+            ('address', 6, _optional_text),
+            ('notes', 7, _optional_text),
+        ], 9),
+        ('projects', 'project', Project, lambda: [
+            ('name', 1, _required_text),
+            ('description', 2, _optional_text),
+            ('project_type_id', 3, _name_lookup(ProjectType.objects.all(), required=False)),
+            ('customer_id', 4, _name_lookup(Customer.objects.all())),
+            ('status', 5, _choice(Project.STATUS_CHOICES)),
+            ('total_budget', 6, _decimal),
+            ('total_cost', 8, _decimal),
+            ('live_url', 11, _optional_text),
+            ('repository_url', 12, _optional_text),
+            ('start_date', 13, _date),
+            ('end_date', 14, _date),
+            ('deadline', 15, _date),
+        ], 17),
+        ('payments', 'payment', PaymentPart, lambda: [
+            ('project_id', 1, _name_lookup(Project.objects.all())),
+            ('amount', 2, _decimal),
+            ('payment_date', 3, _required_date),
+            ('payment_method', 4, _choice(PaymentPart.PAYMENT_METHOD_CHOICES)),
+            ('reference_number', 5, _optional_text),
+            ('notes', 6, _optional_text),
+        ], 8),
+    ]
+
+
+def _update_project_totals(project_ids):
+    """Recompute revenue, profit and loss for projects whose payments changed, and queue their rows"""
+    if not project_ids:
+        return
+    paid = dict(
+        PaymentPart.objects.filter(project_id__in=project_ids)
+        .values_list('project_id').annotate(total=Sum('amount'))
+    )
+    projects = list(Project.objects.filter(pk__in=project_ids))
+    for project in projects:
+        project.total_revenue = paid.get(project.pk) or Decimal('0.00')
+        project.profit = max(0, project.total_revenue - project.total_cost)
+        project.loss = max(0, project.total_cost - project.total_revenue)
+        project.updated_at = timezone.now()
+    Project.objects.bulk_update(projects, ['total_revenue', 'profit', 'loss', 'updated_at'], batch_size=500)
+    SheetSyncOutbox.objects.bulk_create([SheetSyncOutbox(entity='project', object_id=project.pk) for project in projects])
+
+
+def pull_from_sheets(sheets_service: GoogleSheetsService = None, only=None, dry_run: bool = False) -> dict:
+    """
+    Apply edits made in Google Sheets to the database.
+    
+    Each worksheet is read with one call and diffed against the database
+    by ID. Rows without an ID are created; changed rows are updated only
+    if the database has not changed since the row was last synced (its
+    Updated At column), otherwise they are reported as conflicts and the
+    database wins. All changes are applied in a single transaction with
+    bulk_create/bulk_update, together with the outbox entries through
+    which the sheets worker writes new IDs and Updated At values back.
+    
+    Returns a dict with created/updated/unchanged counts per worksheet and
+    a list of conflict messages.
+    """
+    sheets_service = sheets_service or GoogleSheetsService()
+    result = {'conflicts': []}
+    
+    with transaction.atomic():
+        for sheet, entity, model, build_fields, updated_at_column in _pull_specs():
+            if only and sheet not in only:
+                continue
+            fields = build_fields()
+            field_names = [name for name, column, parse in fields]
+            counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+            result[sheet] = counts
+            
+            rows = sheets_service.read_sheet(sheet)
+            ids = {_row_id(row) for row in rows}
+            existing = model.objects.in_bulk([row_id for row_id in ids if isinstance(row_id, int)])
+            now = timezone.now()
+            to_create, created_rows, to_update = [], [], []
+            # Projects whose payment totals change, including ones a payment moved away from
+            affected_project_ids = set()
+            
+            for row_number, row in enumerate(rows, start=2):
+                if not any(_text(value) for value in row):
+                    continue
+                row = list(row) + [''] * (updated_at_column + 1 - len(row))
+                try:
+                    values = {name: parse(row[column]) for name, column, parse in fields}
+                except ValueError as e:
+                    result['conflicts'].append(f'{sheet} row {row_number}: {e}')
+                    continue
+                
+                row_id = _row_id(row)
+                if row_id is None:
+                    to_create.append(model(**values, updated_at=now))
+                    created_rows.append(row_number)
+                    continue
+                
+                obj = existing.get(row_id)
+                if obj is None:
+                    result['conflicts'].append(f'{sheet} row {row_number}: ID {row_id} does not exist in the database')
+                    continue
+                
+                changed = [name for name in field_names if not _same(getattr(obj, name), values[name])]
+                if not changed:
+                    counts['unchanged'] += 1
+                    continue
+                # A blank Updated At means the row was never written back; the sheet wins
+                synced_at = _text(row[updated_at_column])
+                if synced_at and obj.updated_at.strftime(TIMESTAMP_FORMAT) > synced_at:
+                    result['conflicts'].append(
+                        f'{sheet} row {row_number}: ID {row_id} changed in the database since the last sync '
+                        f'({", ".join(changed)}); kept the database version'
+                    )
+                    continue
+                
+                if model is PaymentPart:
+                    affected_project_ids.add(obj.project_id)
+                for name in changed:
+                    setattr(obj, name, values[name])
+                obj.updated_at = now
+                to_update.append(obj)
+            
+            if model is Project:
+                # Revenue comes from payments, not from the sheet's Total Revenue column
+                paid = dict(
+                    PaymentPart.objects.filter(project_id__in=[project.pk for project in to_update])
+                    .values_list('project_id').annotate(total=Sum('amount'))
+                )
+                for project in to_create + to_update:
+                    project.total_revenue = paid.get(project.pk) or Decimal('0.00')
+                    project.profit = max(0, project.total_revenue - project.total_cost)
+                    project.loss = max(0, project.total_cost - project.total_revenue)
+                field_names += ['total_revenue', 'profit', 'loss']
+            
+            created = model.objects.bulk_create(to_create, batch_size=500)
+            model.objects.bulk_update(to_update, field_names + ['updated_at'], batch_size=500)
+            counts['created'], counts['updated'] = len(created), len(to_update)
+            
+            if model is PaymentPart:
+                _update_project_totals(
+                    affected_project_ids | {payment.project_id for payment in created + to_update}
+                )
+            
+            index_objects(entity, [obj.pk for obj in created + to_update])
+            
+            # Write the new IDs into their rows and refresh the Updated At column
+            SheetSyncOutbox.objects.bulk_create([
+                SheetSyncOutbox(entity=entity, object_id=obj.pk, sheet_row=row_number)
+                for row_number, obj in zip(created_rows, created)
+            ] + [
+                SheetSyncOutbox(entity=entity, object_id=obj.pk) for obj in to_update
+            ])
+        
+        # Bulk writes skip model signals, so refresh the summary and cached data here
+        rebuild_financial_summary()
+        rebuild_payment_rollups()
+        bump_versions('customers', 'projects', 'payments')
+        
+        if dry_run:
+            transaction.set_rollback(True)
+    
+    return result
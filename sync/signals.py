@@ -0,0 +1,63 @@
+"""
+Signal handlers that record model changes in the sync outbox and deletions in the tombstone log
+"""
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from projects.models import Project, ProjectType, ProjectImage, ProjectFile
+from customers.models import Customer
+from payments.models import PaymentPart
+from .models import SheetSyncOutbox, Tombstone
+from .outbox import enqueue
+
+
+SYNCED_MODELS = {
+    Project: 'project',
+    Customer: 'customer',
+    PaymentPart: 'payment',
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=PaymentPart)
+def enqueue_sheet_upsert(sender, instance, raw=False, **kwargs):
+    """Queue saved records for Google Sheets sync"""
+    if raw:
+        return
+    enqueue(SYNCED_MODELS[sender], instance.pk, 'upsert')
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=PaymentPart)
+def enqueue_sheet_delete(sender, instance, **kwargs):
+    """Queue deleted records (including cascades) for removal from Google Sheets"""
+    enqueue(SYNCED_MODELS[sender], instance.pk, 'delete')
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=PaymentPart)
+def record_tombstone(sender, instance, **kwargs):
+    """Log deleted records (including cascades) for API clients syncing changes"""
+    Tombstone.objects.create(entity=SYNCED_MODELS[sender], object_id=instance.pk)
+
+
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=ProjectFile)
+@receiver(post_delete, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectFile)
+def touch_project(sender, instance, raw=False, **kwargs):
+    """Mark a project changed when its images or files change, as its API records include them"""
+    if not raw:
+        Project.objects.filter(pk=instance.project_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=ProjectType)
+def touch_untyped_projects(sender, instance, **kwargs):
+    """Projects of a deleted type become untyped without a save, so mark them changed and queue them here"""
+    ids = list(Project.objects.filter(project_type=instance).values_list('pk', flat=True))
+    if ids:
+        Project.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+        SheetSyncOutbox.objects.bulk_create([SheetSyncOutbox(entity='project', object_id=pk) for pk in ids])
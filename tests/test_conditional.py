@@ -0,0 +1,143 @@
+"""
+Tests for ETag / Last-Modified conditional GET on the API
+"""
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from customers.models import Customer
+from projects.models import Project, ProjectImage
+from payments.models import PaymentPart
+
+
+class ConditionalGetTest(TestCase):
+    """Test that unchanged API responses are answered with 304 Not Modified"""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Acme")
+        self.project = Project.objects.create(name="Website", customer=self.customer, total_budget=1000)
+    
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+    
+    def test_detail_not_modified_without_serializing(self):
+        """Test that a current ETag gets 304 from a single small query"""
+        url = reverse('project-detail', args=[self.project.pk])
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        
+        # Session and user lookups, then the validators
+        with self.assertNumQueries(3):
+            response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        
+        response = self.get(url, if_modified_since=self.get(url)['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_detail_changes_with_related_records(self):
+        """Test that the ETag changes with the project's customer, images and payments"""
+        url = reverse('project-detail', args=[self.project.pk])
+        etags = [self.get(url)['ETag']]
+        
+        self.customer.name = "Acme Industries"
+        self.customer.save()
+        etags.append(self.get(url)['ETag'])
+        
+        ProjectImage.objects.create(project=self.project, image='projects/images/1.jpg')
+        etags.append(self.get(url)['ETag'])
+        
+        self.client.post(reverse('payment-list'), {
+            'project': self.project.pk, 'amount': '100.00', 'payment_date': '2024-01-15',
+        })
+        response = self.get(url, if_none_match=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(set(etags + [response['ETag']])), 4)
+    
+    def test_detail_changes_with_zero_amount_payments(self):
+        """Test that adding or removing a 0.00 payment changes the project's ETag"""
+        url = reverse('project-detail', args=[self.project.pk])
+        etag = self.get(url)['ETag']
+        
+        response = self.client.post(reverse('payment-list'), {
+            'project': self.project.pk, 'amount': '0.00', 'payment_date': '2024-01-15',
+        })
+        self.assertEqual(response.status_code, 201)
+        payment_id = response.json()['id']
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_count'], 1)
+        etag = response['ETag']
+        
+        self.assertEqual(self.client.delete(reverse('payment-detail', args=[payment_id])).status_code, 204)
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_count'], 0)
+    
+    def test_detail_changes_with_payments_written_outside_the_api(self):
+        """Test that payments created, moved and deleted through the ORM change the project's ETag"""
+        other = Project.objects.create(name="Mobile App", customer=self.customer)
+        urls = [reverse('project-detail', args=[project.pk]) for project in (self.project, other)]
+        etags = [self.get(url)['ETag'] for url in urls]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = PaymentPart.objects.create(project=self.project, amount=100, payment_date=date(2024, 1, 15))
+        response = self.get(urls[0], if_none_match=etags[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_count'], 1)
+        etags[0] = response['ETag']
+        
+        payment.project = other
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.save()
+        for i, url in enumerate(urls):
+            response = self.get(url, if_none_match=etags[i])
+            self.assertEqual(response.status_code, 200)
+            etags[i] = response['ETag']
+        self.assertEqual(response.json()['payment_count'], 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        response = self.get(urls[1], if_none_match=etags[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_count'], 0)
+    
+    def test_list_not_modified_until_collection_changes(self):
+        """Test that list ETags follow the collection versions"""
+        url = reverse('payment-list')
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentPart.objects.create(project=self.project, amount=100, payment_date=date(2024, 1, 15))
+        response = self.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+        self.assertEqual(self.get(url + '?project=0', if_none_match=etag).status_code, 200)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentPart.objects.create(project=self.project, amount=50, payment_date=date(2024, 2, 15))
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+    
+    def test_dashboard_not_modified(self):
+        """Test that polling the dashboard API costs no queries while nothing changes"""
+        url = reverse('dashboard-list')
+        etag = self.get(url)['ETag']
+        
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+    
+    def test_missing_record(self):
+        """Test that unknown records still get 404"""
+        response = self.get(reverse('project-detail', args=[999]), if_none_match='W/"abc"')
+        self.assertEqual(response.status_code, 404)
@@ -1,10 +1,17 @@
 """
 Tests for Customers app
 """
+import json
+from datetime import date
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from customers.models import Customer
+from projects.models import Project
+from payments.models import PaymentPart
+from search.index import matching
+from sync.models import SheetSyncOutbox, Tombstone
+from dashboard.summary import check_financial_summary
 
 
 class CustomerModelTest(TestCase):
@@ -72,3 +79,95 @@ class CustomerViewTest(TestCase):
         self.assertEqual(response.status_code, 302)  # Redirect after creation
         self.assertTrue(Customer.objects.filter(name='Jane Doe').exists())
 
+
+
+class CustomerStatsTest(TestCase):
+    """Test annotated customer statistics"""
+    
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.force_login(self.user)
+        for i in range(3):
+            customer = Customer.objects.create(name=f"Customer {i}")
+            for j in range(i):
+                project = Project.objects.create(
+                    name=f"Project {i}-{j}", customer=customer, total_budget=1000, is_active=j == 0
+                )
+                PaymentPart.objects.create(project=project, amount=100, payment_date=date(2024, 1, 15))
+    
+    def test_with_stats(self):
+        """Test that counts and totals are annotated without duplicating rows"""
+        customer = Customer.objects.with_stats().get(name="Customer 2")
+        
+        self.assertEqual(customer.projects_count, 2)
+        self.assertEqual(customer.active_projects_count, 1)
+        self.assertEqual(float(customer.total_projects_value), 2000.00)
+        self.assertEqual(float(customer.total_paid), 200.00)
+    
+    def test_list_pages_use_fixed_queries(self):
+        """Test that the HTML list, API and admin do not query per customer"""
+        # Session and user lookups, then the page query
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('customers:list'))
+        self.assertContains(response, "2 project(s)")
+        
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('customer-list'))
+        counts = {result['name']: result['projects_count'] for result in response.json()['results']}
+        self.assertEqual(counts, {"Customer 0": 0, "Customer 1": 1, "Customer 2": 2})
+        
+        response = self.client.get(reverse('admin:customers_customer_changelist'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_api_detail_includes_stats(self):
+        """Test customer detail statistics"""
+        customer = Customer.objects.get(name="Customer 1")
+        
+        response = self.client.get(reverse('customer-detail', args=[customer.pk]))
+        
+        self.assertEqual(float(response.json()['total_paid']), 100.00)
+        self.assertEqual(response.json()['active_projects_count'], 1)
+
+
+class CustomerBulkApiTest(TestCase):
+    """Test bulk customer writes through the API"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def test_bulk_create_update_and_delete(self):
+        """Test that one request writes many customers and refreshes the search documents that show their names"""
+        response = self.client.post(reverse('customer-bulk'), json.dumps([
+            {'name': 'Acme', 'email': 'info@acme.test'},
+            {'name': 'Globex', 'email': 'not an email'},
+            {'name': 'Initech'},
+        ]), content_type='application/json')
+        
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 201])
+        self.assertIn('email', results[1]['errors'])
+        acme = Customer.objects.get(pk=results[0]['id'])
+        project = Project.objects.create(name="Website", customer=acme)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('customer-bulk'), json.dumps([
+                {'id': acme.pk, 'name': 'Acme Industries'},
+            ]), content_type='application/json')
+        
+        self.assertEqual(response.json()['results'], [{'id': acme.pk, 'status': 200}])
+        self.assertEqual(list(matching('project', 'industries').values_list('object_id', flat=True)), [project.pk])
+        self.assertEqual(SheetSyncOutbox.objects.filter(entity='customer', object_id=acme.pk).count(), 2)
+        
+        initech = Customer.objects.get(pk=results[2]['id'])
+        intranet = Project.objects.create(name="Intranet", customer=initech, total_budget=500)
+        payment = PaymentPart.objects.create(project=intranet, amount=200, payment_date=date(2024, 1, 15))
+        response = self.client.delete(reverse('customer-bulk'), json.dumps([initech.pk]), content_type='application/json')
+        self.assertEqual(response.json()['results'], [{'id': initech.pk, 'status': 204}])
+        self.assertEqual(list(Customer.objects.all()), [acme])
+        self.assertEqual(list(Project.objects.all()), [project])
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(
+            set(Tombstone.objects.values_list('entity', 'object_id')),
+            {('customer', initech.pk), ('project', intranet.pk), ('payment', payment.pk)},
+        )
@@ -0,0 +1,163 @@
+"""
+Tests for Dashboard app
+"""
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.urls import reverse
+from projects.models import Project, ProjectType
+from customers.models import Customer
+from payments.models import PaymentPart
+from dashboard.models import FinancialSummary
+from dashboard.stats import dashboard_stats
+from dashboard.summary import check_financial_summary, get_summary
+from dashboard.views import dashboard_context
+
+
+class DashboardStatsTest(TestCase):
+    """Test dashboard statistics"""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.customer = Customer.objects.create(name="Test Customer")
+        Customer.objects.create(name="Inactive Customer", is_active=False)
+        self.project = Project.objects.create(
+            name="Test Project", customer=self.customer,
+            total_budget=1000, total_cost=400, status='in_progress'
+        )
+        Project.objects.create(name="Old Project", customer=self.customer, is_active=False, total_cost=100)
+        PaymentPart.objects.create(project=self.project, amount=600, payment_date=date(2024, 1, 15))
+    
+    def test_stats_use_two_queries(self):
+        """Test that statistics come from the financial summary and one customer aggregate"""
+        with self.assertNumQueries(2):
+            stats = dashboard_stats()
+        
+        self.assertEqual(stats['total_projects'], 2)
+        self.assertEqual(stats['active_projects'], 1)
+        self.assertEqual(stats['total_customers'], 2)
+        self.assertEqual(stats['active_customers'], 1)
+        self.assertEqual(float(stats['total_budget']), 1000.00)
+        self.assertEqual(float(stats['total_cost']), 500.00)
+        self.assertEqual(float(stats['total_paid']), 600.00)
+        self.assertEqual(stats['projects_by_status'], [
+            {'status': 'in_progress', 'count': 1},
+            {'status': 'planning', 'count': 1},
+        ])
+    
+    def test_empty_totals_are_zero(self):
+        """Test that totals are 0 without any rows"""
+        PaymentPart.objects.all().delete()
+        self.assertEqual(dashboard_stats()['total_paid'], 0)
+    
+    def test_stats_api(self):
+        """Test the dashboard statistics endpoint"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.force_login(user)
+        
+        response = client.get(reverse('dashboard-list'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_projects'], 2)
+    
+    def test_dashboard_page(self):
+        """Test that the dashboard renders"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.force_login(user)
+        
+        response = client.get(reverse('dashboard:home'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_projects'], 2)
+
+
+class DashboardCacheTest(TestCase):
+    """Test the cached dashboard context"""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.project = Project.objects.create(name="Test Project", customer=self.customer)
+    
+    def test_repeated_loads_skip_the_database(self):
+        """Test that a cached dashboard needs no queries"""
+        dashboard_context()
+        with self.assertNumQueries(0):
+            context = dashboard_context()
+        self.assertEqual(context['total_projects'], 1)
+        self.assertEqual(context['recent_projects'], [self.project])
+    
+    def test_saves_invalidate_the_cache(self):
+        """Test that saving a payment refreshes the dashboard"""
+        dashboard_context()
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentPart.objects.create(project=self.project, amount=250, payment_date=date(2024, 1, 15))
+        
+        self.assertEqual(float(dashboard_context()['total_paid']), 250.00)
+    
+    def test_deletes_invalidate_the_cache(self):
+        """Test that deleting a project refreshes the dashboard"""
+        dashboard_context()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        
+        self.assertEqual(dashboard_context()['total_projects'], 0)
+
+
+class FinancialSummaryTest(TestCase):
+    """Test the incrementally maintained financial summary"""
+    
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.other_customer = Customer.objects.create(name="Other Customer")
+        self.project_type = ProjectType.objects.create(name="Web Development")
+        self.project = Project.objects.create(
+            name="Test Project", customer=self.customer, project_type=self.project_type,
+            total_budget=1000, total_cost=400
+        )
+        self.payment = PaymentPart.objects.create(
+            project=self.project, amount=300, payment_date=date(2024, 1, 15)
+        )
+    
+    def test_writes_keep_summary_consistent(self):
+        """Test that creates, updates, moves and deletes are applied by delta"""
+        self.project.status = 'completed'
+        self.project.customer = self.other_customer
+        self.project.total_cost = 500
+        self.project.save()
+        self.payment.amount = 450
+        self.payment.save()
+        other_project = Project.objects.create(name="Other Project", customer=self.customer, total_budget=200)
+        self.payment.project = other_project
+        self.payment.save()
+        PaymentPart.objects.create(project=self.project, amount=50, payment_date=date(2024, 2, 1))
+        
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(float(get_summary().total_paid), 500.00)
+        self.assertEqual(float(get_summary('customer', self.other_customer.id).total_paid), 50.00)
+        self.assertEqual(get_summary('status', 'completed').project_count, 1)
+        
+        self.project_type.delete()
+        self.customer.delete()
+        
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(get_summary().project_count, 1)
+        self.assertEqual(get_summary('project_type', None).project_count, 1)
+    
+    def test_check_and_rebuild_commands(self):
+        """Test that drift is reported and fixed by a rebuild"""
+        FinancialSummary.objects.filter(scope='global').update(total_paid=0)
+        
+        with self.assertRaises(CommandError):
+            call_command('check_financial_summary', stdout=mock.MagicMock())
+        call_command('rebuild_financial_summary', stdout=mock.MagicMock())
+        
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(float(get_summary().total_paid), 300.00)
@@ -0,0 +1,254 @@
+"""
+Tests for Google Sheets service
+"""
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from services.google_sheets import GoogleSheetsService
+from services.sheets_backends import MemoryBackend
+
+
+class GoogleSheetsBatchWriteTest(SimpleTestCase):
+    """Test batched row writes"""
+    
+    def setUp(self):
+        GoogleSheetsService.clear_cache()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.worksheet = mock.MagicMock()
+        self.worksheet.row_count = 1
+        self.worksheet.url = 'https://sheets.example.com/projects'
+    
+    @override_settings(GOOGLE_SHEETS_BATCH_ROWS=100)
+    def test_sync_projects_writes_in_batches(self):
+        """Test that 250 projects are written with 3 range updates"""
+        service = GoogleSheetsService()
+        projects_data = [{'id': i, 'name': f'Project {i}'} for i in range(1, 251)]
+        
+        with mock.patch.object(service, '_get_or_create_worksheet', return_value=self.worksheet):
+            url = service.sync_projects(projects_data)
+        
+        self.assertEqual(url, self.worksheet.url)
+        self.worksheet.append_row.assert_not_called()
+        self.worksheet.resize.assert_called_once_with(rows=251)
+        self.assertEqual(self.worksheet.update.call_count, 3)
+        ranges = [call.args[1] for call in self.worksheet.update.call_args_list]
+        self.assertEqual(ranges, ['A2:R101', 'A102:R201', 'A202:R251'])
+        first_chunk = self.worksheet.update.call_args_list[0].args[0]
+        self.assertEqual(len(first_chunk), 100)
+        self.assertEqual(first_chunk[0][:2], [1, 'Project 1'])
+    
+    def test_sync_payments_empty_clears_rows(self):
+        """Test that syncing no payments only clears the data rows"""
+        service = GoogleSheetsService()
+        
+        with mock.patch.object(service, '_get_or_create_worksheet', return_value=self.worksheet):
+            service.sync_payments([])
+        
+        self.worksheet.resize.assert_called_once_with(rows=1)
+        self.worksheet.update.assert_not_called()
+
+
+class GoogleSheetsUpsertTest(SimpleTestCase):
+    """Test incremental upsert sync"""
+    
+    def setUp(self):
+        GoogleSheetsService.clear_cache()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.worksheet = mock.MagicMock()
+        self.worksheet.title = 'Projects'
+        self.worksheet.id = 0
+        self.worksheet.row_count = 4
+        self.worksheet.col_values.return_value = ['ID', '1', '2', '3']
+        self.service = GoogleSheetsService()
+        patcher = mock.patch.object(self.service, '_get_or_create_worksheet', return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_upsert_existing_project_updates_single_row(self):
+        """Test that an edited project costs one range write"""
+        self.service.upsert_projects([{'id': 2, 'name': 'Edited'}])
+        
+        self.worksheet.resize.assert_not_called()
+        self.worksheet.batch_update.assert_called_once()
+        data = self.worksheet.batch_update.call_args.args[0]
+        self.assertEqual([item['range'] for item in data], ['A3:R3'])
+        self.assertEqual(data[0]['values'][0][:2], [2, 'Edited'])
+    
+    def test_upsert_new_project_appends_row(self):
+        """Test that a new project is appended after the table with one call"""
+        self.worksheet.append_rows.return_value = {'updates': {'updatedRange': "'Projects'!A5:R5"}}
+        self.service.upsert_projects([{'id': 4, 'name': 'New'}])
+        self.service.upsert_projects([{'id': 4, 'name': 'Renamed'}])
+        
+        values = self.worksheet.append_rows.call_args.args[0]
+        self.assertEqual([row[:2] for row in values], [[4, 'New']])
+        self.assertEqual(self.worksheet.append_rows.call_args.kwargs['table_range'], 'A1')
+        data = self.worksheet.batch_update.call_args.args[0]
+        self.assertEqual([item['range'] for item in data], ['A5:R5'])
+    
+    def test_upsert_unchanged_project_is_skipped(self):
+        """Test that re-syncing identical data makes no write and reads the index once"""
+        self.service.upsert_projects([{'id': 2, 'name': 'Edited'}])
+        self.service.upsert_projects([{'id': 2, 'name': 'Edited'}])
+        
+        self.worksheet.col_values.assert_called_once_with(1)
+        self.assertEqual(self.worksheet.batch_update.call_count, 1)
+    
+    def test_upsert_deleted_project_removes_row(self):
+        """Test that deleted projects are removed and later rows shift up"""
+        self.service.upsert_projects([{'id': 3, 'name': 'Moved'}], deleted_ids=[1])
+        
+        body = self.worksheet.spreadsheet.batch_update.call_args.args[0]
+        delete_range = body['requests'][0]['deleteDimension']['range']
+        self.assertEqual((delete_range['startIndex'], delete_range['endIndex']), (1, 2))
+        data = self.worksheet.batch_update.call_args.args[0]
+        self.assertEqual([item['range'] for item in data], ['A3:R3'])
+
+
+class GoogleSheetsHandleCacheTest(SimpleTestCase):
+    """Test the process-wide client and spreadsheet cache"""
+    
+    def setUp(self):
+        GoogleSheetsService.clear_cache()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.credentials = mock.MagicMock(access_token_expired=False)
+        self.client = mock.MagicMock()
+        worksheet = self.client.open.return_value.worksheet.return_value
+        worksheet.title = 'Customers'
+        worksheet.row_count = 1000
+        worksheet.col_values.return_value = ['ID']
+        worksheet.append_rows.return_value = {'updates': {'updatedRange': "'Customers'!A2:J2"}}
+        patchers = [
+            mock.patch('services.sheets_backends.os.path.exists', return_value=True),
+            mock.patch(
+                'services.sheets_backends.ServiceAccountCredentials.from_json_keyfile_name',
+                return_value=self.credentials,
+            ),
+            mock.patch('services.sheets_backends.gspread.authorize', return_value=self.client),
+        ]
+        self.mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+    
+    def test_instances_share_client_and_worksheets(self):
+        """Test that steady-state syncs skip auth and lookups"""
+        for _ in range(3):
+            GoogleSheetsService().upsert_customers([{'id': 1, 'name': 'Customer'}])
+        
+        self.assertEqual(self.mocks[1].call_count, 1)
+        self.client.open.assert_called_once()
+        self.client.open.return_value.worksheet.assert_called_once_with('Customers')
+    
+    def test_expired_token_is_refreshed(self):
+        """Test that an expired token is refreshed without re-authorizing"""
+        GoogleSheetsService().get_spreadsheet_url()
+        self.credentials.access_token_expired = True
+        GoogleSheetsService().get_spreadsheet_url()
+        
+        self.credentials.refresh.assert_called_once()
+        self.assertEqual(self.mocks[2].call_count, 1)
+    
+    @override_settings(GOOGLE_SHEETS_CACHE_TTL=60)
+    def test_cache_expires_after_ttl(self):
+        """Test that handles are reloaded once the TTL has passed"""
+        GoogleSheetsService().get_spreadsheet_url()
+        with mock.patch('services.google_sheets.time.monotonic', return_value=time.monotonic() + 61):
+            GoogleSheetsService().get_spreadsheet_url()
+        
+        self.assertEqual(self.mocks[2].call_count, 2)
+        self.assertEqual(self.client.open.call_count, 2)
+
+
+class GoogleSheetsExportTest(SimpleTestCase):
+    """Test streaming exports"""
+    
+    def setUp(self):
+        GoogleSheetsService.clear_cache()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.worksheet = mock.MagicMock()
+        self.worksheet.title = 'Payments'
+        self.worksheet.row_count = 6
+        self.service = GoogleSheetsService()
+        patcher = mock.patch.object(self.service, '_get_or_create_worksheet', return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @override_settings(GOOGLE_SHEETS_BATCH_ROWS=2)
+    def test_export_rows_streams_batches(self):
+        """Test that a generator is written batch by batch with progress"""
+        service = GoogleSheetsService()
+        progress = mock.MagicMock()
+        payments_data = ({'id': i, 'amount': i * 10} for i in range(1, 6))
+        
+        with mock.patch.object(service, '_get_or_create_worksheet', return_value=self.worksheet):
+            written = service.export_rows('payments', payments_data, 5, progress=progress)
+        
+        self.assertEqual(written, 5)
+        self.worksheet.resize.assert_called_once_with(rows=6)
+        ranges = [call.args[1] for call in self.worksheet.update.call_args_list]
+        self.assertEqual(ranges, ['A2:I3', 'A4:I5', 'A6:I6'])
+        self.assertEqual([call.args[0] for call in progress.call_args_list], [2, 4, 5])
+    
+    def test_export_position_resumes_after_last_id(self):
+        """Test that the resume position follows the last exported row"""
+        self.worksheet.col_values.return_value = ['ID', '3', '7', '9']
+        
+        self.assertEqual(self.service.export_position('payments'), (9, 5))
+
+
+@override_settings(GOOGLE_SHEETS_BACKEND='services.sheets_backends.MemoryBackend', GOOGLE_SHEETS_BATCH_ROWS=100)
+class MemoryBackendTest(SimpleTestCase):
+    """Test syncing against the in-memory backend"""
+    
+    def setUp(self):
+        GoogleSheetsService.clear_cache()
+        MemoryBackend.store.reset()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.addCleanup(MemoryBackend.store.reset)
+        self.stats = MemoryBackend.store.stats
+    
+    def test_sync_then_upsert_round_trip(self):
+        """Test that written rows can be read back and API calls are counted"""
+        service = GoogleSheetsService()
+        service.sync_customers([{'id': i, 'name': f'Customer {i}'} for i in range(1, 251)])
+        self.assertEqual(self.stats.calls['update'], 3)
+        self.assertEqual(self.stats.rows_written, 251)
+        
+        self.stats.reset()
+        GoogleSheetsService().upsert_customers(
+            [{'id': 2, 'name': 'Renamed'}, {'id': 251, 'name': 'New'}], deleted_ids=[1]
+        )
+        
+        self.assertEqual(self.stats.calls['batch_update'], 1)
+        self.assertEqual(self.stats.calls['spreadsheet_batch_update'], 1)
+        self.assertEqual(self.stats.rows_written, 2)
+        rows = GoogleSheetsService().read_sheet('customers')
+        self.assertEqual(len(rows), 250)
+        self.assertEqual(rows[0][:2], [2, 'Renamed'])
+        self.assertEqual(rows[-1][:2], [251, 'New'])
+    
+    def test_upsert_keeps_rows_without_id(self):
+        """Test that rows typed into the sheet without an ID are not overwritten by new records"""
+        service = GoogleSheetsService()
+        service.upsert_customers([{'id': 1, 'name': 'Customer 1'}, {'id': 2, 'name': 'Customer 2'}])
+        worksheet = MemoryBackend.store.spreadsheets[service.spreadsheet_name].worksheets['Customers']
+        worksheet.append_row(['', 'Typed In Sheet'])
+        
+        GoogleSheetsService().upsert_customers([{'id': 3, 'name': 'Customer 3'}, {'id': 1, 'name': 'Renamed'}])
+        GoogleSheetsService().upsert_customers([{'id': 3, 'name': 'Customer 3 Renamed'}])
+        
+        rows = GoogleSheetsService().read_sheet('customers')
+        self.assertEqual([row[:2] for row in rows], [
+            [1, 'Renamed'], [2, 'Customer 2'], ['', 'Typed In Sheet'], [3, 'Customer 3 Renamed'],
+        ])
+        self.assertEqual(self.stats.calls['append_rows'], 2)
+    
+    def test_data_survives_cache_clear(self):
+        """Test that the store outlives the handle cache"""
+        GoogleSheetsService().upsert_payments([{'id': 7, 'amount': 10.5}])
+        GoogleSheetsService.clear_cache()
+        
+        rows = GoogleSheetsService().read_sheet('payments')
+        
+        self.assertEqual(rows[0][:3], [7, '', 10.5])
+        self.assertGreater(self.stats.payload_bytes, 0)
@@ -0,0 +1,80 @@
+"""
+Tests that the list, dashboard, payment and sync queries use the model indexes
+"""
+import unittest
+from datetime import date, timedelta
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+from customers.models import Customer
+from projects.models import Project
+from payments.models import PaymentPart
+from sync.models import Tombstone
+
+
+def index_name(model, fields):
+    """Get the name of the model index on these fields"""
+    return next(index.name for index in model._meta.indexes if index.fields == fields)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTest(TestCase):
+    """Test EXPLAIN output of the key queries"""
+    
+    def assertUsesIndex(self, queryset, name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {name}', plan)
+        # The index also provides the ordering, so no separate sort step runs
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_upcoming_deadlines(self):
+        """Test that active projects by deadline use the partial index"""
+        today = date.today()
+        queryset = Project.objects.filter(
+            deadline__gte=today, deadline__lte=today + timedelta(days=30), is_active=True
+        ).order_by('deadline')[:10]
+        self.assertUsesIndex(queryset, 'project_active_deadline_idx')
+    
+    def test_project_list_pages(self):
+        """Test the project list ordering, unfiltered and by status"""
+        self.assertUsesIndex(
+            Project.objects.order_by('-created_at', '-id')[:21],
+            index_name(Project, ['-created_at', '-id']),
+        )
+        self.assertUsesIndex(
+            Project.objects.filter(status='on_hold').order_by('-created_at', '-id')[:21],
+            index_name(Project, ['status', '-created_at', '-id']),
+        )
+    
+    def test_customer_list_page(self):
+        """Test the customer list ordering"""
+        self.assertUsesIndex(
+            Customer.objects.order_by('-created_at', '-id')[:21],
+            index_name(Customer, ['-created_at', '-id']),
+        )
+    
+    def test_payments_by_project(self):
+        """Test a project's payments by date and the payment list ordering"""
+        self.assertUsesIndex(
+            PaymentPart.objects.filter(project_id=1).order_by('-payment_date', '-created_at', '-id')[:21],
+            index_name(PaymentPart, ['project', '-payment_date', '-created_at', '-id']),
+        )
+        self.assertUsesIndex(
+            PaymentPart.objects.order_by('-payment_date', '-created_at', '-id')[:21],
+            index_name(PaymentPart, ['-payment_date', '-created_at', '-id']),
+        )
+    
+    def test_changes_since(self):
+        """Test that delta sync reads changed rows and tombstones in index order"""
+        since = timezone.now()
+        for model in (Project, Customer, PaymentPart):
+            changed = Q(updated_at__gt=since) | Q(updated_at=since, id__gt=1)
+            self.assertUsesIndex(
+                model.objects.filter(changed).order_by('updated_at', 'id')[:501],
+                index_name(model, ['updated_at', 'id']),
+            )
+        self.assertUsesIndex(
+            Tombstone.objects.filter(deleted_at__gt=since).order_by('deleted_at', 'id')[:501],
+            index_name(Tombstone, ['deleted_at', 'id']),
+        )
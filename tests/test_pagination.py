@@ -0,0 +1,96 @@
+"""
+Tests for keyset pagination
+"""
+import base64
+import json
+from datetime import date
+from urllib.parse import parse_qs, urlparse
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.urls import reverse
+from customers.models import Customer
+from projects.models import Project
+from payments.models import PaymentPart
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pages of the HTML lists and the API"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        customer = Customer.objects.create(name="Customer", whatsapp_number="+1234567890")
+        self.project = Project.objects.create(name="Project", customer=customer, total_budget=1000)
+        # Several payments share a date, so pages must break ties on created_at and id
+        for i in range(45):
+            PaymentPart.objects.create(
+                project=self.project, amount=i + 1, payment_date=date(2024, 1, 1 + i // 10)
+            )
+        self.expected = list(PaymentPart.objects.values_list('id', flat=True))
+    
+    def walk(self, url, cursor_of):
+        """Follow next cursors from the first page, returning (ids, pages)"""
+        ids, pages, params = [], [], {}
+        while True:
+            response = self.client.get(url, params)
+            pages.append(response)
+            page = cursor_of(response)
+            ids += page['ids']
+            if not page['next']:
+                return ids, pages
+            params = {'cursor': page['next']}
+    
+    def test_html_pages_cover_every_row_once(self):
+        """Test walking forward and back through the payment list"""
+        def html_page(response):
+            page_obj = response.context['page_obj']
+            return {'ids': [payment.id for payment in page_obj], 'next': page_obj.next_cursor}
+        
+        ids, pages = self.walk(reverse('payments:list'), html_page)
+        
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(pages), 3)
+        last = pages[-1].context['page_obj']
+        response = self.client.get(reverse('payments:list'), {'cursor': last.previous_cursor})
+        self.assertEqual([payment.id for payment in response.context['page_obj']], self.expected[20:40])
+        self.assertTrue(response.context['page_obj'].has_previous())
+    
+    def test_api_pages_cover_every_row_once(self):
+        """Test the API next links and that deep pages use the same queries as the first"""
+        def api_page(response):
+            body = response.json()
+            cursor = parse_qs(urlparse(body['next']).query)['cursor'][0] if body['next'] else None
+            return {'ids': [payment['id'] for payment in body['results']], 'next': cursor}
+        
+        ids, pages = self.walk(reverse('payment-list'), api_page)
+        
+        self.assertEqual(ids, self.expected)
+        self.assertNotIn('count', pages[0].json())
+        self.assertIsNone(pages[0].json()['previous'])
+        with self.assertNumQueries(3):
+            self.client.get(reverse('payment-list'), {'cursor': api_page(pages[1])['next']})
+    
+    def test_count_on_request(self):
+        """Test that ?count=1 adds a row count"""
+        response = self.client.get(reverse('payment-list'), {'count': 1})
+        self.assertEqual(response.json()['count'], 45)
+        self.assertTrue(response.json()['count_exact'])
+        
+        response = self.client.get(reverse('payments:list'), {'count': 1})
+        self.assertContains(response, "45 results")
+    
+    def test_invalid_cursor(self):
+        """Test that bad cursors show the first HTML page and 404 in the API"""
+        response = self.client.get(reverse('payments:list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual([payment.id for payment in response.context['page_obj']], self.expected[:20])
+        
+        response = self.client.get(reverse('payment-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+        
+        # Well-formed cursors holding values of the wrong type
+        for values in (['notadate', '2024-01-01T00:00:00+00:00', 1], ['2024-01-01', '2024-01-01T00:00:00+00:00', 'x']):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values, 'b': 0}).encode()).decode()
+            response = self.client.get(reverse('payments:list'), {'cursor': cursor})
+            self.assertEqual([payment.id for payment in response.context['page_obj']], self.expected[:20])
+            self.assertEqual(self.client.get(reverse('payment-list'), {'cursor': cursor}).status_code, 404)
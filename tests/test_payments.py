@@ -1,10 +1,21 @@
 """
 Tests for Payments app
 """
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
-from payments.models import PaymentPart
+from payments.models import PaymentPart, PaymentRollup
+from payments.rollups import rebuild_payment_rollups
+from dashboard.summary import check_financial_summary
+from search.index import matching
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from projects.models import Project
 from customers.models import Customer
 
@@ -83,3 +94,212 @@ class PaymentViewTest(TestCase):
         self.assertEqual(response.status_code, 302)  # Redirect after creation
         self.assertTrue(PaymentPart.objects.filter(project=self.project, amount=1500.00).exists())
 
+
+class PaymentLedgerTest(TestCase):
+    """Test that payment writes move project revenue, profit and loss by delta"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Test Customer", email="test@example.com")
+        self.project = Project.objects.create(
+            name="Test Project", customer=self.customer, total_budget=10000.00, total_cost=3000.00
+        )
+        self.other = Project.objects.create(name="Other Project", customer=self.customer, total_cost=500.00)
+    
+    def assertProject(self, project, revenue, profit, loss):
+        project.refresh_from_db()
+        self.assertEqual(
+            (float(project.total_revenue), float(project.profit), float(project.loss)), (revenue, profit, loss)
+        )
+    
+    def test_view_writes(self):
+        """Test create, update and delete through the web views with one project UPDATE each"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('payments:create'), {
+                'project': self.project.pk, 'amount': 2000.00, 'payment_date': '2024-01-20',
+                'payment_method': 'cash',
+            })
+        project_updates = [q for q in queries if q['sql'].startswith('UPDATE "projects_project"')]
+        self.assertEqual(len(project_updates), 1)
+        self.assertProject(self.project, 2000.00, 0.00, 1000.00)
+        
+        payment = PaymentPart.objects.get()
+        self.client.post(reverse('payments:update', kwargs={'pk': payment.pk}), {
+            'project': self.project.pk, 'amount': 3500.00, 'payment_date': '2024-01-20',
+            'payment_method': 'cash',
+        })
+        self.assertProject(self.project, 3500.00, 500.00, 0.00)
+        
+        self.client.post(reverse('payments:delete', kwargs={'pk': payment.pk}))
+        self.assertProject(self.project, 0.00, 0.00, 3000.00)
+        self.assertEqual(check_financial_summary(), [])
+    
+    def test_api_writes(self):
+        """Test that API updates and deletes also adjust revenue, including moves between projects"""
+        response = self.client.post(reverse('payment-list'), {
+            'project': self.project.pk, 'amount': '1000.00', 'payment_date': '2024-01-20',
+            'payment_method': 'cash',
+        })
+        payment_id = response.json()['id']
+        
+        self.client.patch(
+            reverse('payment-detail', kwargs={'pk': payment_id}),
+            {'project': self.other.pk, 'amount': '800.00'}, content_type='application/json',
+        )
+        self.assertProject(self.project, 0.00, 0.00, 3000.00)
+        self.assertProject(self.other, 800.00, 300.00, 0.00)
+        
+        self.client.delete(reverse('payment-detail', kwargs={'pk': payment_id}))
+        self.assertProject(self.other, 0.00, 0.00, 500.00)
+        self.assertEqual(check_financial_summary(), [])
+
+
+class PaymentRollupTest(TestCase):
+    """Test daily and monthly payment rollups"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.other_customer = Customer.objects.create(name="Other Customer")
+        self.project = Project.objects.create(name="Test Project", customer=self.customer)
+        self.payment = PaymentPart.objects.create(
+            project=self.project, amount=1000.00, payment_date=date(2024, 1, 15), payment_method='cash'
+        )
+        PaymentPart.objects.create(
+            project=self.project, amount=500.00, payment_date=date(2024, 1, 20), payment_method='cash'
+        )
+        PaymentPart.objects.create(
+            project=self.project, amount=250.00, payment_date=date(2024, 3, 1), payment_method='check'
+        )
+    
+    def rollups(self):
+        return set(PaymentRollup.objects.values_list(
+            'period', 'period_start', 'project_id', 'customer_id', 'payment_method', 'total_amount', 'payment_count'
+        ))
+    
+    def test_writes_match_rebuild(self):
+        """Test that incremental updates give the same rows as a rebuild"""
+        self.payment.amount = 1200.00
+        self.payment.save()
+        moved = PaymentPart.objects.get(amount=500)
+        moved.payment_date = date(2024, 2, 10)
+        moved.save()
+        PaymentPart.objects.get(amount=250).delete()
+        self.project.customer = self.other_customer
+        self.project.save()
+        
+        incremental = self.rollups()
+        rebuild_payment_rollups()
+        
+        self.assertEqual(incremental, self.rollups())
+        self.assertEqual(PaymentRollup.objects.filter(period='month').count(), 2)
+    
+    def test_rollup_api(self):
+        """Test monthly totals served from the rollup table"""
+        self.client.force_login(self.user)
+        
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('payment-rollup'), {'period': 'month', 'start': '2024-01-01'})
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['period_start'] for row in results], ['2024-01-01', '2024-03-01'])
+        self.assertEqual(float(results[0]['total_amount']), 1500.00)
+        self.assertEqual(results[0]['payment_count'], 2)
+    
+    def test_rollup_api_groups_by_payment_method(self):
+        """Test grouping and invalid parameters"""
+        self.client.force_login(self.user)
+        
+        response = self.client.get(reverse('payment-rollup'), {'group_by': 'payment_method', 'period': 'day'})
+        self.assertEqual(len(response.json()['results']), 3)
+        response = self.client.get(reverse('payment-rollup'), {'period': 'week'})
+        self.assertEqual(response.status_code, 400)
+        for params in ({'project': 'abc'}, {'customer': 'abc'}, {'project': '-1'}):
+            response = self.client.get(reverse('payment-rollup'), params)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('payment-rollup'), {'project': str(self.project.pk)})
+        self.assertEqual(response.status_code, 200)
+
+
+class PaymentImportTest(TestCase):
+    """Test bulk payment import from CSV files"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.project = Project.objects.create(name="Website", customer=self.customer, total_cost=1000.00)
+        self.other = Project.objects.create(name="Mobile App", customer=self.customer)
+        self.csv = (
+            "Project,Project Name,Amount,Payment Date,Payment Method,Reference Number\n"
+            f"{self.project.pk},,600.00,2024-01-15,Cash,INV-1\n"
+            ",Mobile App,250,2024-01-15,,INV-2\n"
+            ",,,,,\n"
+            f"{self.project.pk},,700.00,2024-02-01,check,INV-3\n"
+            "999,,100,2024-01-15,,\n"
+            f"{self.other.pk},,abc,2024-01-15,,\n"
+        )
+    
+    def upload(self, **params):
+        upload = SimpleUploadedFile('payments.csv', self.csv.encode(), content_type='text/csv')
+        url = reverse('payment-bulk')
+        if params:
+            url += '?' + '&'.join(f'{name}={value}' for name, value in params.items())
+        return self.client.post(url, {'file': upload})
+    
+    def test_api_import(self):
+        """Test that valid rows are imported, invalid ones reported and derived data kept in step"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload()
+        
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body['created'], body['projects']), (3, 2))
+        self.assertEqual(body['errors'], [
+            'row 6: project 999 does not exist',
+            'row 7: invalid amount "abc"',
+        ])
+        
+        self.project.refresh_from_db()
+        self.assertEqual((float(self.project.total_revenue), float(self.project.profit)), (1300.00, 300.00))
+        self.assertEqual(PaymentPart.objects.get(reference_number='INV-2').project, self.other)
+        self.assertEqual(check_financial_summary(), [])
+        rollups = set(PaymentRollup.objects.values_list('period', 'period_start', 'project_id', 'total_amount'))
+        rebuild_payment_rollups()
+        self.assertEqual(rollups, set(PaymentRollup.objects.values_list('period', 'period_start', 'project_id', 'total_amount')))
+        self.assertEqual(
+            set(matching('payment', 'inv').values_list('object_id', flat=True)),
+            set(PaymentPart.objects.values_list('pk', flat=True)),
+        )
+    
+    def test_dry_run(self):
+        """Test that a dry run reports without saving"""
+        response = self.upload(dry_run=1)
+        
+        self.assertEqual(response.json()['created'], 3)
+        self.assertFalse(PaymentPart.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(float(self.project.total_revenue), 0.00)
+    
+    def test_command_in_batches(self):
+        """Test the import_payments command with batches smaller than the file"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(self.csv)
+        self.addCleanup(os.remove, f.name)
+        
+        out = StringIO()
+        call_command('import_payments', f.name, '--batch-size', '2', stdout=out)
+        
+        self.assertIn('Imported 3 payments for 2 projects, skipped 2 invalid rows', out.getvalue())
+        self.assertIn('row 7: invalid amount', out.getvalue())
+        self.assertEqual(check_financial_summary(), [])
+    
+    def test_unsupported_file(self):
+        """Test that other file types are rejected"""
+        upload = SimpleUploadedFile('payments.txt', b'amount\n1\n')
+        response = self.client.post(reverse('payment-bulk'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
@@ -1,11 +1,21 @@
 """
 Tests for Projects app
 """
+import json
+from datetime import date
+from unittest import mock
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
-from projects.models import Project, ProjectType
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from projects.models import Project, ProjectType, ProjectImage
 from customers.models import Customer
+from payments.models import PaymentPart, PaymentRollup
+from dashboard.summary import check_financial_summary, get_summary
+from search.index import matching
+from sync.models import SheetSyncOutbox, Tombstone
 
 
 class ProjectModelTest(TestCase):
@@ -43,6 +53,22 @@ class ProjectModelTest(TestCase):
     def test_project_str(self):
         """Test project string representation"""
         self.assertEqual(str(self.project), "Test Project")
+    
+    def test_with_financials(self):
+        """Test that payment totals are annotated instead of queried per project"""
+        PaymentPart.objects.create(project=self.project, amount=2500.00, payment_date=date(2024, 1, 15))
+        PaymentPart.objects.create(project=self.project, amount=1500.00, payment_date=date(2024, 2, 15))
+        Project.objects.create(name="Unpaid Project", customer=self.customer, total_budget=300.00)
+        
+        projects = {project.name: project for project in Project.objects.with_financials()}
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(float(projects["Test Project"].total_paid), 4000.00)
+            self.assertEqual(float(projects["Test Project"].outstanding_balance), 6000.00)
+            self.assertEqual(projects["Test Project"].payment_count, 2)
+            self.assertEqual(float(projects["Unpaid Project"].total_paid), 0.00)
+            self.assertEqual(float(projects["Unpaid Project"].outstanding_balance), 300.00)
+        self.assertEqual(float(self.project.outstanding_balance), 6000.00)
 
 
 class ProjectViewTest(TestCase):
@@ -91,4 +117,259 @@ class ProjectViewTest(TestCase):
         })
         self.assertEqual(response.status_code, 302)  # Redirect after creation
         self.assertTrue(Project.objects.filter(name='New Project').exists())
+    
+    def test_project_api_list_includes_financials(self):
+        """Test that the API list serves annotated payment totals"""
+        project = Project.objects.create(name="API Project", customer=self.customer, total_budget=1000.00)
+        PaymentPart.objects.create(project=project, amount=400.00, payment_date=date(2024, 1, 15))
+        self.client.login(username='testuser', password='testpass123')
+        
+        response = self.client.get(reverse('project-list'))
+        
+        result = response.json()['results'][0]
+        self.assertEqual(float(result['total_paid']), 400.00)
+        self.assertEqual(float(result['outstanding_balance']), 600.00)
+        self.assertEqual(result['payment_count'], 1)
+    
+    def test_project_api_list_primary_images(self):
+        """Test that primary images are listed with a constant number of queries"""
+        self.client.login(username='testuser', password='testpass123')
+        
+        def list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('project-list'))
+            return response, len(queries)
+        
+        project = Project.objects.create(name="Project 0", customer=self.customer)
+        ProjectImage.objects.create(project=project, image='projects/images/0.jpg')
+        response, single_project_queries = list_queries()
+        
+        for i in range(1, 4):
+            project = Project.objects.create(name=f"Project {i}", customer=self.customer)
+            ProjectImage.objects.create(project=project, image=f'projects/images/{i}-primary.jpg', is_primary=True)
+            ProjectImage.objects.create(project=project, image=f'projects/images/{i}.jpg')
+        response, queries = list_queries()
+        
+        self.assertEqual(queries, single_project_queries)
+        images = {result['name']: result['primary_image'] for result in response.json()['results']}
+        self.assertTrue(images["Project 2"].endswith('/media/projects/images/2-primary.jpg'))
+        self.assertTrue(images["Project 0"].endswith('/media/projects/images/0.jpg'))
+    
+    def test_filtered_list_totals_in_one_cached_query(self):
+        """Test that a filtered list gets its totals and count from one aggregate, cached until projects change"""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for i in range(3):
+            Project.objects.create(name=f"Website {i}", customer=self.customer, total_budget=1000, status='planning')
+        Project.objects.create(name="Mobile App", customer=self.customer, total_budget=500, status='planning')
+        self.client.login(username='testuser', password='testpass123')
+        
+        def list_aggregates():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('projects:list'), {'search': 'website', 'status': 'planning'})
+            return response, [query['sql'] for query in queries if 'SUM(' in query['sql']]
+        
+        response, aggregates = list_aggregates()
+        self.assertEqual(len(aggregates), 1)
+        self.assertIn('COUNT(', aggregates[0])
+        self.assertEqual(float(response.context['total_budget']), 3000.00)
+        self.assertEqual(response.context['page_obj'].count, 3)
+        
+        response, aggregates = list_aggregates()
+        self.assertEqual(aggregates, [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(name="Website 3", customer=self.customer, total_budget=1000, status='planning')
+        response, aggregates = list_aggregates()
+        self.assertEqual(response.context['page_obj'].count, 4)
+    
+    def test_project_api_write_is_atomic(self):
+        """Test that an API save is rolled back when a signal handler fails"""
+        self.client.login(username='testuser', password='testpass123')
+        
+        with mock.patch('search.signals.index_objects', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('project-list'), {'name': 'Half Saved', 'customer': self.customer.id})
+        
+        self.assertFalse(Project.objects.filter(name='Half Saved').exists())
 
+
+class ProjectBulkApiTest(TestCase):
+    """Test bulk project create, update and delete through the API"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.other_customer = Customer.objects.create(name="Other Customer")
+        self.project_type = ProjectType.objects.create(name="Web Development")
+        self.url = reverse('project-bulk')
+    
+    def bulk(self, method, items):
+        return getattr(self.client, method)(self.url, json.dumps(items), content_type='application/json')
+    
+    def test_bulk_create_uses_fixed_queries(self):
+        """Test that creating many projects costs the same queries as a few, keeping derived data in step"""
+        def create(count, prefix):
+            items = [
+                {'name': f'{prefix} {i}', 'customer': self.customer.pk, 'project_type': self.project_type.pk,
+                 'total_budget': '100.00'}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.bulk('post', items)
+            return response, len(queries)
+        
+        create(1, 'First')  # creates the summary rows
+        response, few_queries = create(3, 'Small')
+        # Few enough for one INSERT within SQLite's parameter limit
+        response, many_queries = create(40, 'Large')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(many_queries, few_queries)
+        results = response.json()['results']
+        self.assertEqual(len(results), 40)
+        self.assertTrue(all(result['status'] == 201 for result in results))
+        self.assertEqual(Project.objects.get(pk=results[0]['id']).name, 'Large 0')
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(get_summary().project_count, 44)
+        self.assertEqual(
+            SheetSyncOutbox.objects.filter(entity='project', object_id=results[-1]['id']).count(), 1
+        )
+        self.assertIn(results[-1]['id'], matching('project', 'large 39').values_list('object_id', flat=True))
+    
+    def test_bulk_create_reports_invalid_items(self):
+        """Test that invalid items are reported per item and the valid ones still created"""
+        response = self.bulk('post', [
+            {'name': 'Good', 'customer': self.customer.pk},
+            {'name': 'No Customer'},
+            {'name': 'Unknown Customer', 'customer': 999},
+        ])
+        
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 400])
+        self.assertIn('customer', results[1]['errors'])
+        self.assertIn('999', results[2]['errors']['customer'][0])
+        self.assertEqual(list(Project.objects.values_list('name', flat=True)), ['Good'])
+    
+    def test_bulk_update(self):
+        """Test that updates move projects between summary rows and rollups"""
+        project = Project.objects.create(name="Website", customer=self.customer, total_budget=1000)
+        other = Project.objects.create(name="Mobile App", customer=self.customer, total_budget=500)
+        PaymentPart.objects.create(project=project, amount=400.00, payment_date=date(2024, 1, 15))
+        
+        response = self.bulk('patch', [
+            {'id': project.pk, 'customer': self.other_customer.pk, 'status': 'completed'},
+            {'id': other.pk, 'name': 'Mobile Redesign', 'total_budget': '750.00'},
+            {'id': other.pk, 'name': 'Twice'},
+            {'id': 999, 'name': 'Missing'},
+        ])
+        
+        self.assertEqual([result['status'] for result in response.json()['results']], [200, 200, 400, 404])
+        project.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((project.customer, project.status), (self.other_customer, 'completed'))
+        self.assertEqual((other.name, float(other.total_budget)), ('Mobile Redesign', 750.00))
+        self.assertGreater(other.updated_at, other.created_at)
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(
+            set(PaymentRollup.objects.values_list('customer_id', flat=True)), {self.other_customer.pk}
+        )
+        self.assertEqual(list(matching('project', 'redesign').values_list('object_id', flat=True)), [other.pk])
+    
+    def test_bulk_update_reports_invalid_values(self):
+        """Test that an invalid item is reported without blocking the others"""
+        project = Project.objects.create(name="Website", customer=self.customer)
+        other = Project.objects.create(name="Mobile App", customer=self.customer)
+        
+        response = self.bulk('patch', [
+            {'id': project.pk, 'total_budget': 'lots'},
+            {'id': other.pk, 'status': 'on_hold'},
+        ])
+        
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [400, 200])
+        self.assertIn('total_budget', results[0]['errors'])
+        self.assertEqual(Project.objects.get(pk=other.pk).status, 'on_hold')
+    
+    def test_bulk_update_rejects_invalid_ids(self):
+        """Test that ids that are not integers are reported per item instead of failing the request"""
+        project = Project.objects.create(name="Website", customer=self.customer)
+        
+        response = self.bulk('patch', [
+            {'id': [project.pk], 'name': 'List'},
+            {'id': {'pk': project.pk}, 'name': 'Dict'},
+            {'id': str(project.pk), 'name': 'Text'},
+            {'name': 'Missing'},
+            'not an object',
+            {'id': project.pk, 'name': 'Renamed'},
+        ])
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [400, 400, 400, 400, 400, 200])
+        self.assertIn('id', results[0]['errors'])
+        self.assertEqual(Project.objects.get(pk=project.pk).name, 'Renamed')
+    
+    def test_bulk_delete(self):
+        """Test that deleting projects removes them and their payments from the summary"""
+        project = Project.objects.create(name="Website", customer=self.customer, total_budget=1000)
+        kept = Project.objects.create(name="Mobile App", customer=self.customer)
+        PaymentPart.objects.create(project=project, amount=400.00, payment_date=date(2024, 1, 15))
+        
+        response = self.bulk('delete', [project.pk, 999])
+        
+        self.assertEqual([result['status'] for result in response.json()['results']], [204, 404])
+        self.assertEqual(list(Project.objects.all()), [kept])
+        self.assertEqual(check_financial_summary(), [])
+    
+    def test_bulk_delete_rejects_invalid_ids(self):
+        """Test that items that are not integer ids are reported per item instead of failing the request"""
+        project = Project.objects.create(name="Website", customer=self.customer)
+        
+        response = self.bulk('delete', [{'id': project.pk}, [project.pk], str(project.pk), True, project.pk, project.pk])
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [400, 400, 400, 400, 204, 400])
+        self.assertEqual(results[0]['errors'], {'id': ['A valid integer is required.']})
+        self.assertEqual(results[5]['errors'], {'id': ['Duplicate id.']})
+        self.assertFalse(Project.objects.exists())
+    
+    def test_bulk_delete_uses_fixed_queries(self):
+        """Test that deleting many projects costs the same queries as a few, keeping derived data in step"""
+        def delete(count, prefix):
+            projects = []
+            for i in range(count):
+                project = Project.objects.create(name=f"{prefix} {i}", customer=self.customer, total_budget=100)
+                PaymentPart.objects.create(project=project, amount=40, payment_date=date(2024, 1, 15))
+                ProjectImage.objects.create(project=project, image=f'projects/images/{prefix}-{i}.jpg')
+                projects.append(project)
+            ids = [project.pk for project in projects]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.bulk('delete', ids)
+            return response, ids, len(queries)
+        
+        response, ids, few_queries = delete(2, 'Small')
+        response, ids, many_queries = delete(20, 'Large')
+        
+        self.assertEqual(many_queries, few_queries)
+        self.assertTrue(all(result['status'] == 204 for result in response.json()['results']))
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(PaymentPart.objects.exists())
+        self.assertFalse(ProjectImage.objects.exists())
+        self.assertFalse(PaymentRollup.objects.exists())
+        self.assertEqual(check_financial_summary(), [])
+        self.assertEqual(get_summary().project_count, 0)
+        self.assertEqual(list(matching('project', 'large').values_list('object_id', flat=True)), [])
+        self.assertEqual(
+            set(SheetSyncOutbox.objects.filter(entity='project', action='delete').values_list('object_id', flat=True))
+            & set(ids), set(ids)
+        )
+        self.assertEqual(Tombstone.objects.filter(entity='payment').count(), 22)
+    
+    def test_bulk_rejects_non_lists(self):
+        """Test that the payload must be a list of at most BULK_MAX_ITEMS items"""
+        self.assertEqual(self.bulk('post', {'name': 'Website'}).status_code, 400)
+        with self.settings(BULK_MAX_ITEMS=2):
+            self.assertEqual(self.bulk('delete', [1, 2, 3]).status_code, 400)
@@ -0,0 +1,212 @@
+"""
+Tests for the full-text search index
+"""
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from customers.models import Customer
+from projects.models import Project, ProjectType
+from payments.models import PaymentPart
+from search.index import matching, search
+from search.models import SearchDocument
+
+
+class SearchIndexTest(TestCase):
+    """Test that search documents follow writes and match like the list views"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.customer = Customer.objects.create(
+            name="Acme Corporation", email="billing@acme.example", whatsapp_number="+1234567890"
+        )
+        self.website = Project.objects.create(
+            name="Website Redesign", description="Marketing site", customer=self.customer, total_budget=1000
+        )
+        self.app = Project.objects.create(
+            name="Mobile App", description="Redesign of the website checkout", customer=self.customer,
+            total_budget=2000,
+        )
+        self.payment = PaymentPart.objects.create(
+            project=self.website, amount=500, payment_date=date(2024, 1, 15), reference_number="INV-2041"
+        )
+    
+    def ids(self, entity, query):
+        return set(matching(entity, query).values_list('object_id', flat=True))
+    
+    def test_prefix_and_all_words(self):
+        """Test that every word must match, as a prefix"""
+        self.assertEqual(self.ids('project', 'redes'), {self.website.pk, self.app.pk})
+        self.assertEqual(self.ids('project', 'website redesign'), {self.website.pk, self.app.pk})
+        self.assertEqual(self.ids('project', 'mobile redesign'), {self.app.pk})
+        self.assertEqual(self.ids('customer', 'billing@acme'), {self.customer.pk})
+        self.assertEqual(self.ids('payment', 'inv 2041'), {self.payment.pk})
+        self.assertEqual(self.ids('project', '%'), set())
+    
+    def test_substring_match(self):
+        """Test that text inside a word still matches, as icontains did"""
+        self.assertEqual(self.ids('project', 'obile'), {self.app.pk})
+        self.assertEqual(self.ids('customer', 'poration'), {self.customer.pk})
+        self.assertEqual(self.ids('payment', 'nv-204'), {self.payment.pk})
+        self.assertEqual(search('project', 'obile'), [self.app.pk])
+        self.assertEqual(search('project', 'ebsite'), [self.app.pk, self.website.pk])
+        
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('projects:list'), {'search': 'obile'})
+        self.assertEqual([project.pk for project in response.context['page_obj']], [self.app.pk])
+    
+    def test_substring_match_uses_indexes(self):
+        """Test that substring matches come from the trigram index, not a scan of the documents"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(search('project', 'obile'), [self.app.pk])
+            self.assertEqual(self.ids('project', 'obile'), {self.app.pk})
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+        
+        # Too short for a trigram, so only word prefixes match
+        self.assertEqual(self.ids('project', 'mo'), {self.app.pk})
+        self.assertEqual(self.ids('project', 'ob'), set())
+        self.assertEqual(self.ids('project', '"obile'), set())
+    
+    def test_ranked_search(self):
+        """Test that a match on more fields ranks first"""
+        self.assertEqual(search('project', 'website redesign'), [self.website.pk, self.app.pk])
+    
+    def test_related_names_are_reindexed(self):
+        """Test that renaming a customer or project updates the documents showing its name"""
+        self.customer.name = "Globex"
+        self.customer.save()
+        self.website.name = "Storefront"
+        self.website.save()
+        
+        self.assertEqual(self.ids('project', 'globex'), {self.website.pk, self.app.pk})
+        self.assertEqual(self.ids('project', 'acme'), set())
+        self.assertEqual(self.ids('payment', 'storefront'), {self.payment.pk})
+    
+    def test_delete_removes_documents(self):
+        """Test that deleting a customer drops its cascaded documents"""
+        self.customer.delete()
+        self.assertFalse(SearchDocument.objects.exists())
+    
+    def test_rebuild_matches_incremental_index(self):
+        """Test that the rebuild command reproduces the signal-maintained documents"""
+        incremental = set(SearchDocument.objects.values_list('entity', 'object_id', 'content'))
+        call_command('rebuild_search_index', stdout=mock.MagicMock())
+        
+        self.assertEqual(incremental, set(SearchDocument.objects.values_list('entity', 'object_id', 'content')))
+        self.assertEqual(self.ids('project', 'mobile'), {self.app.pk})
+    
+    def test_list_views_use_index(self):
+        """Test that the HTML lists search through the index"""
+        self.client.force_login(self.user)
+        
+        response = self.client.get(reverse('projects:list'), {'search': 'mobile'})
+        self.assertEqual([project.pk for project in response.context['page_obj']], [self.app.pk])
+        
+        response = self.client.get(reverse('payments:list'), {'search': 'website'})
+        self.assertEqual([payment.pk for payment in response.context['page_obj']], [self.payment.pk])
+
+
+class GlobalSearchAPITest(TestCase):
+    """Test the cross-entity typeahead endpoint"""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Acme Corporation", whatsapp_number="+1234567890")
+        self.project = Project.objects.create(name="Acme Portal", customer=self.customer, total_budget=1000)
+        self.payment = PaymentPart.objects.create(
+            project=self.project, amount=500, payment_date=date(2024, 1, 15), reference_number="INV-1"
+        )
+    
+    def test_hits_per_entity(self):
+        """Test that one query returns matching projects, customers and payments"""
+        response = self.client.get(reverse('search-list'), {'q': 'ACME  '})
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([hit['id'] for hit in results['projects']], [self.project.pk])
+        self.assertEqual(results['projects'][0]['customer_name'], "Acme Corporation")
+        self.assertEqual([hit['id'] for hit in results['customers']], [self.customer.pk])
+        self.assertEqual([hit['id'] for hit in results['payments']], [self.payment.pk])
+        self.assertEqual(results['payments'][0]['url'], reverse('payments:detail', kwargs={'pk': self.payment.pk}))
+    
+    def test_results_are_cached_until_data_changes(self):
+        """Test that repeated prefixes skip the database and writes invalidate them"""
+        self.client.get(reverse('search-list'), {'q': 'acme'})
+        
+        # Session and user lookups only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('search-list'), {'q': 'Acme'})
+        self.assertEqual(len(response.json()['results']['projects']), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(name="Acme Mobile", customer=self.customer, total_budget=500)
+        response = self.client.get(reverse('search-list'), {'q': 'acme'})
+        self.assertEqual(len(response.json()['results']['projects']), 2)
+    
+    def test_limit(self):
+        """Test the per-entity limit and its validation"""
+        Project.objects.create(name="Acme Mobile", customer=self.customer, total_budget=500)
+        
+        response = self.client.get(reverse('search-list'), {'q': 'acme', 'limit': 1})
+        self.assertEqual(len(response.json()['results']['projects']), 1)
+        
+        response = self.client.get(reverse('search-list'), {'q': 'acme', 'limit': 100})
+        self.assertEqual(response.status_code, 400)
+
+
+class AutocompleteTest(TestCase):
+    """Test the autocomplete endpoints and the forms' autocomplete selects"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customers = [
+            Customer.objects.create(name=f"Customer {i:02d}", whatsapp_number="+1234567890") for i in range(25)
+        ]
+        self.acme = Customer.objects.create(name="Acme Corporation", whatsapp_number="+1234567890")
+        self.project = Project.objects.create(name="Acme Portal", customer=self.acme, total_budget=1000)
+    
+    def test_autocomplete_pages_by_name(self):
+        """Test that choices are ordered by name and paged with next links"""
+        response = self.client.get(reverse('customer-autocomplete'))
+        body = response.json()
+        
+        self.assertEqual(body['results'][0], {'id': self.acme.pk, 'text': "Acme Corporation"})
+        self.assertEqual(len(body['results']), 20)
+        self.assertEqual(len(self.client.get(body['next']).json()['results']), 6)
+    
+    def test_autocomplete_filters(self):
+        """Test matching through the search index, and by name for project types"""
+        response = self.client.get(reverse('customer-autocomplete'), {'q': 'acme'})
+        self.assertEqual([choice['id'] for choice in response.json()['results']], [self.acme.pk])
+        
+        response = self.client.get(reverse('project-autocomplete'), {'q': 'acme port'})
+        self.assertEqual([choice['id'] for choice in response.json()['results']], [self.project.pk])
+        
+        ProjectType.objects.create(name="Web Development")
+        response = self.client.get(reverse('projecttype-autocomplete'), {'q': 'web'})
+        self.assertEqual([choice['text'] for choice in response.json()['results']], ["Web Development"])
+    
+    def test_form_renders_selected_choice_only(self):
+        """Test that forms do not list every customer"""
+        response = self.client.get(reverse('projects:create'))
+        self.assertNotContains(response, "Customer 01")
+        self.assertContains(response, 'data-autocomplete-url="{}"'.format(reverse('customer-autocomplete')))
+        
+        response = self.client.get(reverse('projects:update', kwargs={'pk': self.project.pk}))
+        self.assertContains(response, f'<option value="{self.acme.pk}" selected>Acme Corporation</option>', html=True)
+        self.assertNotContains(response, "Customer 01")
+        
+        response = self.client.get(reverse('payments:create'))
+        self.assertNotContains(response, "Acme Portal")
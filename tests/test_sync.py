@@ -0,0 +1,388 @@
+"""
+Tests for Sync app
+"""
+import base64
+import json
+from datetime import date, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from customers.models import Customer
+from projects.models import Project, ProjectType
+from payments.models import PaymentPart
+from sync.models import SheetSyncOutbox
+from sync.outbox import process_outbox
+from sync.pull import pull_from_sheets
+from services.google_sheets import GoogleSheetsService, SHEETS, customer_sheet_data, project_sheet_data
+from services.sheets_backends import MemoryBackend
+
+
+class SheetSyncOutboxTest(TestCase):
+    """Test the Google Sheets sync outbox"""
+    
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.project = Project.objects.create(name="Test Project", customer=self.customer)
+        self.payment = PaymentPart.objects.create(
+            project=self.project,
+            amount=500.00,
+            payment_date=date(2024, 1, 15),
+        )
+        self.sheets_service = mock.MagicMock()
+    
+    def test_saves_are_queued(self):
+        """Test that saving records writes outbox entries"""
+        entries = set(SheetSyncOutbox.objects.values_list('entity', 'object_id', 'action'))
+        self.assertEqual(entries, {
+            ('customer', self.customer.id, 'upsert'),
+            ('project', self.project.id, 'upsert'),
+            ('payment', self.payment.id, 'upsert'),
+        })
+    
+    def test_process_coalesces_changes(self):
+        """Test that repeated changes to a record are synced once"""
+        self.project.name = "Renamed"
+        self.project.save()
+        self.project.save()
+        
+        result = process_outbox(self.sheets_service)
+        
+        self.assertEqual(result, {'synced': 5, 'failed': 0})
+        self.assertFalse(SheetSyncOutbox.objects.exists())
+        projects_data = self.sheets_service.upsert_projects.call_args.args[0]
+        self.assertEqual([project['name'] for project in projects_data], ["Renamed"])
+        self.sheets_service.upsert_projects.assert_called_once()
+    
+    def test_cascade_delete_queues_removals(self):
+        """Test that deleting a customer removes its projects and payments from Sheets"""
+        customer_id, project_id, payment_id = self.customer.id, self.project.id, self.payment.id
+        process_outbox(self.sheets_service)
+        self.customer.delete()
+        
+        process_outbox(self.sheets_service)
+        
+        self.assertEqual(self.sheets_service.upsert_customers.call_args.kwargs['deleted_ids'], [customer_id])
+        self.assertEqual(self.sheets_service.upsert_projects.call_args.kwargs['deleted_ids'], [project_id])
+        self.assertEqual(self.sheets_service.upsert_payments.call_args.kwargs['deleted_ids'], [payment_id])
+    
+    def test_failed_sync_is_retried_later(self):
+        """Test that failures are kept with backoff instead of raising"""
+        self.sheets_service.upsert_projects.side_effect = Exception("Quota exceeded")
+        
+        result = process_outbox(self.sheets_service)
+        
+        self.assertEqual(result, {'synced': 2, 'failed': 1})
+        entry = SheetSyncOutbox.objects.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.last_error, "Quota exceeded")
+        self.assertEqual(process_outbox(self.sheets_service), {'synced': 0, 'failed': 0})
+    
+    def test_claimed_entries_are_skipped_by_other_workers(self):
+        """Test that a batch being pushed is not taken by a second worker until its claim expires"""
+        other_results = []
+        self.sheets_service.upsert_customers.side_effect = (
+            lambda *args, **kwargs: other_results.append(process_outbox(mock.MagicMock()))
+        )
+        
+        self.assertEqual(process_outbox(self.sheets_service), {'synced': 3, 'failed': 0})
+        self.assertEqual(other_results, [{'synced': 0, 'failed': 0}])
+    
+    @override_settings(GOOGLE_SHEETS_BACKEND='services.sheets_backends.MemoryBackend')
+    def test_each_batch_reloads_the_row_index(self):
+        """Test that rows moved in the sheet between batches are still updated in place"""
+        GoogleSheetsService.clear_cache()
+        MemoryBackend.store.reset()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.addCleanup(MemoryBackend.store.reset)
+        sheets_service = GoogleSheetsService()
+        process_outbox(sheets_service)
+        
+        # Another process inserts a row above the project
+        spreadsheet = MemoryBackend.store.spreadsheets[sheets_service.spreadsheet_name]
+        spreadsheet.worksheets['Projects'].rows.insert(1, [999, 'Inserted'])
+        self.project.name = "Renamed"
+        self.project.save()
+        process_outbox(sheets_service)
+        
+        rows = sheets_service.read_sheet('projects')
+        self.assertEqual([row[:2] for row in rows], [[999, 'Inserted'], [self.project.pk, 'Renamed']])
+    
+    def test_sync_to_sheets_action_is_queued(self):
+        """Test that the API sync action queues the record for the worker instead of calling Sheets"""
+        SheetSyncOutbox.objects.all().delete()
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(user)
+        
+        with mock.patch('services.google_sheets.GoogleSheetsService') as service_class:
+            response = self.client.post(reverse('project-sync-to-sheets', args=[self.project.pk]))
+        
+        self.assertEqual(response.status_code, 202)
+        service_class.assert_not_called()
+        self.assertEqual(list(SheetSyncOutbox.objects.values_list('entity', 'object_id')), [('project', self.project.pk)])
+
+
+class SheetsExportCommandTest(TestCase):
+    """Test the sheets_export management command"""
+    
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.projects = [
+            Project.objects.create(name=f"Project {i}", customer=self.customer) for i in range(3)
+        ]
+    
+    @mock.patch('sync.management.commands.sheets_export.GoogleSheetsService')
+    def test_resume_skips_exported_records(self, service_class):
+        """Test that --resume continues after the last exported project"""
+        sheets_service = service_class.return_value
+        sheets_service.export_position.return_value = (self.projects[0].id, 3)
+        sheets_service.export_rows.side_effect = lambda sheet, records, total, **kwargs: len(list(records))
+        
+        call_command('sheets_export', '--only', 'projects', '--resume', stdout=mock.MagicMock())
+        
+        sheet, records, total = sheets_service.export_rows.call_args.args
+        self.assertEqual(sheet, 'projects')
+        self.assertEqual(total, 2)
+        self.assertEqual(sheets_service.export_rows.call_args.kwargs['start_row'], 3)
+
+
+class SheetsPullTest(TestCase):
+    """Test importing Google Sheets edits"""
+    
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Customer")
+        self.project = Project.objects.create(
+            name="Test Project", customer=self.customer, total_budget=1000, total_cost=400
+        )
+        self.sheets = {'customers': [], 'projects': [], 'payments': []}
+        self.sheets_service = mock.MagicMock()
+        self.sheets_service.read_sheet.side_effect = lambda sheet: self.sheets[sheet]
+    
+    def sheet_row(self, sheet, obj):
+        build_data = {'customers': customer_sheet_data, 'projects': project_sheet_data}[sheet]
+        return SHEETS[sheet][2](build_data(obj))
+    
+    def test_pull_applies_sheet_edits(self):
+        """Test that edited and new rows are saved, with project revenue taken from payments"""
+        PaymentPart.objects.create(project=self.project, amount=300, payment_date=date(2024, 1, 15))
+        row = self.sheet_row('projects', self.project)
+        row[7] = 1500
+        row[8] = 100
+        self.sheets['projects'] = [row]
+        self.sheets['customers'] = [self.sheet_row('customers', self.customer), ['', 'New Customer']]
+        
+        result = pull_from_sheets(self.sheets_service)
+        
+        self.assertEqual(result['projects'], {'created': 0, 'updated': 1, 'unchanged': 0})
+        self.assertEqual(result['customers'], {'created': 1, 'updated': 0, 'unchanged': 1})
+        self.project.refresh_from_db()
+        self.assertEqual(float(self.project.total_cost), 100.00)
+        self.assertEqual(float(self.project.total_revenue), 300.00)
+        self.assertEqual(float(self.project.profit), 200.00)
+        new_customer = Customer.objects.get(name="New Customer")
+        self.assertTrue(
+            SheetSyncOutbox.objects.filter(entity='customer', object_id=new_customer.id, sheet_row=3).exists()
+        )
+    
+    def test_pulled_payments_queue_their_projects(self):
+        """Test that projects whose totals a pulled payment changed are queued for the sheet"""
+        SheetSyncOutbox.objects.all().delete()
+        self.sheets['payments'] = [['', 'Test Project', 250, '2024-01-15', 'Cash']]
+        
+        pull_from_sheets(self.sheets_service, only=['payments'])
+        
+        self.project.refresh_from_db()
+        self.assertEqual(float(self.project.total_revenue), 250.00)
+        self.assertTrue(SheetSyncOutbox.objects.filter(entity='project', object_id=self.project.pk).exists())
+    
+    def test_pull_reads_serial_dates(self):
+        """Test that dates typed into Sheets, which are read as day numbers, are accepted"""
+        self.sheets['payments'] = [['', 'Test Project', 250, 45306, 'Cash']]
+        
+        result = pull_from_sheets(self.sheets_service, only=['payments'])
+        
+        self.assertEqual(result['conflicts'], [])
+        self.assertEqual(PaymentPart.objects.get().payment_date, date(2024, 1, 15))
+    
+    def test_pull_reports_conflicts(self):
+        """Test that rows changed in the database since the last sync are not overwritten"""
+        row = self.sheet_row('projects', self.project)
+        row[1] = "Sheet Name"
+        row[17] = '2000-01-01 00:00:00'
+        self.sheets['projects'] = [row, [999, 'Ghost', '', '', 'Test Customer', 'Planning']]
+        
+        result = pull_from_sheets(self.sheets_service, only=['projects'])
+        
+        self.assertEqual(result['projects']['updated'], 0)
+        self.assertEqual(len(result['conflicts']), 2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "Test Project")
+    
+    def test_dry_run_saves_nothing(self):
+        """Test that a dry run rolls back"""
+        self.sheets['customers'] = [['', 'Dry Run Customer']]
+        
+        result = pull_from_sheets(self.sheets_service, dry_run=True)
+        
+        self.assertEqual(result['customers']['created'], 1)
+        self.assertFalse(Customer.objects.filter(name="Dry Run Customer").exists())
+        self.assertFalse(SheetSyncOutbox.objects.filter(sheet_row__isnull=False).exists())
+    
+    @override_settings(GOOGLE_SHEETS_BACKEND='services.sheets_backends.MemoryBackend')
+    def test_created_rows_are_written_back_and_editable(self):
+        """Test that the worker fills in a pulled row and a later edit of it is pulled without a conflict"""
+        GoogleSheetsService.clear_cache()
+        MemoryBackend.store.reset()
+        self.addCleanup(GoogleSheetsService.clear_cache)
+        self.addCleanup(MemoryBackend.store.reset)
+        sheets_service = GoogleSheetsService()
+        process_outbox(sheets_service)
+        worksheet = MemoryBackend.store.spreadsheets[sheets_service.spreadsheet_name].worksheets['Customers']
+        worksheet.append_row(['', 'Typed Customer'])
+        
+        pull_from_sheets(sheets_service, only=['customers'])
+        process_outbox(sheets_service)
+        
+        customer = Customer.objects.get(name="Typed Customer")
+        rows = sheets_service.read_sheet('customers')
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:2], [customer.pk, 'Typed Customer'])
+        self.assertEqual(rows[1][9], customer.updated_at.strftime('%Y-%m-%d %H:%M:%S'))
+        
+        worksheet.rows[2][2] = 'typed@example.com'
+        result = pull_from_sheets(sheets_service, only=['customers'])
+        
+        self.assertEqual(result['conflicts'], [])
+        self.assertEqual(result['customers']['updated'], 1)
+        customer.refresh_from_db()
+        self.assertEqual(customer.email, 'typed@example.com')
+    
+    def test_blank_updated_at_is_not_a_conflict(self):
+        """Test that a row that was never written back is taken from the sheet"""
+        row = self.sheet_row('projects', self.project)
+        row[1] = "Sheet Name"
+        row[17] = ''
+        self.sheets['projects'] = [row]
+        
+        result = pull_from_sheets(self.sheets_service, only=['projects'])
+        
+        self.assertEqual(result['conflicts'], [])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "Sheet Name")
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class DeltaSyncApiTest(TestCase):
+    """Test the changes-since API for clients keeping a local copy"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name="Acme")
+        self.project = Project.objects.create(name="Website", customer=self.customer)
+    
+    def sync(self, since=None):
+        response = self.client.get(reverse('sync-list'), {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    def test_first_sync_then_changes_only(self):
+        """Test that later syncs return only changed records and tombstones for deletions"""
+        first = self.sync()
+        self.assertEqual([project['name'] for project in first['projects']], ['Website'])
+        self.assertEqual([customer['name'] for customer in first['customers']], ['Acme'])
+        self.assertFalse(first['has_more'])
+        
+        unchanged = self.sync(first['next'])
+        self.assertEqual((unchanged['projects'], unchanged['customers'], unchanged['payments']), ([], [], []))
+        
+        other = Customer.objects.create(name="Globex")
+        other_project = Project.objects.create(name="Mobile App", customer=other)
+        payment = PaymentPart.objects.create(project=other_project, amount=100, payment_date=date(2024, 1, 15))
+        self.project.name = "Website Redesign"
+        self.project.save()
+        changes = self.sync(unchanged['next'])
+        self.assertEqual(
+            [project['name'] for project in changes['projects']], ['Mobile App', 'Website Redesign']
+        )
+        self.assertEqual([customer['id'] for customer in changes['customers']], [other.pk])
+        self.assertEqual([payment['id'] for payment in changes['payments']], [payment.pk])
+        
+        expected = {'projects': [other_project.pk], 'customers': [other.pk], 'payments': [payment.pk]}
+        other.delete()
+        deletions = self.sync(changes['next'])
+        self.assertEqual(deletions['deleted'], expected)
+        self.assertEqual(deletions['projects'], [])
+    
+    def test_records_have_no_fields_of_related_records(self):
+        """Test that synced records leave out related names and stats, which would go stale"""
+        PaymentPart.objects.create(project=self.project, amount=100, payment_date=date(2024, 1, 15))
+        first = self.sync()
+        self.assertEqual(first['projects'][0]['customer'], self.customer.pk)
+        self.assertEqual(first['projects'][0]['total_paid'], '100.00')
+        self.assertNotIn('customer_name', first['projects'][0])
+        self.assertNotIn('project_name', first['payments'][0])
+        self.assertNotIn('total_paid', first['customers'][0])
+        
+        self.customer.name = "Acme Industries"
+        self.customer.save()
+        changes = self.sync(first['next'])
+        self.assertEqual([customer['name'] for customer in changes['customers']], ["Acme Industries"])
+        self.assertEqual((changes['projects'], changes['payments']), ([], []))
+    
+    def test_deleting_a_project_type_changes_its_projects(self):
+        """Test that projects left without a type by a deletion are sent again and queued for Sheets"""
+        project_type = ProjectType.objects.create(name="Web")
+        self.project.project_type = project_type
+        self.project.save()
+        token = self.sync()['next']
+        SheetSyncOutbox.objects.all().delete()
+        
+        project_type.delete()
+        changes = self.sync(token)
+        self.assertEqual(
+            [(project['id'], project['project_type']) for project in changes['projects']], [(self.project.pk, None)]
+        )
+        self.assertTrue(SheetSyncOutbox.objects.filter(entity='project', object_id=self.project.pk).exists())
+    
+    def test_changes_are_paged(self):
+        """Test that a sync larger than SYNC_PAGE_SIZE continues where it stopped"""
+        for i in range(4):
+            Customer.objects.create(name=f"Customer {i}")
+        
+        seen, token = [], None
+        with self.settings(SYNC_PAGE_SIZE=2):
+            while True:
+                changes = self.sync(token)
+                seen += [customer['id'] for customer in changes['customers']]
+                token = changes['next']
+                if not changes['has_more']:
+                    break
+        
+        self.assertEqual(sorted(seen), sorted(Customer.objects.values_list('pk', flat=True)))
+        self.assertEqual(len(seen), 5)
+    
+    def test_recent_changes_are_sent_again(self):
+        """Test that rows committed late with an earlier timestamp are not missed within the overlap"""
+        with self.settings(SYNC_OVERLAP_SECONDS=60):
+            token = self.sync()['next']
+        late = Customer.objects.create(name="Late")
+        Customer.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=30))
+        self.assertIn(late.pk, [customer['id'] for customer in self.sync(token)['customers']])
+        
+        token = self.sync()['next']
+        Customer.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=30))
+        self.assertEqual(self.sync(token)['customers'], [])
+    
+    def test_invalid_token(self):
+        """Test that an unreadable token is rejected"""
+        response = self.client.get(reverse('sync-list'), {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
+        
+        # Well-formed, but with a timestamp that cannot be compared with aware ones
+        naive = {name: ['2024-01-15T10:30:00', 1] for name in ('projects', 'customers', 'payments', 'deleted')}
+        token = base64.urlsafe_b64encode(json.dumps(naive).encode()).decode()
+        response = self.client.get(reverse('sync-list'), {'since': token})
+        self.assertEqual(response.status_code, 400)